@@ -1,8 +1,23 @@
-import pandas as pd
 import os
-from openai import OpenAI
-from flask import Flask, request, jsonify, json, send_file
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from openai import OpenAI, RateLimitError
+from flask import Flask, Response, g, request, jsonify, json, send_file, stream_with_context
 from pyngrok import ngrok
+from hint_bundle import HintBundleStore, bundle_response
+from hint_cache import DefaultHintPool, QuestionCache, normalize_question
+from hint_table import HintFileWatcher, diff_hint_tables, load_hint_table, validate_hint_table
+from intent_router import IntentRouter
+from journal import RequestJournal
+from metrics import (HINT_PREFETCH, REGISTRY, RequestTrace, annotate_request, configure_journal, configure_slow_log,
+                     current_trace, label_request, record_llm_call, set_request_path, stage_timer)
+from rate_limit import QueueDeadline, RateLimiter, estimate_tokens, retry_after
+from scene_registry import load_scene_registry, referenced_objects
+from sessions import SessionStore
+from shared_cache import SharedDefaultHintPool, SharedQuestionCache, SharedSessionStore
+from step_index import StepIndex, load_scenario_steps
+from upstream import DeadlineExceeded, HedgedCaller, SingleFlight
 
 app = Flask(__name__)
 app.config['JSON_AS_ASCII'] = False
@@ -11,121 +26,475 @@ app.config['JSON_AS_ASCII'] = False
 # 전역 변수로 NPC 인스턴스 생성
 # 모든 씬에서 사용할 단일 CSV 파일
 CSV_PATH = './assets/hint_message_for_NPC.csv'
+# 씬별 물체 정보 (시스템 프롬프트에 포함)
+SCENES_PATH = os.getenv('NPC_SCENES_PATH', './assets/scenes.json')
+# 세부 단계 정의. 요청에 'step' 대신 'fine_step'(세부 단계 번호)을 보내면 CSV 순서로 변환합니다.
+SCENARIO_PATH = os.getenv('NPC_SCENARIO_PATH', './assets/scenario.xlsx')
+SCENARIO_SHEET = os.getenv('NPC_SCENARIO_SHEET', '스텝 구성')
+# xlsx를 읽은 결과를 저장해 두는 파일 (xlsx가 바뀌지 않았으면 서버 시작 시 xlsx를 열지 않음)
+STEP_INDEX_CACHE_PATH = os.getenv('NPC_STEP_INDEX_CACHE_PATH', './cache/step_index.json')
 npcs = {}
 
+# NPC 문장 생성에 사용하는 OpenAI 호출 설정 (동기/비동기 서버 공통)
+COMPLETION_PARAMS = {'model': 'gpt-4o-mini', 'temperature': 0.7}
+
+# 기본 힌트 풀 설정: (씬, 단계)별로 미리 생성한 NPC 문장을 디스크에 저장해두고 메모리에서 응답합니다.
+DEFAULT_POOL_PATH = os.getenv('NPC_HINT_POOL_PATH', './cache/default_hint_pool.json')
+DEFAULT_POOL_SIZE = int(os.getenv('NPC_HINT_POOL_SIZE', '3'))
+# 가득 찬 칸은 OpenAI 호출 없이 계속 돌려 씁니다. 설정하면 마지막으로 문장을 추가한 지 이 시간(초)이 지난 칸만
+# 가장 오래된 문장 하나를 새로 생성해 교체합니다. 0이면 원본 힌트가 바뀔 때까지 교체하지 않음.
+DEFAULT_POOL_MAX_AGE = float(os.getenv('NPC_HINT_POOL_MAX_AGE', '0'))
+# 'live'로 설정하면 풀을 사용하지 않고 매 요청마다 새로 생성합니다.
+DEFAULT_HINT_MODE = os.getenv('NPC_DEFAULT_HINT_MODE', 'pool')
+# '1'로 설정하면 서버 시작 시 풀의 빈 항목을 백그라운드에서 채웁니다.
+WARM_POOL_ON_START = os.getenv('NPC_WARM_POOL_ON_START', '0') == '1'
+
+# 질문 힌트 캐시 설정: (씬, 단계, 힌트 열)별로 비슷한 질문에 대한 응답을 재사용합니다.
+QUESTION_CACHE_ENABLED = os.getenv('NPC_QUESTION_CACHE', '1') == '1'
+QUESTION_CACHE_SIZE = int(os.getenv('NPC_QUESTION_CACHE_SIZE', '512'))
+QUESTION_CACHE_TTL = float(os.getenv('NPC_QUESTION_CACHE_TTL', '3600'))
+QUESTION_CACHE_THRESHOLD = float(os.getenv('NPC_QUESTION_CACHE_THRESHOLD', '0.7'))
+# 설정하면 질문 힌트 캐시, 기본 힌트 풀, 훈련자 세션을 프로세스 메모리 대신 이 SQLite 파일(WAL 모드)에 저장하여 모든 워커 프로세스가 공유합니다.
+# (풀이 비어 있으면 NPC_HINT_POOL_PATH의 JSON 파일에서 시작)
+SHARED_CACHE_PATH = os.getenv('NPC_SHARED_CACHE_PATH', '')
+
+# '1'이면 gunicorn의 preload처럼 fork 전에 이 모듈을 읽는 경우로 보고, CSV 감시와 풀 채우기 스레드는
+# fork 후 각 워커에서 start_background_tasks()로 시작합니다 (gunicorn.conf.py 참고).
+PRELOAD_FOR_FORK = os.getenv('NPC_PRELOAD_FOR_FORK', '0') == '1'
+
+# '1'이면 동시에 들어온 같은 (씬, 단계, 횟수, 질문) 요청을 하나의 OpenAI 호출로 합칩니다.
+COALESCE_REQUESTS = os.getenv('NPC_COALESCE_REQUESTS', '1') == '1'
+
+# CSV 변경 감시 주기 (초). 0이면 감시하지 않고 /admin/reload-hints로만 다시 읽습니다.
+HINT_RELOAD_INTERVAL = float(os.getenv('NPC_HINT_RELOAD_INTERVAL', '2'))
+# 설정하면 관리자 엔드포인트 호출 시 'X-Admin-Token' 헤더가 이 값과 일치해야 합니다.
+ADMIN_TOKEN = os.getenv('NPC_ADMIN_TOKEN', '')
+
+# /hint/batch 설정: 한 번에 받을 최대 항목 수와, 모든 배치 요청이 공유하는 처리 스레드 수
+BATCH_MAX_ITEMS = int(os.getenv('NPC_BATCH_MAX_ITEMS', '64'))
+BATCH_WORKERS = int(os.getenv('NPC_BATCH_WORKERS', '8'))
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='hint-batch')
+
+# 엔드포인트별 응답 시간 예산 (초). 넘기면 캐시된 NPC 문장 -> 템플릿 문장 -> 원본 힌트 순으로 대신 응답합니다.
+# 0이면 예산 없이 OpenAI 응답을 기다립니다. 배치 항목도 종류에 맞는 예산을 따릅니다.
+DEFAULT_HINT_DEADLINE = float(os.getenv('NPC_DEFAULT_HINT_DEADLINE', '4'))
+QUESTION_HINT_DEADLINE = float(os.getenv('NPC_QUESTION_HINT_DEADLINE', '6'))
+# 첫 호출이 최근 OpenAI 응답 시간의 이 백분위수(예: 95)를 넘기면 같은 호출을 한 번 더 보냅니다. 0이면 사용하지 않음.
+HEDGE_PERCENTILE = float(os.getenv('NPC_HEDGE_PERCENTILE', '0'))
+# 예산을 넘기고도 백그라운드에서 진행 중인 OpenAI 호출이 이만큼 쌓이면, 새 요청은 호출 없이 바로 대체 응답을 보냅니다.
+# (OpenAI가 계속 느릴 때 남은 호출이 호출용 스레드를 모두 차지하지 않도록)
+MAX_ABANDONED_CALLS = int(os.getenv('NPC_MAX_ABANDONED_CALLS', '16'))
+# OpenAI 호출 하나의 최대 대기 시간 (초). 예산을 넘겨 백그라운드에 남은 호출도 이 시간 안에 정리됩니다.
+OPENAI_TIMEOUT = float(os.getenv('NPC_OPENAI_TIMEOUT', '20'))
+# OpenAI 클라이언트 자체 재시도 횟수. 재시도는 429에도 Retry-After만큼 잠든 채 예산을 다 써 버리므로 기본값은 0이며,
+# 429는 아래 사용량 한도의 대기열이 모든 호출을 잠시 멈추는 방식으로 처리합니다.
+OPENAI_MAX_RETRIES = int(os.getenv('NPC_OPENAI_MAX_RETRIES', '0'))
+
+# OpenAI 사용량 한도. 계정의 분당 요청 수/토큰 수보다 조금 낮게 설정합니다. 0이면 제한하지 않고 429를 받았을 때만 잠시 멈춥니다.
+# 한도에 가까워지면 질문 힌트 -> 기본 힌트 -> 풀 채우기 순으로 호출하고, 예산 안에 차례가 오지 않을 요청은 바로 대체 응답을 줍니다.
+LLM_RPM = float(os.getenv('NPC_LLM_RPM', '0'))
+LLM_TPM = float(os.getenv('NPC_LLM_TPM', '0'))
+# 한도를 나눠 쓰는 프로세스 수 (여러 워커로 실행할 때 gunicorn.conf.py가 워커 수로 설정)
+LLM_LIMIT_SHARES = int(os.getenv('NPC_LLM_LIMIT_SHARES', '1'))
+
+# 처리 시간이 이 값(밀리초)을 넘은 힌트 요청을 단계별 시간과 함께 로그로 남깁니다. 0이면 기록하지 않음.
+SLOW_REQUEST_MS = float(os.getenv('NPC_SLOW_REQUEST_MS', '0'))
+# 느린 요청 중 실제로 로그를 남길 비율 (0~1)
+SLOW_REQUEST_SAMPLE = float(os.getenv('NPC_SLOW_REQUEST_SAMPLE', '1'))
+configure_slow_log(SLOW_REQUEST_MS / 1000, SLOW_REQUEST_SAMPLE)
+
+# 힌트 요청마다 입력, 처리 경로, 처리 시간, 토큰 사용량을 JSONL 한 줄로 기록합니다 (replay.py로 설정별 효과를 재현).
+# 비우면 기록하지 않으며, '{pid}'를 넣으면 프로세스별 파일에 씁니다 (여러 워커로 실행할 때).
+JOURNAL_PATH = os.getenv('NPC_JOURNAL_PATH', './logs/hint_requests.jsonl')
+# 파일 하나의 최대 크기 (MB). 넘으면 .1, .2, ...로 밀어내고 NPC_JOURNAL_BACKUPS개까지 보관합니다.
+JOURNAL_MAX_MB = float(os.getenv('NPC_JOURNAL_MAX_MB', '64'))
+JOURNAL_BACKUPS = int(os.getenv('NPC_JOURNAL_BACKUPS', '5'))
+request_journal = None
+if JOURNAL_PATH:
+    request_journal = RequestJournal(JOURNAL_PATH, max_bytes=int(JOURNAL_MAX_MB * 1024 * 1024), backups=JOURNAL_BACKUPS)
+configure_journal(request_journal)
+
+# 요청에 session_id를 보내면 서버가 훈련자별 현재 단계, 질문 횟수, 최근 대화를 기억합니다.
+# 마지막 요청 후 NPC_SESSION_TTL초가 지나거나 세션 수가 NPC_SESSION_MAX를 넘으면 오래된 세션부터 제거합니다.
+SESSION_MAX = int(os.getenv('NPC_SESSION_MAX', '2000'))
+SESSION_TTL = float(os.getenv('NPC_SESSION_TTL', '1800'))
+# 세션마다 보관할 최근 질문-응답 수 (같은 단계의 후속 질문에만 대화 맥락으로 사용)
+SESSION_HISTORY = int(os.getenv('NPC_SESSION_HISTORY', '3'))
+# 워커가 여럿이면 같은 session_id의 후속 요청이 다른 워커로 갈 수 있으므로 공유 SQLite 파일에 보관
+if SHARED_CACHE_PATH:
+    sessions = SharedSessionStore(SHARED_CACHE_PATH, max_sessions=SESSION_MAX, ttl=SESSION_TTL,
+                                  history_size=SESSION_HISTORY)
+else:
+    sessions = SessionStore(max_sessions=SESSION_MAX, ttl=SESSION_TTL, history_size=SESSION_HISTORY)
+
+# 씬별 힌트 번들 (/hint/bundle). 원본 힌트가 바뀔 때만 새로 만들고, 그 전까지는 인코딩해 둔 바이트열을 그대로 보냄
+hint_bundles = HintBundleStore()
+
+# '1'이면 물체의 생김새/위치를 묻는 단순한 질문은 OpenAI를 호출하지 않고 scenes.json의 답변으로 바로 응답합니다.
+INTENT_ROUTER_ENABLED = os.getenv('NPC_INTENT_ROUTER', '1') == '1'
+# 바로 응답할 최소 확신도 (0~1). 물체 이름이 그대로 들어 있으면 1.0, 오타로 비슷하기만 하면 더 낮음
+INTENT_THRESHOLD = float(os.getenv('NPC_INTENT_THRESHOLD', '0.8'))
+
+# '1'이면 훈련자가 N단계 힌트를 요청할 때 N+1단계의 기본 힌트 문장이 풀에 없으면 백그라운드에서 미리 생성합니다.
+# (NPC_DEFAULT_HINT_MODE=live로 풀을 쓰지 않으면 적용되지 않음)
+PREFETCH_NEXT_STEP = os.getenv('NPC_PREFETCH_NEXT_STEP', '1') == '1'
+
+# /stats/prompts에서 힌트 단계(tiers) 순서대로 쓰는 이름
+PROMPT_TIERS = ('default', 'question_1', 'question_2')
+
 
 class trainNPC:
     """
     게임 내 NPC 역할을 수행하며, 플레이어의 단계에 따라 힌트를 제공하는 클래스.
     """
-    def __init__(self, csv_path: str):
+    def __init__(self, csv_path: str, default_pool: DefaultHintPool = None, question_cache: QuestionCache = None,
+                 coalesce: bool = False, scenes_path: str = SCENES_PATH, deadlines: dict = None,
+                 hedge_percentile: float = 0.0, intent_router: bool = False, intent_threshold: float = 0.8,
+                 fine_steps=(), limiter: RateLimiter = None, prefetch_next: bool = False,
+                 max_abandoned: int = MAX_ABANDONED_CALLS):
         """
         NPC를 초기화하고 CSV 데이터와 힌트 요청 상태를 설정합니다.
 
         :param csv_path: 힌트 정보가 담긴 CSV 파일 경로
+        :param default_pool: 기본 힌트 문장 풀 (None이면 매번 새로 생성)
+        :param question_cache: 질문 힌트 응답 캐시 (None이면 캐시하지 않음)
+        :param coalesce: 동시에 들어온 같은 요청을 하나의 호출로 합칠지 여부
+        :param scenes_path: 씬별 물체 정보가 담긴 JSON 파일 경로
+        :param deadlines: 요청 종류별 응답 시간 예산 {'default': 초, 'question': 초} (없으면 예산 없음)
+        :param hedge_percentile: 두 번째 OpenAI 호출을 보낼 응답 시간 백분위 (0이면 사용하지 않음)
+        :param intent_router: 물체의 생김새/위치를 묻는 질문을 미리 만든 답변으로 바로 처리할지 여부
+        :param intent_threshold: 질문 라우터가 바로 답할 최소 확신도
+        :param fine_steps: scenario.xlsx의 세부 단계 목록 (FineStep). 세부 단계 -> 순서 색인을 만드는 데 사용
+        :param limiter: OpenAI 호출의 사용량 한도와 우선순위 대기열 (None이면 한도 없이 429에만 반응)
+        :param prefetch_next: 힌트를 요청한 단계의 다음 단계 기본 힌트 문장을 풀에 미리 생성할지 여부
+        :param max_abandoned: 예산을 넘기고도 진행 중인 OpenAI 호출의 상한 (넘으면 호출 없이 대체 응답)
         """
-        if not os.path.exists(csv_path):
-            raise FileNotFoundError(f"CSV 파일을 찾을 수 없습니다: {csv_path}")
-        
-        # '세부단계' 열을 인덱스로 사용하여 CSV 파일 로드
-        self.hint_data = pd.read_csv(csv_path, index_col='순서')
-        # NaN 값을 빈 문자열로 대체
-        self.hint_data = self.hint_data.fillna('')
+        # CSV를 (씬, 단계)별 힌트 표로 컴파일 (요청 횟수별 폴백도 미리 계산)
+        self.csv_path = csv_path
+        self.hint_table = load_hint_table(csv_path)
+        self.fine_steps = tuple(fine_steps)
+        self.step_index = StepIndex(self.fine_steps, self.hint_table)
+        self._reload_lock = threading.Lock()
+        # 씬별 시스템 프롬프트는 여기서 한 번만 만들어 둠
+        self.scenes = load_scene_registry(scenes_path)
+        self.router = IntentRouter(self.scenes, threshold=intent_threshold) if intent_router else None
+        self.default_pool = default_pool
+        self.question_cache = question_cache
+        self.inflight = SingleFlight() if coalesce else None
+        self.deadlines = deadlines or {}
+        self.upstream = HedgedCaller(hedge_percentile=hedge_percentile, max_abandoned=max_abandoned)
+        self.limiter = limiter or RateLimiter()
+        self.prefetch_next = prefetch_next
         # OpenAI 클라이언트 초기화 (환경 변수에서 API 키 로드)
         # 실행 전 터미널에 'export OPENAI_API_KEY='your_api_key''를 입력하세요.
         try:
-            self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+            self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'), timeout=OPENAI_TIMEOUT,
+                                 max_retries=OPENAI_MAX_RETRIES)
         except Exception as e:
             print(f"OpenAI 클라이언트 초기화 실패: {e}")
             print("OPENAI_API_KEY 환경 변수가 설정되었는지 확인하세요.")
             self.client = None
 
-    def _rephrase_as_npc(self, scene: str, hint_text: str, user_question: str = None) -> str:
+    def _build_messages(self, scene: str, hint_text: str, user_question: str = None, history=()):
+        """
+        OpenAI에 보낼 메시지 목록을 구성합니다.
+        시스템 프롬프트에는 물체 목록 전체 대신 이 힌트가 설명을 요구하는 물체 정보만 넣습니다 (힌트마다 고정 문자열).
+        힌트는 그 뒤의 별도 메시지로 보내 같은 힌트 행의 프롬프트 앞부분이 항상 같도록(프롬프트 캐시 적중) 합니다.
+        :param history: 같은 단계에서 앞서 나눈 (질문, 응답) 목록. 힌트 뒤, 현재 질문 앞에 대화로 넣습니다.
+        :return: 메시지 목록, 씬 정보가 없으면 None
+        """
+        config = self.scenes.get(scene)
+        if config is None:
+            return None
+
+        if user_question:
+            hint_content = f"[참고할 힌트]: {hint_text}"
+            user_content = f"[사용자 질문]: {user_question}"
+        else:
+            hint_content = f"[힌트]: {hint_text}"
+            user_content = f"힌트 좀 줄래?"
+
+        messages = [
+            {"role": "system", "content": config.prompt_for(hint_text)},
+            {"role": "system", "content": hint_content},
+        ]
+        for question, answer in history:
+            messages.append({"role": "user", "content": f"[사용자 질문]: {question}"})
+            messages.append({"role": "assistant", "content": answer})
+        messages.append({"role": "user", "content": user_content})
+        return messages
+
+    def _complete(self, messages, reserved: float = 0) -> str:
+        """
+        OpenAI API를 호출하여 응답 문장을 받아옵니다. 실패 시 예외를 그대로 전달합니다.
+        :param reserved: 대기열에서 미리 차감한 토큰 수 (실제 사용량으로 정산)
+        """
+        try:
+            response = self.client.chat.completions.create(messages=messages, **COMPLETION_PARAMS)
+        except RateLimitError as e:
+            self.limiter.penalize(retry_after(e))
+            raise
+        record_llm_call(response.usage)
+        self.limiter.settle(reserved, response.usage)
+        return response.choices[0].message.content
+
+    def _queue_deadline(self, budget: float):
+        """
+        대기열에서 기다릴 수 있는 마지막 시각 (time.monotonic() 기준).
+        호출할 시간으로 최근 응답 시간의 중앙값(기록이 부족하면 예산의 절반)을 남겨 둡니다.
+        :return: 예산이 없으면 None (차례가 올 때까지 기다림)
+        """
+        if budget <= 0:
+            return None
+        expected = self.upstream.tracker.percentile(50)
+        if expected is None:
+            expected = budget / 2
+        return time.monotonic() + max(budget - expected, 0.0)
+
+    def _rephrase_as_npc(self, scene: str, step: int, hint_col: str, hint_text: str, user_question: str = None,
+                         on_generated=None, history=()) -> str:
         """
         주어진 힌트 텍스트를 NPC의 자연스러운 대화체로 변환합니다.
+        요청 종류별 응답 시간 예산을 넘기면 _fallback_line의 대체 응답을 반환합니다.
+        :param on_generated: 새로 생성한 문장을 받을 함수 (예산을 넘겨 늦게 도착한 문장 포함, 실패 시 호출되지 않음)
+        :param history: 같은 단계에서 앞서 나눈 (질문, 응답) 목록 (세션이 있는 후속 질문에만 사용)
         """
         if not self.client or not hint_text:
+            set_request_path('raw')
             return hint_text
 
+        with stage_timer('prompt'):
+            messages = self._build_messages(scene, hint_text, user_question, history)
+        if messages is None:
+            set_request_path('message')
+            return "해당 씬에 대한 정보가 없습니다. 씬을 다시 확인해주세요."
+
+        priority = 'question' if user_question else 'default'
+        budget = self.deadlines.get(priority, 0)
+        tokens = estimate_tokens(messages)
+        start_time = time.monotonic()
         try:
-            system_prompt = """
-당신은 XR 재난 훈련 시뮬레이션의 친절한 AI 조교입니다.
-주어진 힌트를 바탕으로, 훈련자가 다음에 취해야 할 행동을 간결하고 자연스러운 문장으로 안내하세요.
-
-[출력 조건]
-- 글자 수는 반드시 120자 이하로 간결하게 작성할 것
-- 부가 설명 등은 절대 포함하지 말 것
-- 자연스러운 구어체로 존댓말로 작성할 것
-- 따옴표, 괄호, 특수기호를 사용하지 말 것
-- 힌트에 '물체나 위치를 설명하라'라는 내용이 있을 때만 아래 물체 정보를 참고할 것
-- 사용자의 질문이 들어올 경우, 질문에 직접적으로 간단하고 명확히 대답할 것
+            with stage_timer('queue'):
+                reserved = self.limiter.acquire(tokens, priority, self._queue_deadline(budget))
+            if budget > 0:
+                # 대기열에서 보낸 시간만큼 예산에서 뺌 (기한 안에 통과했으므로 남은 예산은 양수)
+                budget = max(budget - (time.monotonic() - start_time), 0.001)
+            with stage_timer('upstream'):
+                line = self.upstream.call(lambda: self._complete(messages, reserved), budget,
+                                          on_late_result=on_generated,
+                                          may_hedge=lambda: self.limiter.try_acquire(tokens))
+        except QueueDeadline as e:
+            print(f"OpenAI 호출 대기열에서 포기하고 대체 응답 사용 ({scene}, {step}): {e}")
+            set_request_path('throttled')
+            return self._fallback_line(scene, step, hint_col, hint_text, user_question)
+        except RateLimitError as e:
+            print(f"OpenAI 사용량 한도 초과로 대체 응답 사용 ({scene}, {step}): {e}")
+            set_request_path('throttled')
+            return self._fallback_line(scene, step, hint_col, hint_text, user_question)
+        except DeadlineExceeded as e:
+            print(f"OpenAI 응답 지연으로 대체 응답 사용 ({scene}, {step}): {e}")
+            set_request_path('fallback')
+            return self._fallback_line(scene, step, hint_col, hint_text, user_question)
+        except Exception as e:
+            print(f"OpenAI API 호출 중 오류 발생: {e}")
+            set_request_path('error')
+            return f"(시스템) {hint_text}" # API 실패 시 원본 힌트 반환
+        set_request_path('llm')
+        if on_generated is not None:
+            on_generated(line)
+        return line
 
-"""
-            if scene == 'ca2':
-                system_prompt += """
-[물체 정보]
+    def _fallback_line(self, scene: str, step: int, hint_col: str, hint_text: str, user_question: str = None) -> str:
+        """
+        OpenAI 없이 바로 줄 수 있는 가장 나은 응답을 찾습니다.
+        같은 힌트로 만들어 둔 NPC 문장(질문 캐시, 기본 힌트 풀) -> 템플릿 문장 -> 원본 힌트 순입니다.
+        :param user_question: 사용자 질문. 질문 캐시는 이 질문과 비슷한 질문의 응답만 사용 (다른 질문의 답을 주지 않도록)
+        """
+        if self.question_cache is not None and user_question:
+            # 기다리는 동안 다른 요청이 비슷한 질문의 응답을 저장했을 수 있음
+            line = self.question_cache.get((scene, step, hint_col), hint_text, user_question)
+            if line:
+                return line
+        if self.default_pool is not None:
+            # 풀은 기본 힌트 기준이므로 질문 힌트가 기본 힌트로 폴백된 경우에도 사용됨
+            line = self.default_pool.take(scene, step, hint_text)
+            if line:
+                return line
+        return render_hint_template(hint_text) or f"(시스템) {hint_text}"
 
-1. PPE 보관함
-   - 생김새: 초록색 옷장 형태이며 투명한 유리가 있고 내부에 초록색 옷이 있음
-   - 위치: 전광판의 맞은편, 전광판이 북쪽을 향할 때 남쪽에 위치함
+    def _generate_line(self, scene: str, hint_text: str, user_question: str = None):
+        """
+        풀에 넣을 NPC 문장을 하나 생성합니다. 실패한 결과를 풀에 넣지 않도록
+        원본 힌트로 대체하지 않고 예외를 그대로 전달합니다.
+        요청에 대한 응답이 아니므로 대기열에서 가장 낮은 우선순위로 기다립니다.
+        :return: 생성된 문장, 생성할 수 없으면 None
+        """
+        if not self.client:
+            return None
+        messages = self._build_messages(scene, hint_text, user_question)
+        if messages is None:
+            return None
+        reserved = self.limiter.acquire(estimate_tokens(messages), 'background')
+        return self._complete(messages, reserved)
 
-2. ESD
-   - 생김새: 빨간색, 검정색, 빨간색 버튼이 있는 회색 계기판 형태
-   - 위치: 전광판 기준 서남쪽에 있으며, 전광판을 바라보는 기준으로 PPE 보관함을 본 후 오른쪽으로 돌아 직진한 곳에 위치함
+    def prefetch_next_step(self, scene: str, step: int):
+        """
+        훈련자가 step 단계의 힌트를 요청했으면 곧 다음 단계의 기본 힌트도 요청할 것이므로,
+        풀에 다음 단계의 문장이 없으면 백그라운드에서 미리 생성해 둡니다 (대기열에서 가장 낮은 우선순위).
+        """
+        pool = self.default_pool
+        if not self.prefetch_next or pool is None or not self.client:
+            return
+        row = self.hint_table.get(scene, step + 1)
+        if row is None or row.tiers[0] is None:
+            return
+        hint = row.tiers[0][1]
+        if pool.count(scene, step + 1, hint):
+            HINT_PREFETCH.inc((scene, 'ready'))
+            return
+        scheduled = pool.refill(scene, step + 1, hint, lambda: self._generate_line(scene, hint))
+        HINT_PREFETCH.inc((scene, 'scheduled' if scheduled else 'pending'))
 
-3. 벨브
-   - 생김새: 파란색과 빨간색 배관에 각각 돌릴 수 있는 밸브가 있음
-   - 위치: 전광판을 바라보는 기준으로 왼쪽에 위치함
+    def prompt_token_report(self) -> dict:
+        """
+        (씬, 단계, 힌트 단계)마다 시스템 프롬프트에 넣는 물체와 토큰 수(어림값),
+        물체 목록 전체를 넣었을 때보다 줄어든 토큰 수. 단계 번호는 API 입력과 같은 기준(0부터)입니다.
+        """
+        rows = []
+        catalog_tokens = {}
+        for (scene, step), row in sorted(self.hint_table.rows.items()):
+            config = self.scenes.get(scene)
+            if config is None:
+                continue
+            if scene not in catalog_tokens:
+                catalog_tokens[scene] = estimate_tokens([{'content': config.system_prompt}], 0)
+            for tier_name, tier in zip(PROMPT_TIERS, row.tiers):
+                if tier is None:
+                    continue
+                hint_col, hint = tier
+                tokens = estimate_tokens([{'content': config.prompt_for(hint)}], 0)
+                rows.append({
+                    'scene': scene,
+                    'step': step - 1,
+                    'tier': tier_name,
+                    'hint_col': hint_col,
+                    'objects': [obj.name for obj in referenced_objects(config.objects, hint)],
+                    'system_tokens': tokens,
+                    'saved_tokens': catalog_tokens[scene] - tokens,
+                })
+        return {'catalog_tokens': catalog_tokens, 'rows': rows}
 
-4. 장비함
-   - 생김새: 철제 트레이이며 세 개의 장비 박스가 들어 있음
-   - 위치: 전광판 맞은편, 전광판이 북쪽을 향할 때 남쪽에 있으며 PPE 보관함을 바라보는 기준으로 바로 오른쪽에 위치함
+    def default_hint_cells(self):
+        """
+        기본 힌트가 있는 모든 (씬, 단계, 힌트) 조합을 순회합니다.
+        """
+        for (scene, step), row in list(self.hint_table.rows.items()):
+            if row.tiers[0] is not None:
+                yield scene, step, row.tiers[0][1]
 
-"""
-            elif scene == 'cb2':
-                system_prompt += """
-[물체 정보]
+    def warm_default_pool(self, max_workers: int = 4) -> int:
+        """
+        기본 힌트 풀에서 부족한 문장을 모두 생성하여 채우고 디스크에 저장합니다.
+        :param max_workers: 동시에 호출할 OpenAI 요청 수
+        :return: 새로 생성한 문장 수
+        """
+        pool = self.default_pool
+        if pool is None or not self.client:
+            return 0
 
-1. PPE 보관함
-   - 생김새: 초록색 옷장 형태이며 투명한 유리가 있고 내부에 초록색 옷이 있음
-   - 위치: 전광판이 북쪽을 향할 때 동쪽에 있으며, 전광판을 바라보는 기준으로 오른쪽으로 돌아 직진한 곳에 위치함
+        jobs = []
+        for scene, step, hint in self.default_hint_cells():
+            jobs.extend([(scene, step, hint)] * (pool.size - pool.count(scene, step, hint)))
 
-2. ESD
-   - 생김새: 빨간색과 검정색 버튼이 있는 회색 계기판 형태
-   - 위치: 전광판이 북쪽을 향할 때 서쪽에 있으며, 전광판을 바라보는 기준으로 왼쪽으로 돌면 보임
+        generated = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self._generate_line, scene, hint): (scene, step, hint) for scene, step, hint in jobs}
+            for future in as_completed(futures):
+                scene, step, hint = futures[future]
+                try:
+                    line = future.result()
+                except Exception as e:
+                    print(f"힌트 풀 생성 실패 ({scene}, {step}): {e}")
+                    continue
+                if line:
+                    pool.put(scene, step, hint, [line])
+                    generated += 1
 
-3. 벨브
-   - 생김새: 흰색과 검정색 호스에 파란색으로 돌릴 수 있는 밸브 형태
-   - 위치: PPE 보관함의 오른쪽 벽면에 설치되어 있음
+        if generated:
+            pool.save()
+        return generated
 
-4. 장비함
-   - 생김새: 철제 트레이이며 두 개의 장비 박스가 들어 있음
-   - 위치: 전광판이 북쪽을 향할 때 서쪽에 있으며, 전광판을 바라보는 기준으로 뒤돌아 직진하다가 오른쪽에 위치함
+    def reload(self) -> dict:
+        """
+        CSV를 다시 읽어 검증한 뒤 힌트 표를 통째로 교체합니다.
+        요청 처리 중에도 안전하며, 내용이 바뀐 (씬, 단계)의 풀/캐시 항목만 제거합니다.
+        :return: 적용 결과 요약
+        :raises ValueError: 새 CSV가 검증을 통과하지 못한 경우 (기존 표는 그대로 유지)
+        """
+        with self._reload_lock:
+            new_table = load_hint_table(self.csv_path)
+            problems = validate_hint_table(new_table)
+            if problems:
+                raise ValueError("; ".join(problems))
 
-"""
-            else:
-                return "해당 씬에 대한 정보가 없습니다. 씬을 다시 확인해주세요."
+            changed = diff_hint_tables(self.hint_table, new_table)
+            # 속성 대입 한 번으로 교체되므로 처리 중인 요청은 이전 표나 새 표 중 하나만 봄
+            self.hint_table = new_table
+            self.step_index = StepIndex(self.fine_steps, new_table)
 
-            
-            if user_question:
-                system_prompt += f"[참고할 힌트]: {hint_text}"
-                user_content = f"[사용자 질문]: {user_question}"
-            else:
-                system_prompt += f"[힌트]: {hint_text}"
-                user_content = f"힌트 좀 줄래?"
-
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_content}
-                ],
-                temperature=0.7,
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            print(f"OpenAI API 호출 중 오류 발생: {e}")
-            return f"(시스템) {hint_text}" # API 실패 시 원본 힌트 반환
+            invalidated = {'default_pool': 0, 'question_cache': 0}
+            if changed and self.default_pool is not None:
+                invalidated['default_pool'] = self.default_pool.invalidate(changed)
+            if changed and self.question_cache is not None:
+                invalidated['question_cache'] = self.question_cache.invalidate(changed)
+
+        return {
+            'changed': sorted([scene, step] for scene, step in changed),
+            'invalidated': invalidated,
+        }
+
+    def _resolve_default_hint(self, scene: str, step: int):
+        """
+        기본 힌트 요청에 사용할 힌트를 찾습니다.
+        :return: (힌트 열, 힌트, None) 또는 힌트를 줄 수 없을 때 (None, None, 안내 메시지)
+        """
+        table = self.hint_table
+        if scene not in table.scenes:
+            return None, None, "해당 씬에 대한 정보가 없습니다. 씬을 다시 확인해주세요."
+
+        row = table.get(scene, step)
+        if row is None:
+            return None, None, "해당 단계에 대한 정보가 없습니다. 단계를 다시 확인해주세요."
+
+        if row.tiers[0] is None:
+            return None, None, "더 이상 드릴 힌트가 없네요. 주변을 잘 둘러보세요!"
+
+        hint_col, hint = row.tiers[0]
+        return hint_col, hint, None
+
+    def _resolve_question_hint(self, scene: str, step: int, count: int):
+        """
+        질문 힌트 요청에 사용할 힌트를 요청 횟수에 맞게 찾습니다.
+        요청 힌트 2 -> 요청 힌트 1 -> 기본 힌트 폴백은 HintRow에 미리 계산되어 있습니다.
+        :return: (실제 사용된 힌트 열, 힌트, None) 또는 힌트를 줄 수 없을 때 (None, None, 안내 메시지)
+        """
+        table = self.hint_table
+        if step not in table.steps:
+            return None, None, "해당 단계에 대한 정보가 없습니다. 단계를 다시 확인해주세요."
+
+        if count < 1:
+            return None, None, "힌트 요청 횟수(count)는 1 이상이어야 합니다."
+
+        row = table.get(scene, step)
+        if row is None:
+            return None, None, "해당 씬에 대한 정보가 없습니다. 씬을 다시 확인해주세요."
+
+        tier = row.tier(count)
+        if tier is None:
+            return None, None, "더 이상 드릴 힌트가 없네요. 주변을 잘 둘러보세요!"
+
+        hint_col, hint = tier
+        return hint_col, hint, None
 
     def get_default_hint(self, scene: str, step: int) -> str:
         """
@@ -133,60 +502,411 @@ class trainNPC:
         :param step: 현재 세부 단계
         :return: 제공할 힌트 메시지
         """
-        if scene not in ["ca2", "cb2"]:
-            return "해당 씬에 대한 정보가 없습니다. 씬을 다시 확인해주세요."
+        self.prefetch_next_step(scene, step)
+        if self.inflight is not None:
+            hint = self.inflight.do(request_key(scene, step), lambda: self._default_hint(scene, step))
+            # 다른 요청의 호출 결과를 받은 경우 (리더는 이미 경로가 기록됨)
+            set_request_path('coalesced', overwrite=False)
+            return hint
+        return self._default_hint(scene, step)
 
-        if step not in self.hint_data.index:
-            return "해당 단계에 대한 정보가 없습니다. 단계를 다시 확인해주세요."
-        
-        hint = self.hint_data.loc[step, f'{scene}_기본 힌트']
+    def _default_hint(self, scene: str, step: int) -> str:
+        with stage_timer('lookup'):
+            hint_col, hint, message = self._resolve_default_hint(scene, step)
+        if message:
+            set_request_path('message')
+            return message
 
-        if not hint.strip():
-            return "더 이상 드릴 힌트가 없네요. 주변을 잘 둘러보세요!"
+        remember = None
+        if self.default_pool is not None:
+            # 미리 생성해 둔 문장이 있으면 바로 응답하고, 보충은 백그라운드에서 진행
+            with stage_timer('cache'):
+                line = self.default_pool.take(scene, step, hint, generate=lambda: self._generate_line(scene, hint))
+            if line:
+                set_request_path('pool')
+                return line
+            remember = lambda line: self.default_pool.put(scene, step, hint, [line])
 
-        return self._rephrase_as_npc(scene, hint)
+        return self._rephrase_as_npc(scene, step, hint_col, hint, on_generated=remember)
 
-    def get_question_hint(self, scene: str, step: int, count: int, text_message: str) -> str:
+    def get_question_hint(self, scene: str, step: int, count: int, text_message: str, history=()) -> str:
         """
         사용자가 직접 질문했을 때 요청 횟수에 맞는 힌트를 제공합니다.
         :param step: 현재 세부 단계
         :param count: 해당 단계에 대한 힌트 요청 횟수
         :param text_message: 사용자의 질문 메시지
+        :param history: 같은 단계에서 앞서 나눈 (질문, 응답) 목록 (세션이 있을 때)
         :return: 제공할 힌트 메시지
         """
-        if step not in self.hint_data.index:
-            return "해당 단계에 대한 정보가 없습니다. 단계를 다시 확인해주세요."
+        self.prefetch_next_step(scene, step)
+        # 대화 맥락이 있는 질문은 훈련자마다 답이 다르므로 다른 요청과 합치지 않음
+        if self.inflight is not None and not history:
+            key = request_key(scene, step, count, text_message)
+            hint = self.inflight.do(key, lambda: self._question_hint(scene, step, count, text_message))
+            set_request_path('coalesced', overwrite=False)
+            return hint
+        return self._question_hint(scene, step, count, text_message, history)
+
+    def route_question(self, scene: str, text_message: str):
+        """
+        물체의 생김새/위치를 묻는 단순한 질문이면 미리 만들어 둔 답변을 돌려줍니다.
+        :return: 답변, 캐시/LLM 경로로 넘겨야 하면 None
+        """
+        if self.router is None:
+            return None
+        with stage_timer('route'):
+            answer = self.router.route(scene, text_message)
+        if answer is not None:
+            set_request_path('routed')
+        return answer
+
+    def _question_hint(self, scene: str, step: int, count: int, text_message: str, history=()) -> str:
+        with stage_timer('lookup'):
+            hint_col, hint, message = self._resolve_question_hint(scene, step, count)
+        if message:
+            set_request_path('message')
+            return message
+
+        answer = self.route_question(scene, text_message)
+        if answer is not None:
+            return answer
+
+        remember = None
+        if self.question_cache is not None and self.client:
+            # 같은 (씬, 단계, 힌트 열)에서 비슷한 질문에 답한 적이 있으면 그 응답을 재사용
+            cache_key = (scene, step, hint_col)
+            with stage_timer('cache'):
+                answer = self.question_cache.get(cache_key, hint, text_message)
+            if answer is not None:
+                set_request_path('cache')
+                return answer
+            # 새로 생성한 응답만 저장 (실패나 대체 응답, 대화 맥락에 따른 응답은 캐시하지 않음)
+            if not history:
+                remember = lambda line: self.question_cache.put(cache_key, hint, text_message, line)
+
+        return self._rephrase_as_npc(scene, step, hint_col, hint, user_question=text_message, on_generated=remember,
+                                     history=history)
+
+    def _stream_as_npc(self, scene: str, step: int, hint_col: str, hint_text: str, user_question: str = None,
+                       history=(), on_generated=None):
+        """
+        _rephrase_as_npc의 스트리밍 버전. OpenAI 스트림을 문장/구절 단위로 묶어 순서대로 내보냅니다.
+        대기열에서 예산 안에 차례가 오지 않거나 429를 받으면 _fallback_line의 대체 응답을 한 번에 내보냅니다.
+        :param on_generated: 스트림을 끝까지 받은 경우 전체 문장을 받을 함수
+        """
+        if not self.client:
+            set_request_path('raw')
+            yield hint_text
+            return
+
+        with stage_timer('prompt'):
+            messages = self._build_messages(scene, hint_text, user_question, history)
+        if messages is None:
+            set_request_path('message')
+            yield "해당 씬에 대한 정보가 없습니다. 씬을 다시 확인해주세요."
+            return
+
+        priority = 'question' if user_question else 'default'
+        try:
+            with stage_timer('queue'):
+                reserved = self.limiter.acquire(estimate_tokens(messages), priority,
+                                                self._queue_deadline(self.deadlines.get(priority, 0)))
+            stream = self.client.chat.completions.create(
+                messages=messages, stream=True, stream_options={'include_usage': True}, **COMPLETION_PARAMS
+            )
+        except (QueueDeadline, RateLimitError) as e:
+            if isinstance(e, RateLimitError):
+                self.limiter.penalize(retry_after(e))
+            print(f"OpenAI 호출 제한으로 대체 응답 사용 ({scene}, {step}): {e}")
+            set_request_path('throttled')
+            yield self._fallback_line(scene, step, hint_col, hint_text, user_question)
+            return
+        except Exception as e:
+            print(f"OpenAI API 스트리밍 중 오류 발생: {e}")
+            set_request_path('error')
+            yield f"(시스템) {hint_text}" # API 실패 시 원본 힌트 반환
+            return
+
+        set_request_path('stream')
+        phrases = []
+        try:
+            settle = lambda usage: self.limiter.settle(reserved, usage)
+            for phrase in split_phrases(stream_tokens(stream, on_usage=settle)):
+                phrases.append(phrase)
+                yield phrase
+        except Exception as e:
+            print(f"OpenAI API 스트리밍 중 오류 발생: {e}")
+            if not phrases:
+                set_request_path('error')
+                yield f"(시스템) {hint_text}" # 아무것도 보내지 못했으면 원본 힌트 반환
+            return
+        if on_generated is not None:
+            on_generated(''.join(phrases))
+
+    def stream_default_hint(self, scene: str, step: int):
+        """
+        get_default_hint의 스트리밍 버전. 풀에 문장이 있으면 한 번에 내보냅니다.
+        """
+        self.prefetch_next_step(scene, step)
+        with stage_timer('lookup'):
+            hint_col, hint, message = self._resolve_default_hint(scene, step)
+        if message:
+            set_request_path('message')
+            yield message
+            return
+
+        if self.default_pool is not None:
+            with stage_timer('cache'):
+                line = self.default_pool.take(scene, step, hint, generate=lambda: self._generate_line(scene, hint))
+            if line:
+                set_request_path('pool')
+                yield line
+                return
+
+        yield from self._stream_as_npc(scene, step, hint_col, hint)
+
+    def stream_question_hint(self, scene: str, step: int, count: int, text_message: str, history=()):
+        """
+        get_question_hint의 스트리밍 버전. 캐시에 응답이 있으면 한 번에 내보내고,
+        새로 생성한 응답은 끝까지 받은 경우에만 캐시에 저장합니다.
+        """
+        self.prefetch_next_step(scene, step)
+        with stage_timer('lookup'):
+            hint_col, hint, message = self._resolve_question_hint(scene, step, count)
+        if message:
+            set_request_path('message')
+            yield message
+            return
+
+        answer = self.route_question(scene, text_message)
+        if answer is not None:
+            yield answer
+            return
+
+        remember = None
+        if self.question_cache is not None and self.client:
+            cache_key = (scene, step, hint_col)
+            with stage_timer('cache'):
+                answer = self.question_cache.get(cache_key, hint, text_message)
+            if answer is not None:
+                set_request_path('cache')
+                yield answer
+                return
+            # 끝까지 받은 새 응답만 저장 (대체 응답, 대화 맥락에 따른 응답은 캐시하지 않음)
+            if not history:
+                remember = lambda line: self.question_cache.put(cache_key, hint, text_message, line)
+
+        yield from self._stream_as_npc(scene, step, hint_col, hint, user_question=text_message, history=history,
+                                       on_generated=remember)
+
+
+def request_key(scene: str, step: int, count: int = 0, text_message: str = ''):
+    """
+    동시에 들어온 같은 요청을 합치기 위한 키. 질문은 정규화하여 표기 차이(공백, 문장부호)를 무시합니다.
+    """
+    return scene, step, count, normalize_question(text_message)
+
+
+def stream_tokens(stream, on_usage=None):
+    """
+    OpenAI 스트림에서 텍스트 조각만 꺼냅니다. 토큰 사용량이 담긴 조각(include_usage)은 지표에 기록합니다.
+    :param on_usage: 토큰 사용량을 받을 함수 (대기열 정산용)
+    """
+    for chunk in stream:
+        if chunk.usage is not None:
+            record_llm_call(chunk.usage)
+            if on_usage is not None:
+                on_usage(chunk.usage)
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
 
-        if count == 1:
-            hint_col = f'{scene}_요청 힌트 1'
-        elif count >= 2:
-            hint_col = f'{scene}_요청 힌트 2'
+def phrase_ready(buffer: str, min_chars: int = 8) -> bool:
+    """
+    버퍼가 문장/구절 경계에서 끝나는지 확인합니다.
+    문장부호(. ? ! 줄바꿈)에서는 항상, 쉼표에서는 min_chars 이상 모였을 때 경계로 봅니다.
+    """
+    stripped = buffer.rstrip()
+    if not stripped:
+        return False
+    last = stripped[-1]
+    return last in '.?!…' or buffer.endswith('\n') or (last == ',' and len(stripped) >= min_chars)
+
+
+def split_phrases(tokens, min_chars: int = 8):
+    """
+    토큰 스트림을 TTS가 바로 읽을 수 있도록 문장/구절 경계에서 묶어 내보냅니다.
+    """
+    buffer = ''
+    for token in tokens:
+        buffer += token
+        if phrase_ready(buffer, min_chars):
+            yield buffer
+            buffer = ''
+    if buffer:
+        yield buffer
+
+
+def _batchim(char: str):
+    """한글 글자의 받침 번호 (받침이 없으면 0, 한글이 아니면 None)."""
+    if '가' <= char <= '힣':
+        return (ord(char) - ord('가')) % 28
+    return None
+
+
+def _hint_action(part: str, last: bool):
+    """
+    '누출위치 이동', '밸브 잠그기' 같은 행동 하나를 '누출위치로 이동하고', '밸브를 잠그세요' 같은 구절로 바꿉니다.
+    :param last: 마지막 행동이면 '~세요'로 끝맺고, 아니면 '~고'로 이음
+    :return: 구절, 바꿀 수 없으면 None
+    """
+    words = part.split()
+    verb = words[-1]
+    if len(verb) >= 3 and verb.endswith('기') and _batchim(verb[-2]) is not None:
+        # '잠그기', '돌리기' 같은 동사의 명사형
+        stem = verb[:-1]
+        batchim = _batchim(stem[-1])
+        if last:
+            if batchim == 8:  # ㄹ 받침은 탈락
+                stem = chr(ord(stem[-1]) - 8)
+                ending = '세요'
+            else:
+                ending = '으세요' if batchim else '세요'
         else:
-            return "힌트 요청 횟수(count)는 1 이상이어야 합니다."
+            ending = '고'
+        verb = stem + ending
+    elif verb.endswith('기'):
+        # '열기'(열다), '대기'(대기하다)처럼 두 글자는 어느 쪽인지 알 수 없음
+        return None
+    elif _batchim(verb[-1]) is not None:
+        # '이동', '선택' 같은 '~하다' 명사
+        verb = verb + ('하세요' if last else '하고')
+    else:
+        return None
 
-        hint = self.hint_data.loc[step, hint_col]
+    if len(words) > 1:
+        target = words[-2]
+        batchim = _batchim(target[-1])
+        if batchim is not None and not target.endswith(('로', '을', '를', '에서', '에')):
+            if words[-1] == '이동':
+                target += '로' if batchim in (0, 8) else '으로'
+            else:
+                target += '을' if batchim else '를'
+        words[-2] = target
+    return ' '.join(words[:-1] + [verb])
+
+
+def render_hint_template(hint: str):
+    """
+    '~ 유도' 형식의 힌트를 OpenAI 없이 안내 문장으로 바꿉니다 (응답 시간 예산을 넘겼을 때 사용).
+    예: 'PPE 보관함으로 이동 유도 및 착용 유도' -> 'PPE 보관함으로 이동하고 착용하세요.'
+    :return: 안내 문장, '~ 설명'처럼 행동 지시가 아니거나 문장으로 바꿀 수 없는 힌트는 None (원본 힌트 사용)
+    """
+    parts = []
+    for part in hint.replace('"', '').split(' 및 '):
+        part = part.strip()
+        if part.endswith('설명'):
+            return None
+        if part.endswith('유도'):
+            part = part[:-len('유도')].strip()
+        if part:
+            parts.append(part)
+    phrases = [_hint_action(part, last=index == len(parts) - 1) for index, part in enumerate(parts)]
+    if not phrases or None in phrases:
+        return None
+    return ' '.join(phrases) + '.'
+
+
+def label_trace(scene: str, step: int):
+    """
+    현재 요청의 지표 레이블을 정합니다. 임의의 입력값으로 시계열이 늘어나지 않도록
+    힌트 표에 있는 (씬, 단계)만 레이블로 사용합니다.
+    """
+    npc = npcs.get(scene)
+    if npc is not None and npc.hint_table.get(scene, step) is not None:
+        label_request(scene, step)
+    # 요청 기록에는 API 입력과 같은 기준(0부터)으로 남김
+    annotate_request(scene=scene, step=step - 1)
 
-        if not hint.strip():
-            # 요청 힌트 2가 비었으면 요청 힌트 1을 사용
-            if hint_col == f'{scene}_요청 힌트 2' and self.hint_data.loc[step, f'{scene}_요청 힌트 1'].strip():
-                hint = self.hint_data.loc[step, f'{scene}_요청 힌트 1']
-            else: # 그래도 비어있으면 기본 힌트 사용
-                hint = self.hint_data.loc[step, f'{scene}_기본 힌트']
 
-        if not hint.strip():
-            return "더 이상 드릴 힌트가 없네요. 주변을 잘 둘러보세요!"
+def reload_hints(npc: trainNPC) -> dict:
+    """CSV를 다시 읽어 적용하고 결과를 로그로 남깁니다. 실패하면 기존 힌트를 유지한 채 예외를 전달합니다."""
+    result = npc.reload()
+    print(f"힌트 CSV 다시 읽기 완료: 변경 {len(result['changed'])}개 행, 캐시 제거 {result['invalidated']}")
+    return result
+
+
+def start_background_tasks(warm_pool: bool = True):
+    """
+    CSV 변경 감시와 (설정된 경우) 기본 힌트 풀 채우기를 시작합니다.
+    스레드는 fork 후 자식 프로세스로 이어지지 않으므로, fork 전에 모듈을 읽는 경우 각 워커에서 fork 후에 호출합니다.
+    :param warm_pool: 풀 채우기를 이 프로세스에서 할지 여부 (여러 워커 중 하나만 하면 됨)
+    """
+    npc = next(iter(npcs.values()), None)
+    if npc is None:
+        return
+    if warm_pool and npc.default_pool is not None and WARM_POOL_ON_START:
+        threading.Thread(target=npc.warm_default_pool, daemon=True).start()
+    if HINT_RELOAD_INTERVAL > 0:
+        HintFileWatcher(CSV_PATH, lambda: reload_hints(npc), interval=HINT_RELOAD_INTERVAL).start()
 
-        return self._rephrase_as_npc(scene, hint, user_question=text_message)
 
 # NPC 인스턴스 생성 및 초기화
 try:
     if os.path.exists(CSV_PATH):
+        # 기본 힌트 풀을 디스크에서 불러옵니다.
+        default_pool = None
+        if DEFAULT_HINT_MODE != 'live' and SHARED_CACHE_PATH:
+            # 여러 워커가 같은 풀을 쓰도록 공유 파일에 저장 (비어 있으면 풀 JSON 파일에서 시작)
+            default_pool = SharedDefaultHintPool(SHARED_CACHE_PATH, size=DEFAULT_POOL_SIZE, seed_path=DEFAULT_POOL_PATH,
+                                                 max_age=DEFAULT_POOL_MAX_AGE)
+            print(f"기본 힌트 풀을 워커 간에 공유합니다: {default_pool.load()}개 항목 ({SHARED_CACHE_PATH})")
+        elif DEFAULT_HINT_MODE != 'live':
+            default_pool = DefaultHintPool(DEFAULT_POOL_PATH, size=DEFAULT_POOL_SIZE, max_age=DEFAULT_POOL_MAX_AGE)
+            print(f"기본 힌트 풀 로드: {default_pool.load()}개 항목 ({DEFAULT_POOL_PATH})")
+        question_cache = None
+        if QUESTION_CACHE_ENABLED and SHARED_CACHE_PATH:
+            question_cache = SharedQuestionCache(
+                SHARED_CACHE_PATH,
+                max_entries=QUESTION_CACHE_SIZE,
+                ttl=QUESTION_CACHE_TTL,
+                threshold=QUESTION_CACHE_THRESHOLD,
+            )
+            print(f"질문 힌트 캐시를 워커 간에 공유합니다 ({SHARED_CACHE_PATH})")
+        elif QUESTION_CACHE_ENABLED:
+            question_cache = QuestionCache(
+                max_entries=QUESTION_CACHE_SIZE,
+                ttl=QUESTION_CACHE_TTL,
+                threshold=QUESTION_CACHE_THRESHOLD,
+            )
+        # 세부 단계 목록 (xlsx가 바뀌지 않았으면 디스크 캐시에서 읽음)
+        fine_steps = ()
+        if os.path.exists(SCENARIO_PATH):
+            try:
+                fine_steps = load_scenario_steps(SCENARIO_PATH, STEP_INDEX_CACHE_PATH, SCENARIO_SHEET)
+            except Exception as e:
+                print(f"세부 단계를 읽지 못했습니다 ({SCENARIO_PATH}): {e}")
         # 단일 NPC 인스턴스를 생성합니다.
-        single_npc_instance = trainNPC(csv_path=CSV_PATH)
+        single_npc_instance = trainNPC(
+            csv_path=CSV_PATH,
+            default_pool=default_pool,
+            question_cache=question_cache,
+            coalesce=COALESCE_REQUESTS,
+            deadlines={'default': DEFAULT_HINT_DEADLINE, 'question': QUESTION_HINT_DEADLINE},
+            hedge_percentile=HEDGE_PERCENTILE,
+            intent_router=INTENT_ROUTER_ENABLED,
+            intent_threshold=INTENT_THRESHOLD,
+            fine_steps=fine_steps,
+            limiter=RateLimiter(LLM_RPM / LLM_LIMIT_SHARES, LLM_TPM / LLM_LIMIT_SHARES),
+            prefetch_next=PREFETCH_NEXT_STEP,
+        )
         # 각 씬(ca2, cb2)이 동일한 인스턴스를 참조하도록 설정합니다.
         npcs['ca2'] = single_npc_instance
         npcs['cb2'] = single_npc_instance
         print(f"모든 씬에 대한 NPC 초기화 성공 (CSV: {CSV_PATH}).")
+        print(f"세부 단계 색인: {len(single_npc_instance.step_index)}개 세부 단계 ({SCENARIO_PATH})")
+        if not PRELOAD_FOR_FORK:
+            start_background_tasks()
     else:
         print(f"경고: CSV 파일을 찾을 수 없습니다: {CSV_PATH}")
 except Exception as e:
@@ -194,6 +914,14 @@ except Exception as e:
 
 
 # 공통 응답 처리 함수
+def load_hint_bundle(npc: trainNPC, scene: str):
+    """씬의 현재 힌트 번들을 가져옵니다. 힌트 표나 세부 단계 색인이 바뀌었을 때만 새로 만듭니다."""
+    pool = npc.default_pool
+    if pool is None:
+        return hint_bundles.get(scene, npc.hint_table, npc.step_index, lambda step, hint: ())
+    return hint_bundles.get(scene, npc.hint_table, npc.step_index, lambda step, hint: pool.lines(scene, step, hint))
+
+
 def create_response(data, status_code=200):
     return app.response_class(
         response=json.dumps(data, ensure_ascii=False, indent=None),
@@ -201,24 +929,161 @@ def create_response(data, status_code=200):
         mimetype='application/json; charset=utf-8'
     )
 
+@app.before_request
+def start_request_trace():
+    """힌트 요청마다 단계별 처리 시간과 처리 경로를 기록합니다 (/metrics)."""
+    rule = request.url_rule
+    if rule is not None and rule.rule.startswith('/hint/'):
+        g.trace = RequestTrace(rule.rule).activate()
+
+@app.teardown_request
+def finish_request_trace(exc):
+    trace = g.pop('trace', None)
+    # 스트리밍 응답은 create_stream_response에서 본문을 모두 보낸 뒤 기록
+    if trace is not None and not trace.streaming:
+        trace.finish()
+
 # Flask API 엔드포인트들
 @app.route('/ping')
 def ping():
     """서버 상태 확인용 엔드포인트"""
     return "pong"
 
+def read_step(params, scene: str):
+    """
+    요청의 단계를 1부터 시작하는 CSV 순서로 읽습니다. 'step'(0부터 시작하는 순서)과
+    'fine_step'(scenario.xlsx의 세부 단계 번호) 중 하나를 받으며, 둘 다 있으면 'step'이 우선합니다.
+    색인에 없는 세부 단계는 표에 없는 단계(0)로 바꿔 잘못된 step과 같은 안내 메시지로 이어지게 합니다.
+    :return: 단계, 둘 다 없으면 None
+    """
+    step = params.get('step')
+    if step is not None:
+        return int(step) + 1 # 우리는 1단계부터 처리하는데 입력을 0으로 하기 때문에 1을 더해줍니다.
+    fine_step = params.get('fine_step')
+    if fine_step is None:
+        return None
+    npc = npcs.get(scene)
+    step = npc.step_index.coarse_step(int(fine_step)) if npc is not None else None
+    return 0 if step is None else step
+
+def read_default_params():
+    """
+    기본 힌트 요청의 파라미터를 읽습니다 (POST는 JSON, GET은 쿼리스트링).
+    session_id가 있으면 훈련자의 현재 단계로 기록합니다.
+    :return: (scene, step) - step은 1부터 시작하도록 변환된 값 (fine_step으로 요청하면 해당 순서)
+    """
+    if request.method == 'POST':
+        with stage_timer('parse'):
+            params = request.get_json()
+    else: # GET
+        params = request.args
+    scene = params.get('scene', 'cb2')
+    step = read_step(params, scene)
+    session_id = params.get('session_id')
+    if step is None:
+        raise KeyError('step')
+    label_trace(scene, step)
+    if session_id:
+        annotate_request(session_id=session_id)
+        sessions.observe_step(session_id, scene, step)
+    return scene, step
+
+def read_question_params():
+    """
+    질문 힌트 요청의 파라미터를 읽습니다 (POST는 JSON, GET은 쿼리스트링).
+    session_id가 있으면 step과 count를 생략할 수 있습니다 (start_question_session에서 채움).
+    :return: (scene, step, count, text_message, session_id) - step은 1부터 시작하도록 변환된 값,
+             생략된 step/count는 None
+    """
+    if request.method == 'POST':
+        with stage_timer('parse'):
+            data = request.get_json()
+        params = data
+        text_message = data['text_message']
+    else: # GET
+        params = request.args
+        text_message = request.args.get('text_message', '')
+    scene = params.get('scene', 'cb2')
+    session_id = params.get('session_id') or None
+    annotate_request(text_message=text_message, session_id=session_id)
+    step = read_step(params, scene)
+    count = params.get('count')
+    if step is None and session_id is None:
+        raise KeyError('step')
+    if count is not None:
+        count = int(count)
+    elif session_id is None:
+        count = 1
+    return scene, step, count, text_message, session_id
+
+def start_question_session(scene: str, step, count, session_id):
+    """
+    질문 요청을 세션에 반영합니다. 세션이 있으면 생략된 단계와 요청 횟수를 서버 기록으로 채우고,
+    같은 단계에서 앞서 나눈 대화를 돌려줍니다 (후속 질문일 때만 비어 있지 않음).
+    :return: (scene, step, count, history)
+    :raises KeyError: step이 생략되었는데 세션에 기록된 단계도 없는 경우
+    """
+    history = ()
+    if session_id is not None:
+        if step is None:
+            current = sessions.current_step(session_id)
+            if current is None:
+                raise KeyError('step')
+            scene, step = current
+        session_count, history = sessions.next_question(session_id, scene, step)
+        if count is None:
+            count = session_count
+    label_trace(scene, step)
+    annotate_request(count=count)
+    return scene, step, count, history
+
+def record_session_answer(session_id, scene: str, step: int, question: str, answer: str):
+    """응답을 세션의 최근 대화에 추가합니다. 원본 힌트로 대체된 응답은 대화 맥락으로 쓰지 않습니다."""
+    if session_id is not None and not answer.startswith('(시스템)'):
+        sessions.record(session_id, scene, step, question, answer)
+
+def record_session_stream(phrases, session_id, scene: str, step: int, question: str):
+    """스트리밍 응답을 그대로 내보내고, 끝까지 보낸 경우에만 세션의 최근 대화에 추가합니다."""
+    parts = []
+    for phrase in phrases:
+        parts.append(phrase)
+        yield phrase
+    record_session_answer(session_id, scene, step, question, ''.join(parts))
+
+def create_stream_response(phrases):
+    """
+    문장/구절 단위 텍스트를 Server-Sent Events로 전송합니다.
+    각 구절은 'data: {"text": ...}' 이벤트로, 마지막에는 전체 문장을 담은 'done' 이벤트를 보냅니다.
+    """
+    # 요청 처리 시간은 본문을 모두 보낸 뒤에 기록 (첫 구절까지의 시간은 'first_phrase' 단계로 기록)
+    trace = current_trace()
+    if trace is not None:
+        trace.streaming = True
+
+    def generate():
+        full_text = ''
+        try:
+            for phrase in phrases:
+                if not full_text and trace is not None:
+                    trace.mark('first_phrase')
+                full_text += phrase
+                yield f"data: {json.dumps({'text': phrase}, ensure_ascii=False)}\n\n"
+            yield f"event: done\ndata: {json.dumps({'text': full_text}, ensure_ascii=False)}\n\n"
+        finally:
+            if trace is not None:
+                trace.finish()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/hint/default', methods=['GET', 'POST'])
 def get_default_hint():
     """1. 사용자가 말 없이 힌트를 요청했을 때"""
     try:
-        if request.method == 'POST':
-            data = request.get_json()
-            scene = data.get('scene', 'cb2')
-            step = int(data['step'])
-        else: # GET
-            scene = request.args.get('scene', 'cb2')
-            step = int(request.args.get('step'))
-        step = step + 1 # 우리는 1단계부터 처리하는데 입력을 0으로 하기 때문에 1을 더해줍니다.
+        scene, step = read_default_params()
         
         if scene not in npcs:
             return f"'{scene}' 씬이 초기화되지 않았습니다.", 500
@@ -238,27 +1103,18 @@ def get_default_hint():
 def get_question_hint():
     """2. 사용자가 직접 질문을 통해 힌트를 요청했을 때"""
     try:
-        if request.method == 'POST':
-            data = request.get_json()
-            scene = data.get('scene', 'cb2')
-            step = int(data['step'])
-            count = int(data.get('count', 1))
-            text_message = data['text_message']
-        else: # GET
-            scene = request.args.get('scene', 'cb2')
-            step = int(request.args.get('step'))
-            count = int(request.args.get('count', 1))
-            text_message = request.args.get('text_message', '')
-        step = step + 1 # 우리는 1단계부터 처리하는데 입력을 0으로 하기 때문에 1을 더해줍니다.
+        scene, step, count, text_message, session_id = read_question_params()
         
         if not text_message:
             return "필수 파라미터 'text_message'가 누락되었습니다.", 400
 
+        scene, step, count, history = start_question_session(scene, step, count, session_id)
         if scene not in npcs:
             return f"'{scene}' 씬이 초기화되지 않았습니다.", 500
 
         npc = npcs[scene]
-        hint = npc.get_question_hint(scene, step, count, text_message)
+        hint = npc.get_question_hint(scene, step, count, text_message, history)
+        record_session_answer(session_id, scene, step, text_message, hint)
         return hint
 
     except (TypeError, KeyError):
@@ -268,6 +1124,185 @@ def get_question_hint():
     except Exception as e:
         return f"오류가 발생했습니다: {str(e)}", 500
 
+@app.route('/hint/default/stream', methods=['GET', 'POST'])
+def stream_default_hint():
+    """1-S. /hint/default의 스트리밍(SSE) 버전"""
+    try:
+        scene, step = read_default_params()
+
+        if scene not in npcs:
+            return f"'{scene}' 씬이 초기화되지 않았습니다.", 500
+
+        npc = npcs[scene]
+        return create_stream_response(npc.stream_default_hint(scene, step))
+
+    except (TypeError, KeyError):
+        return "필수 파라미터 'step'이 누락되었거나 형식이 잘못되었습니다.", 400
+    except ValueError:
+        return "'step' 파라미터는 정수여야 합니다.", 400
+    except Exception as e:
+        return f"오류가 발생했습니다: {str(e)}", 500
+
+@app.route('/hint/question/stream', methods=['GET', 'POST'])
+def stream_question_hint():
+    """2-S. /hint/question의 스트리밍(SSE) 버전"""
+    try:
+        scene, step, count, text_message, session_id = read_question_params()
+
+        if not text_message:
+            return "필수 파라미터 'text_message'가 누락되었습니다.", 400
+
+        scene, step, count, history = start_question_session(scene, step, count, session_id)
+        if scene not in npcs:
+            return f"'{scene}' 씬이 초기화되지 않았습니다.", 500
+
+        npc = npcs[scene]
+        phrases = npc.stream_question_hint(scene, step, count, text_message, history)
+        if session_id is not None:
+            phrases = record_session_stream(phrases, session_id, scene, step, text_message)
+        return create_stream_response(phrases)
+
+    except (TypeError, KeyError):
+        return "필수 파라미터('step', 'text_message')가 누락되었거나 형식이 잘못되었습니다.", 400
+    except ValueError:
+        return "'step'과 'count' 파라미터는 정수여야 합니다.", 400
+    except Exception as e:
+        return f"오류가 발생했습니다: {str(e)}", 500
+
+def run_batch_item(item) -> dict:
+    """
+    /hint/batch의 항목 하나를 처리합니다. 파라미터는 POST 방식의 /hint/default, /hint/question과 같고,
+    'type'('default' 또는 'question')으로 종류를 구분합니다. 생략하면 text_message 유무로 판단합니다.
+    처리 시간은 '/hint/batch/{type}' 엔드포인트로 따로 기록합니다.
+    :return: 성공 시 {'hint': ...}, 실패 시 {'error': ..., 'status': ...}
+    """
+    with RequestTrace('/hint/batch/item') as trace:
+        try:
+            kind = item.get('type') or ('question' if 'text_message' in item else 'default')
+            scene = item.get('scene', 'cb2')
+            step = read_step(item, scene)
+            if step is None:
+                raise KeyError('step')
+
+            if kind not in ('default', 'question'):
+                return {'error': "'type'은 'default' 또는 'question'이어야 합니다.", 'status': 400}
+            trace.endpoint = f'/hint/batch/{kind}'
+            label_trace(scene, step)
+
+            if scene not in npcs:
+                return {'error': f"'{scene}' 씬이 초기화되지 않았습니다.", 'status': 500}
+
+            npc = npcs[scene]
+            if kind == 'default':
+                return {'hint': npc.get_default_hint(scene, step)}
+
+            count = int(item.get('count', 1))
+            text_message = item['text_message']
+            annotate_request(count=count, text_message=text_message)
+            if not text_message:
+                return {'error': "필수 파라미터 'text_message'가 누락되었습니다.", 'status': 400}
+            return {'hint': npc.get_question_hint(scene, step, count, text_message)}
+
+        except (TypeError, KeyError, AttributeError):
+            return {'error': "필수 파라미터('step', 'text_message')가 누락되었거나 형식이 잘못되었습니다.", 'status': 400}
+        except ValueError:
+            return {'error': "'step'과 'count' 파라미터는 정수여야 합니다.", 'status': 400}
+        except Exception as e:
+            return {'error': f"오류가 발생했습니다: {str(e)}", 'status': 500}
+
+def read_batch_items():
+    """
+    배치 요청 본문에서 항목 목록을 읽습니다. {'items': [...]} 또는 목록 자체를 받습니다.
+    :return: (항목 목록, None) 또는 잘못된 요청일 때 (None, 오류 메시지)
+    """
+    with stage_timer('parse'):
+        data = request.get_json(silent=True)
+    items = data.get('items') if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return None, "요청 본문은 {\"items\": [...]} 형식의 JSON이어야 합니다."
+    if len(items) > BATCH_MAX_ITEMS:
+        return None, f"한 번에 요청할 수 있는 항목은 최대 {BATCH_MAX_ITEMS}개입니다."
+    return items, None
+
+@app.route('/hint/batch', methods=['POST'])
+def get_batch_hints():
+    """3. 여러 힌트를 한 번에 요청할 때 (각 항목은 공유 스레드 풀에서 동시에 처리)"""
+    items, error = read_batch_items()
+    if error:
+        return error, 400
+
+    futures = [batch_executor.submit(run_batch_item, item) for item in items]
+    results = [future.result() for future in futures]
+    set_request_path('batch')
+    with stage_timer('response'):
+        return create_response({'results': results})
+
+@app.route('/hint/bundle', methods=['GET'])
+def get_hint_bundle():
+    """4. 헤드셋에 미리 내려받아 둘 씬별 힌트 번들 (힌트 표 + 미리 생성된 기본 힌트 문장)"""
+    scene = request.args.get('scene', 'cb2')
+    if scene not in npcs:
+        return f"'{scene}' 씬이 초기화되지 않았습니다.", 500
+    npc = npcs[scene]
+    if scene not in npc.hint_table.scenes:
+        return "해당 씬에 대한 정보가 없습니다. 씬을 다시 확인해주세요.", 404
+
+    bundle = load_hint_bundle(npc, scene)
+    version = request.args.get('version')
+    if version and version != bundle.version:
+        return create_response({'error': "번들 버전이 바뀌었습니다. 최신 번들을 다시 받아 주세요.",
+                                'version': bundle.version}, 404)
+    status, headers, body = bundle_response(bundle, request.if_none_match, 'gzip' in request.accept_encodings,
+                                            pinned=bool(version))
+    set_request_path('bundle' if status == 200 else 'not_modified')
+    return app.response_class(body, status=status, headers=headers)
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """힌트 요청의 단계별 처리 시간과 OpenAI 토큰 사용량 (Prometheus 텍스트 형식)"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/stats/cache', methods=['GET'])
+def get_cache_stats():
+    """질문 힌트 캐시의 히트/미스 카운터를 반환합니다 (임계값 튜닝용)."""
+    npc = next(iter(npcs.values()), None)
+    if npc is None:
+        return create_response({'question_cache': None, 'coalescing': None, 'upstream': None, 'rate_limit': None,
+                                'sessions': None, 'intent_router': None, 'journal': None})
+    return create_response({
+        'question_cache': npc.question_cache.stats() if npc.question_cache is not None else None,
+        'coalescing': npc.inflight.stats() if npc.inflight is not None else None,
+        'upstream': npc.upstream.stats(),
+        'rate_limit': npc.limiter.stats(),
+        'sessions': sessions.stats(),
+        'intent_router': npc.router.stats() if npc.router is not None else None,
+        'journal': request_journal.stats() if request_journal is not None else None,
+    })
+
+@app.route('/stats/prompts', methods=['GET'])
+def get_prompt_stats():
+    """힌트 행마다 시스템 프롬프트에 넣는 물체 정보와 토큰 수를 반환합니다."""
+    npc = next(iter(npcs.values()), None)
+    if npc is None:
+        return "NPC가 초기화되지 않았습니다.", 500
+    return create_response(npc.prompt_token_report())
+
+@app.route('/admin/reload-hints', methods=['POST'])
+def admin_reload_hints():
+    """hint_message_for_NPC.csv를 서버 재시작 없이 다시 읽어 적용합니다."""
+    if ADMIN_TOKEN and request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return "관리자 토큰이 올바르지 않습니다.", 403
+
+    npc = next(iter(npcs.values()), None)
+    if npc is None:
+        return "NPC가 초기화되지 않았습니다.", 500
+    try:
+        return create_response(reload_hints(npc))
+    except (ValueError, KeyError) as e:
+        return create_response({'error': f"CSV 검증 실패: {e}"}, 422)
+    except Exception as e:
+        return create_response({'error': f"오류가 발생했습니다: {str(e)}"}, 500)
+
 @app.route('/view/hint-csv', methods=['GET'])
 def download_hint_csv():
     """
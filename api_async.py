@@ -0,0 +1,684 @@
+import os
+import asyncio
+import time
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, RateLimitError
+from quart import Quart, Response, g, request, json, send_file
+
+from api import (ADMIN_TOKEN, BATCH_MAX_ITEMS, CSV_PATH, COMPLETION_PARAMS, OPENAI_MAX_RETRIES, OPENAI_TIMEOUT,
+                 label_trace, load_hint_bundle, npcs, phrase_ready, read_step, record_session_answer, reload_hints,
+                 request_journal, request_key, sessions, start_question_session, trainNPC)
+from hint_bundle import bundle_response
+from metrics import (REGISTRY, RequestTrace, annotate_request, current_trace, record_llm_call, set_request_path,
+                     stage_timer)
+from rate_limit import QueueDeadline, estimate_tokens, retry_after
+from upstream import AsyncHedgedCaller, AsyncSingleFlight, DeadlineExceeded
+
+app = Quart(__name__)
+app.config['JSON_AS_ASCII'] = False
+
+
+# 동시에 진행할 수 있는 OpenAI 호출 수 (초과분은 대기열에서 기다림)
+LLM_CONCURRENCY = int(os.getenv('NPC_LLM_CONCURRENCY', '32'))
+# 모든 요청이 공유하는 HTTP 연결 풀 크기
+HTTP_POOL_SIZE = int(os.getenv('NPC_HTTP_POOL_SIZE', '64'))
+
+async_npcs = {}
+
+
+class AsyncNPC:
+    """
+    trainNPC의 힌트 조회, 기본 힌트 풀, 질문 캐시를 그대로 사용하면서
+    OpenAI 호출만 비동기 클라이언트로 수행하는 래퍼.
+    요청마다 스레드를 점유하지 않으므로 한 프로세스에서 많은 대기 요청을 처리할 수 있습니다.
+    """
+    def __init__(self, npc: trainNPC, client: AsyncOpenAI, max_concurrency: int):
+        """
+        :param npc: 힌트 데이터를 가진 동기 NPC 인스턴스
+        :param client: 연결 풀을 공유하는 비동기 OpenAI 클라이언트
+        :param max_concurrency: 동시에 진행할 OpenAI 호출 수 상한
+        """
+        self.npc = npc
+        self.client = client
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # 같은 trainNPC가 요청 합치기를 사용하면 비동기 경로도 같은 키로 합침
+        self.inflight = AsyncSingleFlight() if npc.inflight is not None else None
+        # 응답 시간 기록은 동기 경로와 공유하여 같은 기준으로 두 번째 호출 시점을 정함
+        self.upstream = AsyncHedgedCaller(npc.upstream.tracker, npc.upstream.hedge_percentile,
+                                          npc.upstream.max_abandoned)
+        # 사용량 한도는 풀 보충(동기 클라이언트)과 같은 대기열을 씀
+        self.limiter = npc.limiter
+
+    async def _complete(self, messages, reserved: float = 0) -> str:
+        """OpenAI API를 비동기로 호출합니다. 실패 시 예외를 그대로 전달합니다."""
+        try:
+            async with self._semaphore:
+                response = await self.client.chat.completions.create(messages=messages, **COMPLETION_PARAMS)
+        except RateLimitError as e:
+            self.limiter.penalize(retry_after(e))
+            raise
+        record_llm_call(response.usage)
+        self.limiter.settle(reserved, response.usage)
+        return response.choices[0].message.content
+
+    async def _rephrase_as_npc(self, scene: str, step: int, hint_col: str, hint_text: str, user_question: str = None,
+                               on_generated=None, history=()) -> str:
+        """trainNPC._rephrase_as_npc의 비동기 버전."""
+        if not self.client or not hint_text:
+            set_request_path('raw')
+            return hint_text
+        with stage_timer('prompt'):
+            messages = self.npc._build_messages(scene, hint_text, user_question, history)
+        if messages is None:
+            set_request_path('message')
+            return "해당 씬에 대한 정보가 없습니다. 씬을 다시 확인해주세요."
+
+        priority = 'question' if user_question else 'default'
+        budget = self.npc.deadlines.get(priority, 0)
+        tokens = estimate_tokens(messages)
+        start_time = time.monotonic()
+        try:
+            with stage_timer('queue'):
+                reserved = await self.limiter.acquire_async(tokens, priority, self.npc._queue_deadline(budget))
+            if budget > 0:
+                budget = max(budget - (time.monotonic() - start_time), 0.001)
+            with stage_timer('upstream'):
+                line = await self.upstream.call(lambda: self._complete(messages, reserved), budget,
+                                                on_late_result=on_generated,
+                                                may_hedge=lambda: self.limiter.try_acquire(tokens))
+        except QueueDeadline as e:
+            print(f"OpenAI 호출 대기열에서 포기하고 대체 응답 사용 ({scene}, {step}): {e}")
+            set_request_path('throttled')
+            return self.npc._fallback_line(scene, step, hint_col, hint_text, user_question)
+        except RateLimitError as e:
+            print(f"OpenAI 사용량 한도 초과로 대체 응답 사용 ({scene}, {step}): {e}")
+            set_request_path('throttled')
+            return self.npc._fallback_line(scene, step, hint_col, hint_text, user_question)
+        except DeadlineExceeded as e:
+            print(f"OpenAI 응답 지연으로 대체 응답 사용 ({scene}, {step}): {e}")
+            set_request_path('fallback')
+            return self.npc._fallback_line(scene, step, hint_col, hint_text, user_question)
+        except Exception as e:
+            print(f"OpenAI API 호출 중 오류 발생: {e}")
+            set_request_path('error')
+            return f"(시스템) {hint_text}" # API 실패 시 원본 힌트 반환
+        set_request_path('llm')
+        if on_generated is not None:
+            on_generated(line)
+        return line
+
+    async def get_default_hint(self, scene: str, step: int) -> str:
+        """trainNPC.get_default_hint의 비동기 버전."""
+        self.npc.prefetch_next_step(scene, step)
+        if self.inflight is not None:
+            hint = await self.inflight.do(request_key(scene, step), lambda: self._default_hint(scene, step))
+            set_request_path('coalesced', overwrite=False)
+            return hint
+        return await self._default_hint(scene, step)
+
+    async def _default_hint(self, scene: str, step: int) -> str:
+        npc = self.npc
+        with stage_timer('lookup'):
+            hint_col, hint, message = npc._resolve_default_hint(scene, step)
+        if message:
+            set_request_path('message')
+            return message
+
+        remember = None
+        if npc.default_pool is not None:
+            # 풀 보충은 기존처럼 백그라운드 스레드에서 동기 클라이언트로 진행
+            with stage_timer('cache'):
+                line = npc.default_pool.take(scene, step, hint, generate=lambda: npc._generate_line(scene, hint))
+            if line:
+                set_request_path('pool')
+                return line
+            remember = lambda line: npc.default_pool.put(scene, step, hint, [line])
+
+        return await self._rephrase_as_npc(scene, step, hint_col, hint, on_generated=remember)
+
+    async def get_question_hint(self, scene: str, step: int, count: int, text_message: str, history=()) -> str:
+        """trainNPC.get_question_hint의 비동기 버전."""
+        self.npc.prefetch_next_step(scene, step)
+        if self.inflight is not None and not history:
+            key = request_key(scene, step, count, text_message)
+            hint = await self.inflight.do(key, lambda: self._question_hint(scene, step, count, text_message))
+            set_request_path('coalesced', overwrite=False)
+            return hint
+        return await self._question_hint(scene, step, count, text_message, history)
+
+    async def _question_hint(self, scene: str, step: int, count: int, text_message: str, history=()) -> str:
+        npc = self.npc
+        with stage_timer('lookup'):
+            hint_col, hint, message = npc._resolve_question_hint(scene, step, count)
+        if message:
+            set_request_path('message')
+            return message
+
+        answer = npc.route_question(scene, text_message)
+        if answer is not None:
+            return answer
+
+        remember = None
+        if npc.question_cache is not None and self.client:
+            cache_key = (scene, step, hint_col)
+            with stage_timer('cache'):
+                answer = npc.question_cache.get(cache_key, hint, text_message)
+            if answer is not None:
+                set_request_path('cache')
+                return answer
+            if not history:
+                remember = lambda line: npc.question_cache.put(cache_key, hint, text_message, line)
+
+        return await self._rephrase_as_npc(scene, step, hint_col, hint, user_question=text_message,
+                                           on_generated=remember, history=history)
+
+    async def _stream_as_npc(self, scene: str, step: int, hint_col: str, hint_text: str, user_question: str = None,
+                             history=(), on_generated=None):
+        """trainNPC._stream_as_npc의 비동기 버전."""
+        if not self.client:
+            set_request_path('raw')
+            yield hint_text
+            return
+
+        npc = self.npc
+        with stage_timer('prompt'):
+            messages = npc._build_messages(scene, hint_text, user_question, history)
+        if messages is None:
+            set_request_path('message')
+            yield "해당 씬에 대한 정보가 없습니다. 씬을 다시 확인해주세요."
+            return
+
+        priority = 'question' if user_question else 'default'
+        try:
+            with stage_timer('queue'):
+                reserved = await self.limiter.acquire_async(estimate_tokens(messages), priority,
+                                                            npc._queue_deadline(npc.deadlines.get(priority, 0)))
+        except QueueDeadline as e:
+            print(f"OpenAI 호출 제한으로 대체 응답 사용 ({scene}, {step}): {e}")
+            set_request_path('throttled')
+            yield npc._fallback_line(scene, step, hint_col, hint_text, user_question)
+            return
+
+        set_request_path('stream')
+        phrases = []
+        buffer = ''
+        try:
+            async with self._semaphore:
+                stream = await self.client.chat.completions.create(
+                    messages=messages, stream=True, stream_options={'include_usage': True}, **COMPLETION_PARAMS
+                )
+                async for chunk in stream:
+                    if chunk.usage is not None:
+                        record_llm_call(chunk.usage)
+                        self.limiter.settle(reserved, chunk.usage)
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+                    buffer += chunk.choices[0].delta.content
+                    if phrase_ready(buffer):
+                        phrases.append(buffer)
+                        yield buffer
+                        buffer = ''
+            if buffer:
+                phrases.append(buffer)
+                yield buffer
+        except RateLimitError as e:
+            self.limiter.penalize(retry_after(e))
+            print(f"OpenAI 호출 제한으로 대체 응답 사용 ({scene}, {step}): {e}")
+            set_request_path('throttled')
+            yield npc._fallback_line(scene, step, hint_col, hint_text, user_question)
+            return
+        except Exception as e:
+            print(f"OpenAI API 스트리밍 중 오류 발생: {e}")
+            if not phrases:
+                set_request_path('error')
+                yield f"(시스템) {hint_text}" # 아무것도 보내지 못했으면 원본 힌트 반환
+            return
+        if on_generated is not None:
+            on_generated(''.join(phrases))
+
+    async def stream_default_hint(self, scene: str, step: int):
+        """trainNPC.stream_default_hint의 비동기 버전."""
+        npc = self.npc
+        npc.prefetch_next_step(scene, step)
+        with stage_timer('lookup'):
+            hint_col, hint, message = npc._resolve_default_hint(scene, step)
+        if message:
+            set_request_path('message')
+            yield message
+            return
+
+        if npc.default_pool is not None:
+            with stage_timer('cache'):
+                line = npc.default_pool.take(scene, step, hint, generate=lambda: npc._generate_line(scene, hint))
+            if line:
+                set_request_path('pool')
+                yield line
+                return
+
+        async for phrase in self._stream_as_npc(scene, step, hint_col, hint):
+            yield phrase
+
+    async def stream_question_hint(self, scene: str, step: int, count: int, text_message: str, history=()):
+        """trainNPC.stream_question_hint의 비동기 버전."""
+        npc = self.npc
+        npc.prefetch_next_step(scene, step)
+        with stage_timer('lookup'):
+            hint_col, hint, message = npc._resolve_question_hint(scene, step, count)
+        if message:
+            set_request_path('message')
+            yield message
+            return
+
+        answer = npc.route_question(scene, text_message)
+        if answer is not None:
+            yield answer
+            return
+
+        remember = None
+        if npc.question_cache is not None and self.client:
+            cache_key = (scene, step, hint_col)
+            with stage_timer('cache'):
+                answer = npc.question_cache.get(cache_key, hint, text_message)
+            if answer is not None:
+                set_request_path('cache')
+                yield answer
+                return
+            if not history:
+                remember = lambda line: npc.question_cache.put(cache_key, hint, text_message, line)
+
+        async for phrase in self._stream_as_npc(scene, step, hint_col, hint, user_question=text_message,
+                                                history=history, on_generated=remember):
+            yield phrase
+
+
+@app.before_serving
+async def init_async_npcs():
+    """이벤트 루프가 시작된 뒤 공유 OpenAI 클라이언트와 동시 호출 제한을 생성합니다."""
+    try:
+        client = AsyncOpenAI(
+            api_key=os.getenv('OPENAI_API_KEY'),
+            timeout=OPENAI_TIMEOUT,
+            max_retries=OPENAI_MAX_RETRIES,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE)
+            ),
+        )
+    except Exception as e:
+        # 동기 서버와 같이 클라이언트 없이 시작하고 원본 힌트를 그대로 반환
+        print(f"비동기 OpenAI 클라이언트 초기화 실패: {e}")
+        print("OPENAI_API_KEY 환경 변수가 설정되었는지 확인하세요.")
+        client = None
+    wrappers = {}
+    for scene, npc in npcs.items():
+        # 같은 trainNPC 인스턴스를 공유하는 씬은 래퍼도 공유
+        if id(npc) not in wrappers:
+            wrappers[id(npc)] = AsyncNPC(npc, client, LLM_CONCURRENCY)
+        async_npcs[scene] = wrappers[id(npc)]
+    app.config['ASYNC_OPENAI_CLIENT'] = client
+    print(f"비동기 NPC 초기화 성공 (동시 호출 상한: {LLM_CONCURRENCY}, 연결 풀: {HTTP_POOL_SIZE})")
+
+
+@app.after_serving
+async def close_async_client():
+    client = app.config.get('ASYNC_OPENAI_CLIENT')
+    if client is not None:
+        await client.close()
+
+
+async def session_call(session_id, fn, *args):
+    """
+    세션 저장소를 쓰는 함수를 호출합니다. 세션이 있으면 이벤트 루프를 막지 않도록 스레드에서 실행합니다
+    (NPC_SHARED_CACHE_PATH를 쓰면 다른 워커의 쓰기 잠금을 기다릴 수 있음).
+    """
+    if session_id is None:
+        return fn(*args)
+    return await asyncio.to_thread(fn, *args)
+
+
+async def read_default_params():
+    """api.read_default_params의 비동기 버전. :return: (scene, step)"""
+    if request.method == 'POST':
+        with stage_timer('parse'):
+            params = await request.get_json()
+    else: # GET
+        params = request.args
+    scene = params.get('scene', 'cb2')
+    step = read_step(params, scene)
+    session_id = params.get('session_id')
+    if step is None:
+        raise KeyError('step')
+    label_trace(scene, step)
+    if session_id:
+        annotate_request(session_id=session_id)
+        await session_call(session_id, sessions.observe_step, session_id, scene, step)
+    return scene, step
+
+
+async def read_question_params():
+    """api.read_question_params의 비동기 버전. :return: (scene, step, count, text_message, session_id)"""
+    if request.method == 'POST':
+        with stage_timer('parse'):
+            data = await request.get_json()
+        params = data
+        text_message = data['text_message']
+    else: # GET
+        params = request.args
+        text_message = request.args.get('text_message', '')
+    scene = params.get('scene', 'cb2')
+    session_id = params.get('session_id') or None
+    annotate_request(text_message=text_message, session_id=session_id)
+    step = read_step(params, scene)
+    count = params.get('count')
+    if step is None and session_id is None:
+        raise KeyError('step')
+    if count is not None:
+        count = int(count)
+    elif session_id is None:
+        count = 1
+    return scene, step, count, text_message, session_id
+
+
+async def record_session_stream(phrases, session_id, scene: str, step: int, question: str):
+    """api.record_session_stream의 비동기 버전."""
+    parts = []
+    async for phrase in phrases:
+        parts.append(phrase)
+        yield phrase
+    await session_call(session_id, record_session_answer, session_id, scene, step, question, ''.join(parts))
+
+
+def create_response(data, status_code=200):
+    return Response(
+        json.dumps(data, ensure_ascii=False, indent=None),
+        status=status_code,
+        mimetype='application/json; charset=utf-8'
+    )
+
+
+def create_stream_response(phrases):
+    """api.create_stream_response의 비동기 버전 (Server-Sent Events)."""
+    trace = current_trace()
+    if trace is not None:
+        trace.streaming = True
+
+    async def generate():
+        full_text = ''
+        try:
+            async for phrase in phrases:
+                if not full_text and trace is not None:
+                    trace.mark('first_phrase')
+                full_text += phrase
+                yield f"data: {json.dumps({'text': phrase}, ensure_ascii=False)}\n\n"
+            yield f"event: done\ndata: {json.dumps({'text': full_text}, ensure_ascii=False)}\n\n"
+        finally:
+            if trace is not None:
+                trace.finish()
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.timeout = None
+    return response
+
+
+@app.before_request
+async def start_request_trace():
+    """api.start_request_trace의 비동기 버전."""
+    rule = request.url_rule
+    if rule is not None and rule.rule.startswith('/hint/'):
+        g.trace = RequestTrace(rule.rule).activate()
+
+
+@app.teardown_request
+async def finish_request_trace(exc):
+    trace = g.pop('trace', None)
+    if trace is not None and not trace.streaming:
+        trace.finish()
+
+
+@app.route('/ping')
+async def ping():
+    """서버 상태 확인용 엔드포인트"""
+    return "pong"
+
+
+@app.route('/hint/default', methods=['GET', 'POST'])
+async def get_default_hint():
+    """1. 사용자가 말 없이 힌트를 요청했을 때"""
+    try:
+        scene, step = await read_default_params()
+
+        if scene not in async_npcs:
+            return f"'{scene}' 씬이 초기화되지 않았습니다.", 500
+
+        return await async_npcs[scene].get_default_hint(scene, step)
+
+    except (TypeError, KeyError):
+        return "필수 파라미터 'step'이 누락되었거나 형식이 잘못되었습니다.", 400
+    except ValueError:
+        return "'step' 파라미터는 정수여야 합니다.", 400
+    except Exception as e:
+        return f"오류가 발생했습니다: {str(e)}", 500
+
+
+@app.route('/hint/question', methods=['GET', 'POST'])
+async def get_question_hint():
+    """2. 사용자가 직접 질문을 통해 힌트를 요청했을 때"""
+    try:
+        scene, step, count, text_message, session_id = await read_question_params()
+
+        if not text_message:
+            return "필수 파라미터 'text_message'가 누락되었습니다.", 400
+
+        scene, step, count, history = await session_call(session_id, start_question_session, scene, step, count,
+                                                         session_id)
+        if scene not in async_npcs:
+            return f"'{scene}' 씬이 초기화되지 않았습니다.", 500
+
+        hint = await async_npcs[scene].get_question_hint(scene, step, count, text_message, history)
+        await session_call(session_id, record_session_answer, session_id, scene, step, text_message, hint)
+        return hint
+
+    except (TypeError, KeyError):
+        return "필수 파라미터('step', 'text_message')가 누락되었거나 형식이 잘못되었습니다.", 400
+    except ValueError:
+        return "'step'과 'count' 파라미터는 정수여야 합니다.", 400
+    except Exception as e:
+        return f"오류가 발생했습니다: {str(e)}", 500
+
+
+@app.route('/hint/default/stream', methods=['GET', 'POST'])
+async def stream_default_hint():
+    """1-S. /hint/default의 스트리밍(SSE) 버전"""
+    try:
+        scene, step = await read_default_params()
+
+        if scene not in async_npcs:
+            return f"'{scene}' 씬이 초기화되지 않았습니다.", 500
+
+        return create_stream_response(async_npcs[scene].stream_default_hint(scene, step))
+
+    except (TypeError, KeyError):
+        return "필수 파라미터 'step'이 누락되었거나 형식이 잘못되었습니다.", 400
+    except ValueError:
+        return "'step' 파라미터는 정수여야 합니다.", 400
+    except Exception as e:
+        return f"오류가 발생했습니다: {str(e)}", 500
+
+
+@app.route('/hint/question/stream', methods=['GET', 'POST'])
+async def stream_question_hint():
+    """2-S. /hint/question의 스트리밍(SSE) 버전"""
+    try:
+        scene, step, count, text_message, session_id = await read_question_params()
+
+        if not text_message:
+            return "필수 파라미터 'text_message'가 누락되었습니다.", 400
+
+        scene, step, count, history = await session_call(session_id, start_question_session, scene, step, count,
+                                                         session_id)
+        if scene not in async_npcs:
+            return f"'{scene}' 씬이 초기화되지 않았습니다.", 500
+
+        phrases = async_npcs[scene].stream_question_hint(scene, step, count, text_message, history)
+        if session_id is not None:
+            phrases = record_session_stream(phrases, session_id, scene, step, text_message)
+        return create_stream_response(phrases)
+
+    except (TypeError, KeyError):
+        return "필수 파라미터('step', 'text_message')가 누락되었거나 형식이 잘못되었습니다.", 400
+    except ValueError:
+        return "'step'과 'count' 파라미터는 정수여야 합니다.", 400
+    except Exception as e:
+        return f"오류가 발생했습니다: {str(e)}", 500
+
+
+async def run_batch_item(item) -> dict:
+    """api.run_batch_item의 비동기 버전."""
+    with RequestTrace('/hint/batch/item') as trace:
+        try:
+            kind = item.get('type') or ('question' if 'text_message' in item else 'default')
+            scene = item.get('scene', 'cb2')
+            step = read_step(item, scene)
+            if step is None:
+                raise KeyError('step')
+
+            if kind not in ('default', 'question'):
+                return {'error': "'type'은 'default' 또는 'question'이어야 합니다.", 'status': 400}
+            trace.endpoint = f'/hint/batch/{kind}'
+            label_trace(scene, step)
+
+            if scene not in async_npcs:
+                return {'error': f"'{scene}' 씬이 초기화되지 않았습니다.", 'status': 500}
+
+            npc = async_npcs[scene]
+            if kind == 'default':
+                return {'hint': await npc.get_default_hint(scene, step)}
+
+            count = int(item.get('count', 1))
+            text_message = item['text_message']
+            annotate_request(count=count, text_message=text_message)
+            if not text_message:
+                return {'error': "필수 파라미터 'text_message'가 누락되었습니다.", 'status': 400}
+            return {'hint': await npc.get_question_hint(scene, step, count, text_message)}
+
+        except (TypeError, KeyError, AttributeError):
+            return {'error': "필수 파라미터('step', 'text_message')가 누락되었거나 형식이 잘못되었습니다.", 'status': 400}
+        except ValueError:
+            return {'error': "'step'과 'count' 파라미터는 정수여야 합니다.", 'status': 400}
+        except Exception as e:
+            return {'error': f"오류가 발생했습니다: {str(e)}", 'status': 500}
+
+
+@app.route('/hint/batch', methods=['POST'])
+async def get_batch_hints():
+    """3. 여러 힌트를 한 번에 요청할 때 (OpenAI 호출은 동시 호출 상한 안에서 병렬로 진행)"""
+    with stage_timer('parse'):
+        data = await request.get_json(silent=True)
+    items = data.get('items') if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return "요청 본문은 {\"items\": [...]} 형식의 JSON이어야 합니다.", 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return f"한 번에 요청할 수 있는 항목은 최대 {BATCH_MAX_ITEMS}개입니다.", 400
+
+    results = await asyncio.gather(*(run_batch_item(item) for item in items))
+    set_request_path('batch')
+    with stage_timer('response'):
+        return create_response({'results': list(results)})
+
+
+@app.route('/hint/bundle', methods=['GET'])
+async def get_hint_bundle():
+    """4. 헤드셋에 미리 내려받아 둘 씬별 힌트 번들 (힌트 표 + 미리 생성된 기본 힌트 문장)"""
+    scene = request.args.get('scene', 'cb2')
+    if scene not in npcs:
+        return f"'{scene}' 씬이 초기화되지 않았습니다.", 500
+    npc = npcs[scene]
+    if scene not in npc.hint_table.scenes:
+        return "해당 씬에 대한 정보가 없습니다. 씬을 다시 확인해주세요.", 404
+
+    bundle = load_hint_bundle(npc, scene)
+    version = request.args.get('version')
+    if version and version != bundle.version:
+        return create_response({'error': "번들 버전이 바뀌었습니다. 최신 번들을 다시 받아 주세요.",
+                                'version': bundle.version}, 404)
+    status, headers, body = bundle_response(bundle, request.if_none_match, 'gzip' in request.accept_encodings,
+                                            pinned=bool(version))
+    set_request_path('bundle' if status == 200 else 'not_modified')
+    return Response(body, status=status, headers=headers)
+
+
+@app.route('/metrics', methods=['GET'])
+async def get_metrics():
+    """힌트 요청의 단계별 처리 시간과 OpenAI 토큰 사용량 (Prometheus 텍스트 형식)"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.route('/stats/cache', methods=['GET'])
+async def get_cache_stats():
+    """질문 힌트 캐시의 히트/미스 카운터를 반환합니다 (임계값 튜닝용)."""
+    npc = next(iter(npcs.values()), None)
+    wrapper = next(iter(async_npcs.values()), None)
+    if npc is None or wrapper is None:
+        return create_response({'question_cache': None, 'coalescing': None, 'upstream': None, 'rate_limit': None,
+                                'sessions': None, 'intent_router': None, 'journal': None})
+    return create_response({
+        'question_cache': npc.question_cache.stats() if npc.question_cache is not None else None,
+        'coalescing': wrapper.inflight.stats() if wrapper.inflight is not None else None,
+        'upstream': wrapper.upstream.stats(),
+        'rate_limit': wrapper.limiter.stats(),
+        'sessions': sessions.stats(),
+        'intent_router': npc.router.stats() if npc.router is not None else None,
+        'journal': request_journal.stats() if request_journal is not None else None,
+    })
+
+
+@app.route('/stats/prompts', methods=['GET'])
+async def get_prompt_stats():
+    """힌트 행마다 시스템 프롬프트에 넣는 물체 정보와 토큰 수를 반환합니다."""
+    npc = next(iter(npcs.values()), None)
+    if npc is None:
+        return "NPC가 초기화되지 않았습니다.", 500
+    return create_response(npc.prompt_token_report())
+
+
+@app.route('/admin/reload-hints', methods=['POST'])
+async def admin_reload_hints():
+    """hint_message_for_NPC.csv를 서버 재시작 없이 다시 읽어 적용합니다."""
+    if ADMIN_TOKEN and request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return "관리자 토큰이 올바르지 않습니다.", 403
+
+    npc = next(iter(npcs.values()), None)
+    if npc is None:
+        return "NPC가 초기화되지 않았습니다.", 500
+    try:
+        # CSV 파싱은 이벤트 루프를 막지 않도록 스레드에서 수행
+        return create_response(await asyncio.to_thread(reload_hints, npc))
+    except (ValueError, KeyError) as e:
+        return create_response({'error': f"CSV 검증 실패: {e}"}, 422)
+    except Exception as e:
+        return create_response({'error': f"오류가 발생했습니다: {str(e)}"}, 500)
+
+
+@app.route('/view/hint-csv', methods=['GET'])
+async def download_hint_csv():
+    """
+    hint_message_for_NPC.csv 파일을 클라이언트에 전송합니다.
+    """
+    if not os.path.exists(CSV_PATH):
+        return "CSV 파일을 찾을 수 없습니다.", 404
+    return await send_file(
+        CSV_PATH,
+        mimetype='text/csv',
+        as_attachment=True,
+        attachment_filename='hint_message_for_NPC.csv'
+    )
+
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=14724)
+
+"""
+hypercorn api_async:app --bind 0.0.0.0:14724
+"""
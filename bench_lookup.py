@@ -0,0 +1,81 @@
+import argparse
+import subprocess
+import sys
+import timeit
+
+from hint_table import load_hint_table
+
+CSV_PATH = './assets/hint_message_for_NPC.csv'
+
+
+def import_time(module: str, repeat: int) -> float:
+    """새 인터프리터에서 모듈을 import하는 데 걸리는 시간(초)의 최솟값. 인터프리터 기동 시간은 제외합니다."""
+    def run(code):
+        return min(
+            timeit.repeat(lambda: subprocess.run([sys.executable, '-c', code], check=True), number=1, repeat=repeat)
+        )
+    return run(f'import {module}') - run('pass')
+
+
+def pandas_question_hint(hint_data, scene, step, count):
+    """기존 trainNPC의 DataFrame 기반 조회 (비교용)."""
+    if step not in hint_data.index:
+        return None
+    hint_col = f'{scene}_요청 힌트 1' if count == 1 else f'{scene}_요청 힌트 2'
+    hint = hint_data.loc[step, hint_col]
+    if not hint.strip():
+        if hint_col == f'{scene}_요청 힌트 2' and hint_data.loc[step, f'{scene}_요청 힌트 1'].strip():
+            hint = hint_data.loc[step, f'{scene}_요청 힌트 1']
+        else:
+            hint = hint_data.loc[step, f'{scene}_기본 힌트']
+    return hint if hint.strip() else None
+
+
+def table_question_hint(table, scene, step, count):
+    """컴파일된 HintTable 기반 조회."""
+    row = table.get(scene, step)
+    if row is None:
+        return None
+    tier = row.tier(count)
+    return tier[1] if tier else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="힌트 조회 비용과 import 시간을 pandas DataFrame과 HintTable로 비교합니다.")
+    parser.add_argument('--csv', default=CSV_PATH)
+    parser.add_argument('--number', type=int, default=20000, help="조회 반복 횟수")
+    parser.add_argument('--repeat', type=int, default=5, help="측정 반복 횟수 (최솟값 사용)")
+    args = parser.parse_args()
+
+    table = load_hint_table(args.csv)
+    cases = [(scene, step, count) for scene in table.scenes for step in table.steps for count in (1, 2)]
+
+    def time_lookups(fn, data):
+        def loop():
+            for scene, step, count in cases:
+                fn(data, scene, step, count)
+        best = min(timeit.repeat(loop, number=max(1, args.number // len(cases)), repeat=args.repeat))
+        return best / (max(1, args.number // len(cases)) * len(cases))
+
+    print(f"조회 케이스: {len(cases)}개")
+    print(f"HintTable 조회: {time_lookups(table_question_hint, table) * 1e9:10.0f} ns/회")
+    print(f"HintTable import: {import_time('hint_table', args.repeat) * 1e3:8.1f} ms")
+
+    try:
+        import pandas as pd
+    except ImportError:
+        print("pandas가 설치되어 있지 않아 DataFrame 비교는 생략합니다.")
+        return
+    hint_data = pd.read_csv(args.csv, index_col='순서').fillna('')
+    for scene, step, count in cases:
+        assert pandas_question_hint(hint_data, scene, step, count) == table_question_hint(table, scene, step, count)
+    print(f"DataFrame 조회: {time_lookups(pandas_question_hint, hint_data) * 1e9:10.0f} ns/회")
+    print(f"pandas import: {import_time('pandas', args.repeat) * 1e3:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
+
+"""
+python bench_lookup.py
+"""
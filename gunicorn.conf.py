@@ -0,0 +1,34 @@
+import multiprocessing
+import os
+
+# 여러 워커 프로세스로 api.py(Flask)를 실행하기 위한 gunicorn 설정
+#   gunicorn -c gunicorn.conf.py api:app
+#
+# 마스터 프로세스가 fork 전에 api 모듈을 한 번 읽어(preload) 힌트 표, 씬 정보, 세부 단계 색인을 만들어 두므로
+# 워커는 이를 복사 없이 공유(copy-on-write)하고, 질문 힌트 캐시와 기본 힌트 풀은 SQLite 파일을 통해 모든 워커가 함께 씁니다.
+
+# api 모듈을 읽기 전에 설정해야 함
+os.environ['NPC_PRELOAD_FOR_FORK'] = '1'
+os.environ.setdefault('NPC_SHARED_CACHE_PATH', './cache/question_cache.sqlite3')
+# 요청 기록은 워커마다 따로 씀 (replay.py에 './logs/hint_requests.*.jsonl'로 모두 넘길 수 있음)
+os.environ.setdefault('NPC_JOURNAL_PATH', './logs/hint_requests.{pid}.jsonl')
+
+bind = os.getenv('NPC_BIND', '0.0.0.0:14724')
+workers = int(os.getenv('NPC_WORKERS', str(multiprocessing.cpu_count())))
+# OpenAI 사용량 한도(NPC_LLM_RPM, NPC_LLM_TPM)는 계정 전체 값이므로 워커 수로 나눠 각 워커에 적용
+os.environ.setdefault('NPC_LLM_LIMIT_SHARES', str(workers))
+# OpenAI 응답을 기다리는 동안 다른 요청을 처리할 수 있도록 워커마다 스레드를 둠
+worker_class = 'gthread'
+threads = int(os.getenv('NPC_WORKER_THREADS', '16'))
+preload_app = True
+# 스트리밍 응답과 응답 시간 예산을 넘긴 OpenAI 호출을 고려한 워커 타임아웃 (초)
+timeout = int(os.getenv('NPC_WORKER_TIMEOUT', '60'))
+
+
+def post_fork(server, worker):
+    """
+    fork 후 각 워커에서 CSV 감시 스레드를 시작합니다. 풀 채우기는 처음 시작한 워커 하나만 하며,
+    채운 문장은 공유 파일에 저장되므로 모든 워커가 바로 사용합니다.
+    """
+    import api
+    api.start_background_tasks(warm_pool=worker.age == 1)
@@ -0,0 +1,133 @@
+import gzip
+import hashlib
+import json
+import threading
+
+
+# 번들 JSON 구조가 바뀌면 올려서 이전 버전과 구분되도록 함
+BUNDLE_FORMAT = 1
+# 버전을 지정해 받은 번들은 내용이 바뀌지 않으므로 1년 동안 다시 받지 않아도 됨
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# 최신 번들은 캐시해 두되 쓸 때마다 ETag로 확인 (바뀌지 않았으면 304로 본문 없이 응답)
+LATEST_CACHE_CONTROL = 'no-cache'
+
+
+def bundle_source(table, step_index, scene: str) -> dict:
+    """
+    번들 중 원본 자료(CSV 힌트 표, 세부 단계 색인)에서 나오는 부분을 만듭니다.
+    단계 번호는 API 입력과 같은 기준(0부터)이며, hints는 요청 횟수별 폴백이 적용된 힌트입니다.
+    """
+    steps = []
+    for step in table.steps:
+        row = table.get(scene, step)
+        if row is None:
+            continue
+        steps.append({
+            'step': step - 1,
+            'stage': row.stage,
+            'content': row.content,
+            'fine_steps': list(step_index.fine_steps_of(step)),
+            'hints': {
+                'default': row.tiers[0][1] if row.tiers[0] else None,
+                'question_1': row.tiers[1][1] if row.tiers[1] else None,
+                'question_2': row.tiers[2][1] if row.tiers[2] else None,
+            },
+        })
+    return {'format': BUNDLE_FORMAT, 'scene': scene, 'steps': steps}
+
+
+def bundle_version(source: dict) -> str:
+    """
+    번들 원본 부분(CSV 힌트 표, 세부 단계 색인)의 해시. 내용이 같으면 어느 프로세스에서 만들어도 같고,
+    CSV를 같은 내용으로 다시 저장해도 바뀌지 않습니다. 풀의 문장은 계속 교체되므로 넣지 않습니다.
+    """
+    text = json.dumps(source, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+class HintBundle:
+    """
+    한 씬의 힌트 번들. 응답 본문과 gzip 본문을 만들 때 한 번만 인코딩해 두고 그대로 보냅니다.
+    table은 이 번들을 만들 때 사용한 HintTable이며, 표가 교체되었는지 확인하는 데 씁니다.
+    """
+    __slots__ = ('scene', 'version', 'etag', 'body', 'gzip_body', 'table')
+
+    def __init__(self, scene: str, version: str, payload: dict, table):
+        self.scene = scene
+        self.version = version
+        self.etag = f'"{scene}-{version}"'
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        # mtime=0으로 압축하여 같은 내용이면 항상 같은 바이트열이 되도록 함
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.table = table
+
+
+class HintBundleStore:
+    """
+    씬별 최신 HintBundle 보관소. 버전은 힌트 표와 세부 단계 색인의 해시이므로 원본 자료가 바뀔 때만 바뀌고,
+    힌트 표가 교체되어도 내용이 같으면 기존 번들을 그대로 씁니다.
+    미리 생성된 문장(lines)은 그 버전의 번들을 처음 만들 때 풀에 있던 문장으로 고정하므로,
+    풀이 보충되어도 같은 버전의 본문은 바뀌지 않습니다.
+    """
+    def __init__(self):
+        self._bundles = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def get(self, scene: str, table, step_index, lines_for) -> HintBundle:
+        """
+        :param table: 현재 HintTable
+        :param step_index: 현재 StepIndex
+        :param lines_for: (단계, 기본 힌트) -> 미리 생성된 NPC 문장 목록을 돌려주는 함수 (새 버전을 만들 때만 호출)
+        """
+        with self._lock:
+            bundle = self._bundles.get(scene)
+        if bundle is not None and bundle.table is table:
+            return bundle
+
+        source = bundle_source(table, step_index, scene)
+        version = bundle_version(source)
+        with self._lock:
+            bundle = self._bundles.get(scene)
+            if bundle is not None and bundle.version == version:
+                bundle.table = table
+                return bundle
+
+        for item in source['steps']:
+            hint = item['hints']['default']
+            item['lines'] = list(lines_for(item['step'] + 1, hint)) if hint else []
+        bundle = HintBundle(scene, version, dict(source, version=version), table)
+        with self._lock:
+            self._bundles[scene] = bundle
+            self.builds += 1
+        return bundle
+
+    def versions(self) -> dict:
+        with self._lock:
+            return {scene: bundle.version for scene, bundle in self._bundles.items()}
+
+
+def bundle_response(bundle: HintBundle, if_none_match, accept_gzip: bool, pinned: bool):
+    """
+    번들 요청에 대한 응답을 정합니다 (Flask/Quart 공통).
+    :param if_none_match: 요청의 If-None-Match (werkzeug ETags)
+    :param accept_gzip: 클라이언트가 gzip을 받을 수 있는지 여부
+    :param pinned: 요청에 현재 버전을 지정했는지 여부 (그렇다면 오래 캐시해도 됨)
+    :return: (상태 코드, 헤더 사전, 본문 바이트열)
+    """
+    etag = bundle.etag[:-1] + '-gzip"' if accept_gzip else bundle.etag
+    headers = {
+        'ETag': etag,
+        'Cache-Control': IMMUTABLE_CACHE_CONTROL if pinned else LATEST_CACHE_CONTROL,
+        'Vary': 'Accept-Encoding',
+        'X-Hint-Bundle-Version': bundle.version,
+    }
+    # 압축 여부와 관계없이 같은 버전이면 바뀌지 않은 것으로 봄
+    if if_none_match and (if_none_match.contains_weak(bundle.etag.strip('"'))
+                          or if_none_match.contains_weak(etag.strip('"'))):
+        return 304, headers, b''
+    headers['Content-Type'] = 'application/json; charset=utf-8'
+    if accept_gzip:
+        headers['Content-Encoding'] = 'gzip'
+        return 200, headers, bundle.gzip_body
+    return 200, headers, bundle.body
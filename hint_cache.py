@@ -0,0 +1,322 @@
+import os
+import json
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+def read_pool_file(path: str, size: int) -> dict:
+    """
+    DefaultHintPool.save()로 저장한 풀 파일을 읽습니다.
+    :return: {(씬, 단계): (원본 힌트, 최근 size개 문장, 마지막으로 문장을 추가한 시각)},
+             파일이 없거나 읽지 못하면 빈 사전
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            raw = json.load(f)
+        # 시각이 없는 예전 파일은 파일을 저장한 시각을 사용
+        saved_at = os.path.getmtime(path)
+    except (OSError, ValueError) as e:
+        print(f"힌트 풀 파일을 읽지 못했습니다 ({path}): {e}")
+        return {}
+
+    entries = {}
+    for item in raw.get('entries', []):
+        lines = [line for line in item.get('lines', []) if line]
+        if lines:
+            entries[(item['scene'], int(item['step']))] = (item['hint'], lines[-size:], item.get('updated', saved_at))
+    return entries
+
+
+class DefaultHintPool:
+    """
+    (씬, 단계)별로 미리 생성해 둔 NPC 기본 힌트 문장 풀.
+    요청 시에는 메모리에서 바로 꺼내 순서대로 돌려주며, 문장이 size개보다 적거나 원본 힌트가 바뀌었을 때만
+    백그라운드에서 새 문장을 생성합니다. 가득 찬 칸은 OpenAI를 호출하지 않고 계속 돌려 쓰고,
+    max_age를 지정하면 마지막으로 문장을 추가한 지 그만큼 지난 칸만 가장 오래된 문장 하나를 새로 교체합니다.
+    """
+    def __init__(self, path: str, size: int = 3, max_workers: int = 2, max_age: float = 0.0):
+        """
+        :param path: 풀을 저장할 JSON 파일 경로
+        :param size: (씬, 단계)마다 보관할 문장 수
+        :param max_workers: 백그라운드 생성에 사용할 스레드 수
+        :param max_age: 가득 찬 칸의 문장을 하나 교체할 주기 (초, 0이면 교체하지 않음)
+        """
+        self.path = path
+        self.size = max(1, size)
+        self.max_age = max_age
+        # (scene, step) -> {'hint': 원본 힌트, 'lines': [...], 'cursor': int, 'updated': 마지막으로 문장을 추가한 시각}
+        self._entries = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hint-pool')
+
+    def load(self) -> int:
+        """
+        디스크에 저장된 풀을 읽어옵니다.
+        :return: 읽어온 (씬, 단계) 항목 수
+        """
+        entries = {
+            key: {'hint': hint, 'lines': lines, 'cursor': 0, 'updated': updated}
+            for key, (hint, lines, updated) in read_pool_file(self.path, self.size).items()
+        }
+        with self._lock:
+            self._entries = entries
+        return len(entries)
+
+    def save(self):
+        """현재 풀을 임시 파일에 쓴 뒤 교체하여 원자적으로 저장합니다."""
+        with self._lock:
+            entries = [
+                {'scene': scene, 'step': step, 'hint': entry['hint'], 'lines': list(entry['lines']),
+                 'updated': entry['updated']}
+                for (scene, step), entry in sorted(self._entries.items())
+            ]
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 여러 워커 프로세스가 같은 파일에 저장할 수 있으므로 임시 파일은 프로세스마다 따로 씀
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'size': self.size, 'entries': entries}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def take(self, scene: str, step: int, hint: str, generate=None):
+        """
+        풀에서 다음 문장을 꺼냅니다. 원본 힌트가 바뀐 항목은 사용하지 않습니다.
+
+        :param generate: 문장 하나를 생성하는 함수. 주어지면 풀이 덜 찼거나 max_age가 지났을 때
+                         백그라운드에서 채웁니다.
+        :return: 풀에 있던 문장, 없으면 None
+        """
+        key = (scene, step)
+        refill = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['hint'] != hint or not entry['lines']:
+                line = None
+                refill = True
+            else:
+                lines = entry['lines']
+                line = lines[entry['cursor'] % len(lines)]
+                entry['cursor'] += 1
+                refill = self._needs_refill(len(lines), entry['updated'])
+
+        if refill and generate is not None:
+            self.refill(scene, step, hint, generate)
+        return line
+
+    def _needs_refill(self, count: int, updated: float) -> bool:
+        """문장이 size개보다 적거나, 가득 찼어도 마지막 추가 후 max_age가 지났으면 새 문장이 필요합니다."""
+        return count < self.size or (self.max_age > 0 and time.time() - updated >= self.max_age)
+
+    def refill(self, scene: str, step: int, hint: str, generate) -> bool:
+        """
+        (씬, 단계)에 대한 문장 생성을 백그라운드에 예약합니다. 이미 예약된 경우 무시합니다.
+        :return: 새로 예약했는지 여부
+        """
+        key = (scene, step)
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+        self._executor.submit(self._refill, key, hint, generate)
+        return True
+
+    def _refill(self, key, hint, generate):
+        try:
+            line = generate()
+        except Exception as e:
+            print(f"힌트 풀 보충 실패 {key}: {e}")
+            line = None
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+        if not line:
+            return
+        self.put(key[0], key[1], hint, [line])
+        try:
+            self.save()
+        except OSError as e:
+            print(f"힌트 풀 저장 실패 ({self.path}): {e}")
+
+    def put(self, scene: str, step: int, hint: str, lines):
+        """
+        풀에 문장을 추가합니다. 원본 힌트가 바뀌었으면 기존 문장은 버리고,
+        크기를 넘으면 가장 오래된 문장부터 제거합니다.
+        """
+        key = (scene, step)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['hint'] != hint:
+                entry = {'hint': hint, 'lines': [], 'cursor': 0, 'updated': 0.0}
+                self._entries[key] = entry
+            entry['lines'].extend(lines)
+            entry['updated'] = time.time()
+            overflow = len(entry['lines']) - self.size
+            if overflow > 0:
+                del entry['lines'][:overflow]
+                entry['cursor'] = max(0, entry['cursor'] - overflow)
+
+    def invalidate(self, keys) -> int:
+        """
+        주어진 (씬, 단계) 항목을 풀에서 제거합니다.
+        :return: 제거한 항목 수
+        """
+        with self._lock:
+            removed = [key for key in keys if self._entries.pop(key, None) is not None]
+        return len(removed)
+
+    def lines(self, scene: str, step: int, hint: str) -> list:
+        """원본 힌트가 일치하는 (씬, 단계)의 보관 문장을 순서를 바꾸지 않고 복사해 반환합니다."""
+        with self._lock:
+            entry = self._entries.get((scene, step))
+            if entry is None or entry['hint'] != hint:
+                return []
+            return list(entry['lines'])
+
+    def count(self, scene: str, step: int, hint: str) -> int:
+        """원본 힌트가 일치하는 (씬, 단계)의 보관 문장 수를 반환합니다."""
+        with self._lock:
+            entry = self._entries.get((scene, step))
+            if entry is None or entry['hint'] != hint:
+                return 0
+            return len(entry['lines'])
+
+
+def normalize_question(text: str) -> str:
+    """
+    질문을 비교하기 쉬운 형태로 정규화합니다.
+    공백과 문장부호를 제거하고, 한글 음절은 자모 단위로 분해합니다.
+    """
+    text = unicodedata.normalize('NFD', text.lower())
+    return ''.join(ch for ch in text if ch.isalnum() or unicodedata.category(ch).startswith('M'))
+
+
+def char_ngrams(text: str, n: int = 3) -> frozenset:
+    """문자 n-gram 집합을 반환합니다. n보다 짧은 문자열은 문자열 전체를 하나의 n-gram으로 사용합니다."""
+    if len(text) <= n:
+        return frozenset([text]) if text else frozenset()
+    return frozenset(text[i:i + n] for i in range(len(text) - n + 1))
+
+
+def ngram_similarity(a: frozenset, b: frozenset) -> float:
+    """두 n-gram 집합의 Dice 계수(0~1)를 계산합니다."""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class QuestionCache:
+    """
+    (씬, 단계, 힌트 열)별로 질문-응답을 저장하는 유사도 기반 캐시.
+    정규화한 질문의 자모 n-gram 유사도가 임계값 이상이면 같은 질문으로 보고 저장된 응답을 돌려줍니다.
+    전체 항목 수는 LRU 방식으로, 각 항목의 수명은 TTL로 제한합니다.
+    """
+    def __init__(self, max_entries: int = 512, ttl: float = 3600.0, threshold: float = 0.7, ngram: int = 3):
+        """
+        :param max_entries: 캐시에 보관할 최대 질문 수
+        :param ttl: 항목 유효 시간 (초)
+        :param threshold: 같은 질문으로 판단할 최소 유사도 (0~1)
+        :param ngram: 유사도 계산에 사용할 자모 n-gram 길이
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.ngram = ngram
+        # (key, 정규화된 질문) -> {'hint', 'grams', 'answer', 'expires_at'}, 사용 순서대로 정렬
+        self._entries = OrderedDict()
+        # key -> 해당 key에 속한 정규화된 질문 집합
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, hint: str, question: str):
+        """
+        가장 유사한 저장 질문의 응답을 찾습니다.
+        :param key: (씬, 단계, 힌트 열)
+        :param hint: 현재 힌트 원문 (저장 당시와 다르면 사용하지 않음)
+        :return: 저장된 응답, 없으면 None
+        """
+        normalized = normalize_question(question)
+        grams = char_ngrams(normalized, self.ngram)
+        now = time.monotonic()
+        with self._lock:
+            best_id, best_score = None, 0.0
+            for stored in list(self._buckets.get(key, ())):
+                entry_id = (key, stored)
+                entry = self._entries[entry_id]
+                if entry['expires_at'] <= now or entry['hint'] != hint:
+                    self._remove(entry_id)
+                    self.expirations += 1
+                    continue
+                score = 1.0 if stored == normalized else ngram_similarity(grams, entry['grams'])
+                if score > best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id]['answer']
+
+    def put(self, key, hint: str, question: str, answer: str):
+        """질문-응답을 저장하고, 최대 크기를 넘으면 가장 오래 사용되지 않은 항목을 제거합니다."""
+        normalized = normalize_question(question)
+        entry_id = (key, normalized)
+        with self._lock:
+            self._entries[entry_id] = {
+                'hint': hint,
+                'grams': char_ngrams(normalized, self.ngram),
+                'answer': answer,
+                'expires_at': time.monotonic() + self.ttl,
+            }
+            self._entries.move_to_end(entry_id)
+            self._buckets.setdefault(key, set()).add(normalized)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, scene_steps) -> int:
+        """
+        주어진 (씬, 단계)에 속한 모든 질문-응답을 제거합니다 (힌트 열과 무관).
+        :return: 제거한 항목 수
+        """
+        scene_steps = set(scene_steps)
+        with self._lock:
+            entry_ids = [entry_id for entry_id in self._entries if entry_id[0][:2] in scene_steps]
+            for entry_id in entry_ids:
+                self._remove(entry_id)
+        return len(entry_ids)
+
+    def _remove(self, entry_id):
+        key, normalized = entry_id
+        del self._entries[entry_id]
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket.discard(normalized)
+            if not bucket:
+                del self._buckets[key]
+
+    def stats(self) -> dict:
+        """히트/미스 카운터와 현재 크기를 반환합니다."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'threshold': self.threshold,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
@@ -0,0 +1,183 @@
+import csv
+import os
+import threading
+
+
+# CSV 열 이름 접미사 (열 이름은 '{scene}_{접미사}' 형식)
+CONTENT_SUFFIX = '내용'
+DEFAULT_SUFFIX = '기본 힌트'
+REQUEST_1_SUFFIX = '요청 힌트 1'
+REQUEST_2_SUFFIX = '요청 힌트 2'
+
+
+class HintRow:
+    """
+    한 (씬, 단계)의 힌트 정보. 요청 횟수별 폴백(요청 힌트 2 -> 요청 힌트 1 -> 기본 힌트)은
+    로드 시점에 미리 계산해 tiers에 저장합니다.
+
+    tiers[0]: 기본 힌트 요청, tiers[1]: 질문 1회차, tiers[2]: 질문 2회차 이상
+    각 항목은 (실제 사용할 힌트 열 이름, 힌트) 튜플이며, 제공할 힌트가 없으면 None입니다.
+    """
+    __slots__ = ('scene', 'step', 'stage', 'content', 'default', 'request_1', 'request_2', 'tiers')
+
+    def __init__(self, scene: str, step: int, stage: str, content: str, default: str, request_1: str, request_2: str):
+        self.scene = scene
+        self.step = step
+        self.stage = stage
+        self.content = content
+        self.default = default
+        self.request_1 = request_1
+        self.request_2 = request_2
+
+        default_tier = (f'{scene}_{DEFAULT_SUFFIX}', default) if default.strip() else None
+        if request_1.strip():
+            request_1_tier = (f'{scene}_{REQUEST_1_SUFFIX}', request_1)
+        else:
+            request_1_tier = default_tier
+        if request_2.strip():
+            request_2_tier = (f'{scene}_{REQUEST_2_SUFFIX}', request_2)
+        else:
+            request_2_tier = request_1_tier
+        self.tiers = (default_tier, request_1_tier, request_2_tier)
+
+    def tier(self, count: int):
+        """
+        요청 횟수에 맞는 (힌트 열 이름, 힌트)를 반환합니다.
+        :param count: 0이면 기본 힌트, 1이면 질문 1회차, 2 이상이면 질문 2회차
+        """
+        return self.tiers[count if count < 2 else 2]
+
+    def __eq__(self, other):
+        if not isinstance(other, HintRow):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self):
+        return hash((self.scene, self.step, self.default))
+
+    def __repr__(self):
+        return f"HintRow({self.scene!r}, {self.step}, default={self.default!r})"
+
+
+class HintTable:
+    """
+    hint_message_for_NPC.csv를 (씬, 단계) -> HintRow 사전으로 컴파일한 읽기 전용 표.
+    """
+    __slots__ = ('scenes', 'steps', 'rows')
+
+    def __init__(self, rows):
+        """
+        :param rows: HintRow 목록
+        """
+        self.rows = {(row.scene, row.step): row for row in rows}
+        self.scenes = tuple(dict.fromkeys(row.scene for row in rows))
+        self.steps = tuple(sorted({row.step for row in rows}))
+
+    def get(self, scene: str, step: int):
+        """(씬, 단계)의 HintRow를 반환합니다. 없으면 None."""
+        return self.rows.get((scene, step))
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def load_hint_table(csv_path: str) -> HintTable:
+    """
+    CSV 파일을 읽어 HintTable로 컴파일합니다. '순서' 열이 단계 번호이며,
+    '{scene}_내용' 열이 있는 모든 씬을 불러옵니다. 빈 칸은 빈 문자열로 처리합니다.
+    """
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"CSV 파일을 찾을 수 없습니다: {csv_path}")
+
+    # 엑셀에서 저장한 CSV의 BOM을 제거하기 위해 utf-8-sig로 읽음
+    with open(csv_path, encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        columns = reader.fieldnames or []
+        records = list(reader)
+
+    if '순서' not in columns:
+        raise ValueError(f"CSV에 '순서' 열이 없습니다: {csv_path}")
+    scenes = [column[:-len(CONTENT_SUFFIX) - 1] for column in columns if column.endswith(f'_{CONTENT_SUFFIX}')]
+
+    rows = []
+    for record in records:
+        step = int(record['순서'])
+        for scene in scenes:
+            rows.append(HintRow(
+                scene=scene,
+                step=step,
+                stage=record.get('단계') or '',
+                content=record.get(f'{scene}_{CONTENT_SUFFIX}') or '',
+                default=record.get(f'{scene}_{DEFAULT_SUFFIX}') or '',
+                request_1=record.get(f'{scene}_{REQUEST_1_SUFFIX}') or '',
+                request_2=record.get(f'{scene}_{REQUEST_2_SUFFIX}') or '',
+            ))
+    return HintTable(rows)
+
+
+def validate_hint_table(table: HintTable) -> list:
+    """
+    새로 읽은 힌트 표를 서비스에 적용해도 되는지 검사합니다.
+    :return: 문제점 목록 (비어 있으면 정상)
+    """
+    problems = []
+    if not table.rows:
+        problems.append("힌트 행이 하나도 없습니다.")
+    if not table.scenes:
+        problems.append("'{scene}_내용' 형식의 씬 열이 없습니다.")
+    for scene in table.scenes:
+        if not any(table.get(scene, step).tiers[0] for step in table.steps):
+            problems.append(f"'{scene}' 씬에 기본 힌트가 하나도 없습니다.")
+    return problems
+
+
+def diff_hint_tables(old: HintTable, new: HintTable) -> set:
+    """
+    두 힌트 표에서 내용이 달라졌거나 추가/삭제된 (씬, 단계) 집합을 반환합니다.
+    """
+    keys = set(old.rows) | set(new.rows)
+    return {key for key in keys if old.rows.get(key) != new.rows.get(key)}
+
+
+class HintFileWatcher:
+    """
+    CSV 파일의 수정 시각과 크기를 주기적으로 확인하여, 바뀌면 콜백을 호출하는 백그라운드 스레드.
+    """
+    def __init__(self, path: str, callback, interval: float = 2.0):
+        """
+        :param path: 감시할 파일 경로
+        :param callback: 파일이 바뀌었을 때 호출할 함수 (인자 없음)
+        :param interval: 확인 주기 (초)
+        """
+        self.path = path
+        self.callback = callback
+        self.interval = interval
+        self._signature = self._stat()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='hint-file-watcher', daemon=True)
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            signature = self._stat()
+            # 파일이 잠시 사라진 경우(편집기의 저장 방식 등)는 다음 확인까지 기다림
+            if signature is None or signature == self._signature:
+                continue
+            self._signature = signature
+            try:
+                self.callback()
+            except Exception as e:
+                print(f"힌트 파일 변경 처리 실패, 기존 힌트 유지 ({self.path}): {e}")
@@ -0,0 +1,230 @@
+import re
+import threading
+from itertools import combinations
+
+from hint_cache import char_ngrams, normalize_question
+from metrics import INTENT_ROUTES
+
+
+# 질문 의도별 키워드 (공백을 뺀 질문에서 찾음). 키는 scenes.json details의 항목 이름과 같아야 함
+INTENT_KEYWORDS = {
+    '생김새': ('생김새', '생겼', '생긴', '모양', '무슨색', '색깔', '외형', '모습'),
+    '위치': ('어디', '어딨', '위치', '찾'),
+}
+# 이런 표현이 있으면 물체의 생김새/위치만 묻는 질문이 아니므로 LLM에 맡김
+# ('어느 방향으로 돌려요?'처럼 조작 방법을 묻는 동사 포함)
+OPEN_ENDED_KEYWORDS = (
+    '왜', '뭐', '뭘', '무엇', '다음', '어떻게해', '어떻게하', '방법', '순서', '눌러', '누르', '해도',
+    '돌려', '돌리', '돌릴', '잠가', '잠그', '잠글', '잠궈', '열어', '여는', '열면', '열고', '닫아', '닫는', '닫으', '닫고',
+)
+# 물체 이름 바로 뒤에 오면 그 물체 안팎의 다른 물건을 가리키는 조사 (예: '장비함에서 Inflation Kit')
+RELATION_PARTICLES = ('안에서', '안에', '안의', '속에', '속의', '옆에', '옆의', '위에', '위의', '밑에', '아래', '에서', '의')
+# 물체 이름/별칭을 뺀 나머지에 영문 단어가 있으면 씬 정의에 없는 물건을 묻는 것으로 봄
+LATIN_WORD = re.compile(r'[a-z]{2,}')
+
+# 자동으로 만든 답변에서 물체 정보 문구의 끝을 존댓말로 바꾸는 규칙 (앞에서부터 먼저 일치하는 것 사용)
+POLITE_ENDINGS = (
+    ('위치함', '있어요'),
+    ('있음', '있어요'),
+    ('보임', '보여요'),
+    ('형태임', '형태예요'),
+    ('형태', '형태예요'),
+    ('함', '해요'),
+    ('임', '이에요'),
+)
+
+
+def compact(text: str) -> str:
+    """공백을 없애고 소문자로 바꿉니다. 별칭과 키워드는 이 형태로 비교합니다."""
+    return ''.join(text.lower().split())
+
+
+def topic_particle(word: str) -> str:
+    """단어 뒤에 붙일 보조사 '은/는'을 고릅니다 (영문 약어는 마지막 글자의 읽는 소리 기준)."""
+    last = word.rstrip()[-1:]
+    if '가' <= last <= '힣':
+        return '은' if (ord(last) - ord('가')) % 28 else '는'
+    return '은' if last.upper() in 'LMNR' else '는'
+
+
+def polite_sentence(text: str) -> str:
+    """'...에 위치함' 같은 물체 정보 문구를 '...에 있어요.' 같은 존댓말 문장으로 바꿉니다."""
+    text = text.strip().rstrip('.')
+    for ending, polite in POLITE_ENDINGS:
+        if text.endswith(ending):
+            return text[:-len(ending)] + polite + '.'
+    return text + '.'
+
+
+def render_object_answer(obj, labels) -> str:
+    """
+    물체 하나에 대한 답변을 만듭니다. scenes.json에 직접 작성한 answers가 있으면 그대로 쓰고,
+    없으면 details 문구를 존댓말로 바꿔 씁니다.
+    :param labels: 답할 항목 이름 목록 (예: ('생김새', '위치'))
+    """
+    details = dict(obj.details)
+    sentences = []
+    for label in labels:
+        answer = obj.answers.get(label)
+        if not answer:
+            answer = f"{obj.name}{topic_particle(obj.name)} {polite_sentence(details[label])}"
+        sentences.append(answer)
+    return ' '.join(sentences)
+
+
+def names_other_item(text: str, matched_names, object_names) -> bool:
+    """
+    질문이 찾은 물체가 아닌 다른 물건(씬 정의에 없는 물건)을 묻는지 확인합니다.
+    :param text: 공백을 뺀 질문 (compact)
+    :param matched_names: 질문에서 찾은 모든 물체 이름/별칭
+    :param object_names: 그중 답할 물체의 이름/별칭
+    """
+    rest = text
+    for name in sorted(matched_names, key=len, reverse=True):
+        rest = rest.replace(name, ' ')
+    if LATIN_WORD.search(rest):
+        return True
+    intent_words = tuple(keyword for keywords in INTENT_KEYWORDS.values() for keyword in keywords)
+    for name in object_names:
+        start = text.find(name)
+        while start != -1:
+            after = text[start + len(name):]
+            particle = next((p for p in RELATION_PARTICLES if after.startswith(p)), None)
+            # 'ESD의 위치'처럼 조사 뒤에 바로 묻는 항목이 오면 그 물체에 대한 질문
+            if particle is not None and after[len(particle):] and not after[len(particle):].startswith(intent_words):
+                return True
+            start = text.find(name, start + 1)
+    return False
+
+
+class IntentRouter:
+    """
+    물체의 생김새나 위치를 묻는 단순한 질문을 OpenAI 호출 없이 미리 만들어 둔 답변으로 처리합니다.
+
+    물체 이름/별칭과 의도 키워드로 질문을 분류하고, 확신도가 threshold 이상일 때만 답합니다.
+    열린 질문(다음에 할 일, 이유, 방법, 조작 등), 여러 물체를 묻는 질문, 물체를 특정할 수 없는 질문,
+    씬 정의에 없는 물건을 묻는 질문은 None을 돌려 기존 캐시/LLM 경로로 넘깁니다.
+    """
+    def __init__(self, scenes: dict, threshold: float = 0.8, ngram: int = 3):
+        """
+        :param scenes: {씬 이름: SceneConfig}
+        :param threshold: 바로 답할 최소 확신도 (0~1). 이름/별칭이 그대로 들어 있으면 1.0,
+                          오타 등으로 비슷하기만 하면 자모 n-gram 포함 비율
+        :param ngram: 유사도 계산에 사용할 자모 n-gram 길이
+        """
+        self.threshold = threshold
+        self.ngram = ngram
+        # 씬 -> [(물체, 공백을 뺀 이름/별칭 목록, 별칭별 자모 n-gram)]
+        self._objects = {}
+        # (씬, 물체 이름, 항목 튜플) -> 답변. 항목의 모든 조합에 대해 미리 만들어 둠
+        self._answers = {}
+        for scene, config in scenes.items():
+            entries = []
+            for obj in config.objects:
+                names = [compact(name) for name in (obj.name,) + obj.aliases if name.strip()]
+                grams = [char_ngrams(normalize_question(name), ngram) for name in names]
+                entries.append((obj, names, grams))
+                labels = tuple(label for label, _ in obj.details)
+                for size in range(1, len(labels) + 1):
+                    for combo in combinations(labels, size):
+                        self._answers[(scene, obj.name, combo)] = render_object_answer(obj, combo)
+            self._objects[scene] = entries
+
+        self._lock = threading.Lock()
+        self.routed = 0
+        self.passed = 0
+        # LLM으로 넘긴 이유별 횟수 (open, no_intent, no_object, ambiguous, unknown_item, low_confidence, unknown_scene)
+        self.passed_by_reason = {}
+
+    def _match_object(self, scene: str, question: str):
+        """
+        :return: (물체, 확신도, 넘긴 이유). 물체를 특정하지 못하면 물체는 None
+        """
+        entries = self._objects.get(scene)
+        if not entries:
+            return None, 0.0, 'unknown_scene'
+
+        text = compact(question)
+        matches = [(obj, name) for obj, names, _ in entries for name in names if name in text]
+        if matches:
+            # 다른 물체의 더 긴 이름에 포함된 짧은 별칭은 제외 (예: '장비보관함' 안의 '보관함')
+            found = {
+                obj.name: obj for obj, name in matches
+                if not any(other is not obj and name != longer and name in longer for other, longer in matches)
+            }
+            if len(found) != 1:
+                return None, 0.0, 'ambiguous'
+            obj = next(iter(found.values()))
+            if names_other_item(text, [name for _, name in matches], [name for other, name in matches if other is obj]):
+                return None, 0.0, 'unknown_item'
+            return obj, 1.0, None
+
+        if names_other_item(text, (), ()):
+            return None, 0.0, 'unknown_item'
+        # 이름이 그대로 없으면 오타를 감안해 자모 n-gram이 얼마나 포함되어 있는지로 판단
+        question_grams = char_ngrams(normalize_question(question), self.ngram)
+        scores = []
+        for obj, _, grams in entries:
+            best = max((len(g & question_grams) / len(g) for g in grams if g), default=0.0)
+            scores.append((best, obj))
+        scores.sort(key=lambda item: item[0], reverse=True)
+        if not scores or scores[0][0] == 0.0:
+            return None, 0.0, 'no_object'
+        # 두 번째 물체도 바로 답할 만큼 비슷하면 어느 물체인지 확신할 수 없음
+        if len(scores) > 1 and (scores[1][0] == scores[0][0] or scores[1][0] >= self.threshold):
+            return None, 0.0, 'ambiguous'
+        return scores[0][1], scores[0][0], None
+
+    def classify(self, scene: str, question: str):
+        """
+        질문을 분류합니다.
+        :return: (물체, 묻는 항목 튜플, 확신도, 넘긴 이유). 답할 수 없으면 물체는 None
+        """
+        text = compact(question)
+        if any(keyword in text for keyword in OPEN_ENDED_KEYWORDS):
+            return None, (), 0.0, 'open'
+        intents = {label for label, keywords in INTENT_KEYWORDS.items() if any(k in text for k in keywords)}
+        if not intents:
+            return None, (), 0.0, 'no_intent'
+
+        obj, confidence, reason = self._match_object(scene, question)
+        if obj is None:
+            return None, (), 0.0, reason
+        labels = tuple(label for label, _ in obj.details if label in intents)
+        if not labels:
+            return None, (), 0.0, 'no_intent'
+        return obj, labels, confidence, None
+
+    def route(self, scene: str, question: str):
+        """
+        바로 답할 수 있는 질문이면 미리 만들어 둔 답변을 돌려줍니다.
+        :return: 답변, LLM 경로로 넘겨야 하면 None
+        """
+        obj, labels, confidence, reason = self.classify(scene, question)
+        answer = None
+        if obj is not None:
+            if confidence >= self.threshold:
+                answer = self._answers[(scene, obj.name, labels)]
+            else:
+                reason = 'low_confidence'
+
+        with self._lock:
+            if answer is not None:
+                self.routed += 1
+            else:
+                self.passed += 1
+                self.passed_by_reason[reason] = self.passed_by_reason.get(reason, 0) + 1
+        INTENT_ROUTES.inc((scene, 'routed' if answer is not None else 'llm'))
+        return answer
+
+    def stats(self) -> dict:
+        """바로 답한 질문과 LLM 경로로 넘긴 질문의 수를 반환합니다."""
+        with self._lock:
+            total = self.routed + self.passed
+            return {
+                'threshold': self.threshold,
+                'routed': self.routed,
+                'llm': self.passed,
+                'routed_rate': self.routed / total if total else 0.0,
+                'llm_by_reason': dict(self.passed_by_reason),
+            }
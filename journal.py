@@ -0,0 +1,187 @@
+import atexit
+import glob
+import json
+import os
+import threading
+from collections import deque
+
+
+class RequestJournal:
+    """
+    힌트 요청 하나마다 JSONL 한 줄(입력, 처리 경로, 처리 시간, 토큰 사용량)을 덧붙여 기록합니다.
+
+    요청 처리 중에는 메모리 대기열에 항목을 넣기만 하고, JSON 변환과 파일 쓰기는 백그라운드 스레드가
+    batch_size개 또는 flush_interval초마다 한 번에 합니다. 디스크가 느려 대기열이 max_pending을 넘으면
+    요청을 막지 않고 새 항목을 버리며 dropped로 셉니다.
+    파일이 max_bytes를 넘으면 path.1, path.2, ... 로 밀어내고 backups개까지 보관합니다.
+    path의 '{pid}'는 프로세스 번호로 바뀌므로 여러 워커가 각자의 파일에 씁니다.
+    """
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024, backups: int = 5, batch_size: int = 256,
+                 flush_interval: float = 1.0, max_pending: int = 10000):
+        """
+        :param path: 기록할 파일 경로 ('{pid}'를 넣으면 프로세스별 파일)
+        :param max_bytes: 파일 하나의 최대 크기 (바이트, 0이면 나누지 않음)
+        :param backups: 보관할 이전 파일 수
+        :param batch_size: 이만큼 쌓이면 주기를 기다리지 않고 기록
+        :param flush_interval: 기록 주기 (초)
+        :param max_pending: 기록을 기다리는 최대 항목 수 (넘으면 버림)
+        """
+        self.path_template = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = deque()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._thread = None
+        self._file = None
+        self.path = None
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+        self.errors = 0
+        atexit.register(self.close)
+
+    def _ensure_writer(self):
+        """이 프로세스의 기록 스레드를 시작합니다. fork된 자식은 부모의 대기열과 파일을 버리고 새로 시작합니다."""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pending = deque()
+            self._file = None
+            self.path = self.path_template.replace('{pid}', str(pid))
+            self._thread = threading.Thread(target=self._run, name='request-journal', daemon=True)
+            self._pid = pid
+            self._thread.start()
+
+    def record(self, entry: dict):
+        """항목을 기록 대기열에 넣습니다 (디스크를 기다리지 않음)."""
+        self._ensure_writer()
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending.append(entry)
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    def record_trace(self, trace, total: float):
+        """끝난 RequestTrace 하나를 기록합니다."""
+        fields = trace.fields
+        self.record({
+            'ts': round(trace.started_at, 3),
+            'endpoint': trace.endpoint,
+            'scene': fields.get('scene'),
+            'step': fields.get('step'),
+            'count': fields.get('count'),
+            'text_message': fields.get('text_message'),
+            'session_id': fields.get('session_id'),
+            'path': trace.path or 'none',
+            'latency_ms': round(total * 1000, 2),
+            'llm_calls': trace.llm_calls,
+            'tokens': dict(zip(('prompt', 'completion', 'cached'), trace.tokens)),
+        })
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._write_pending()
+
+    def _write_pending(self):
+        with self._lock:
+            lines = []
+            while self._pending:
+                lines.append(json.dumps(self._pending.popleft(), ensure_ascii=False, separators=(',', ':')))
+            if not lines:
+                return
+            data = ('\n'.join(lines) + '\n').encode('utf-8')
+            try:
+                if self._file is None:
+                    self._open()
+                if self.max_bytes and self._file.tell() and self._file.tell() + len(data) > self.max_bytes:
+                    self._rotate()
+                self._file.write(data)
+                self._file.flush()
+                self.written += len(lines)
+            except OSError as e:
+                self.errors += 1
+                self.dropped += len(lines)
+                print(f"요청 기록 실패 ({self.path}): {e}")
+                self._file = None
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'ab')
+
+    def _rotate(self):
+        """path -> path.1 -> path.2 ... 로 밀어내고 새 파일을 엽니다."""
+        self._file.close()
+        self._file = None
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{index}"):
+                os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+        self._open()
+
+    def flush(self):
+        """대기 중인 항목을 바로 기록합니다."""
+        if self._pid == os.getpid():
+            self._write_pending()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self) -> dict:
+        return {
+            'path': self.path or self.path_template,
+            'pending': len(self._pending),
+            'written': self.written,
+            'dropped': self.dropped,
+            'rotations': self.rotations,
+            'errors': self.errors,
+        }
+
+
+def journal_files(pattern: str) -> list:
+    """
+    기록 파일 목록. 나눠진 이전 파일(path.N)도 포함합니다.
+    :param pattern: 파일 경로 또는 glob 패턴 (예: './logs/hint_requests.*.jsonl')
+    """
+    files = set()
+    for path in glob.glob(pattern):
+        files.add(path)
+        files.update(glob.glob(glob.escape(path) + '.[0-9]*'))
+    return sorted(path for path in files if os.path.isfile(path))
+
+
+def read_journal(patterns) -> list:
+    """
+    기록 파일들의 항목을 요청 시각 순으로 읽습니다. 깨진 줄(기록 도중 종료 등)은 건너뜁니다.
+    :param patterns: 파일 경로 또는 glob 패턴 목록
+    """
+    entries = []
+    for path in sorted({path for pattern in patterns for path in journal_files(pattern)}):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+    entries.sort(key=lambda entry: entry.get('ts', 0))
+    return entries
@@ -0,0 +1,243 @@
+import argparse
+import json
+import math
+import random
+import threading
+import time
+
+import requests
+
+# API 서버의 기본 URL
+BASE_URL = "http://127.0.0.1:14724"
+
+# 기본 질문 코퍼스 (--questions로 파일을 지정하면 대체됨)
+DEFAULT_QUESTIONS = [
+    "여기서 어떻게 해야 하나요?",
+    "다음 뭐해야대?",
+    "다음엔 뭐 해야 돼?",
+    "어디 있어요?",
+    "어디에 있나요",
+    "PPE 보관함은 어떻게 생겼어?",
+    "ESD가 어디야",
+    "밸브는 어디에 있어요?",
+    "장비함 위치 알려줘",
+    "탈출구는 어디에 있나요?",
+]
+
+ENDPOINTS = ('default', 'question', 'default_stream', 'question_stream', 'batch')
+
+
+def parse_mix(text: str) -> dict:
+    """'default=4,question=6' 형식의 요청 비율을 {엔드포인트: 가중치}로 변환합니다."""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"알 수 없는 엔드포인트: {name} (가능: {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def parse_int_list(text: str) -> list:
+    """'0-6' 또는 '1,2' 형식을 정수 목록으로 변환합니다."""
+    values = []
+    for part in text.split(','):
+        if '-' in part:
+            start, end = part.split('-')
+            values.extend(range(int(start), int(end) + 1))
+        else:
+            values.append(int(part))
+    return values
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """정렬된 값에서 q(0~100) 백분위수를 최근접 순위 방식으로 구합니다."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    """요청 기록 목록을 지연 시간 백분위수, 처리량, 오류율로 요약합니다."""
+    latencies = sorted(sample['latency'] for sample in samples if sample['ok'])
+    errors = sum(1 for sample in samples if not sample['ok'])
+    summary = {
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': errors / len(samples) if samples else 0.0,
+        'throughput_rps': len(samples) / elapsed if elapsed else 0.0,
+        'latency_ms': {
+            'p50': percentile(latencies, 50) * 1000,
+            'p95': percentile(latencies, 95) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+            'mean': sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            'max': latencies[-1] * 1000 if latencies else 0.0,
+        },
+    }
+    first_bytes = sorted(sample['first_byte'] for sample in samples if sample['ok'] and sample.get('first_byte'))
+    if first_bytes:
+        summary['first_byte_ms'] = {
+            'p50': percentile(first_bytes, 50) * 1000,
+            'p95': percentile(first_bytes, 95) * 1000,
+            'p99': percentile(first_bytes, 99) * 1000,
+        }
+    return summary
+
+
+class LoadGenerator:
+    """
+    여러 스레드가 지정한 시간 동안 요청 비율에 따라 힌트 API를 호출하고 결과를 기록합니다.
+    """
+    def __init__(self, base_url: str, mix: dict, scenes: list, steps: list, counts: list, questions: list,
+                 batch_size: int = 8, timeout: float = 30.0, seed: int = None):
+        self.base_url = base_url.rstrip('/')
+        self.endpoints = list(mix)
+        self.weights = [mix[name] for name in self.endpoints]
+        self.scenes = scenes
+        self.steps = steps
+        self.counts = counts
+        self.questions = questions
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.seed = seed
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def _question_params(self, rng):
+        return {
+            'scene': rng.choice(self.scenes),
+            'step': rng.choice(self.steps),
+            'count': rng.choice(self.counts),
+            'text_message': rng.choice(self.questions),
+        }
+
+    def _default_params(self, rng):
+        return {'scene': rng.choice(self.scenes), 'step': rng.choice(self.steps)}
+
+    def _request_once(self, session, rng) -> dict:
+        endpoint = rng.choices(self.endpoints, weights=self.weights)[0]
+        sample = {'endpoint': endpoint, 'ok': False, 'first_byte': None}
+        start_time = time.perf_counter()
+        try:
+            if endpoint == 'batch':
+                items = []
+                for _ in range(self.batch_size):
+                    if rng.random() < 0.5:
+                        items.append({'type': 'default', **self._default_params(rng)})
+                    else:
+                        items.append({'type': 'question', **self._question_params(rng)})
+                response = session.post(f"{self.base_url}/hint/batch", json={'items': items}, timeout=self.timeout)
+                sample['ok'] = response.status_code == 200 and all('hint' in r for r in response.json()['results'])
+            elif endpoint.endswith('_stream'):
+                kind = endpoint[:-len('_stream')]
+                params = self._question_params(rng) if kind == 'question' else self._default_params(rng)
+                with session.post(f"{self.base_url}/hint/{kind}/stream", json=params, stream=True, timeout=self.timeout) as response:
+                    for line in response.iter_lines():
+                        if line and sample['first_byte'] is None:
+                            sample['first_byte'] = time.perf_counter() - start_time
+                    sample['ok'] = response.status_code == 200
+            else:
+                params = self._question_params(rng) if endpoint == 'question' else self._default_params(rng)
+                response = session.post(f"{self.base_url}/hint/{endpoint}", json=params, timeout=self.timeout)
+                sample['ok'] = response.status_code == 200 and not response.text.startswith('(시스템)')
+            sample['status'] = response.status_code
+        except requests.RequestException as e:
+            sample['error'] = type(e).__name__
+        sample['latency'] = time.perf_counter() - start_time
+        return sample
+
+    def _worker(self, worker_id: int, deadline: float):
+        rng = random.Random(None if self.seed is None else self.seed + worker_id)
+        samples = []
+        with requests.Session() as session:
+            while time.perf_counter() < deadline:
+                samples.append(self._request_once(session, rng))
+        with self._lock:
+            self.samples.extend(samples)
+
+    def run(self, concurrency: int, duration: float) -> float:
+        """
+        :return: 실제로 걸린 시간 (초)
+        """
+        start_time = time.perf_counter()
+        deadline = start_time + duration
+        threads = [threading.Thread(target=self._worker, args=(i, deadline)) for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="힌트 API 동시 부하 테스트 (지연 시간 백분위수, 처리량, 오류율을 JSON으로 출력)")
+    parser.add_argument('--url', default=BASE_URL, help="API 서버 주소")
+    parser.add_argument('--concurrency', type=int, default=30, help="동시 사용자(헤드셋) 수")
+    parser.add_argument('--duration', type=float, default=30.0, help="측정 시간 (초)")
+    parser.add_argument('--mix', default='default=4,question=6', help=f"요청 비율 (가능: {', '.join(ENDPOINTS)})")
+    parser.add_argument('--scenes', default='ca2,cb2')
+    parser.add_argument('--steps', default='0-6', help="요청할 단계 (API 입력 기준, 0부터)")
+    parser.add_argument('--counts', default='1,2')
+    parser.add_argument('--questions', help="질문 코퍼스 파일 (한 줄에 하나)")
+    parser.add_argument('--batch-size', type=int, default=8, help="batch 요청 한 번에 담을 항목 수")
+    parser.add_argument('--seed', type=int, help="요청 순서를 재현하기 위한 난수 시드")
+    parser.add_argument('--label', default='', help="결과에 함께 기록할 실행 이름")
+    parser.add_argument('--output', help="결과 JSON을 저장할 파일 (생략 시 표준 출력)")
+    args = parser.parse_args()
+
+    questions = DEFAULT_QUESTIONS
+    if args.questions:
+        with open(args.questions, encoding='utf-8') as f:
+            questions = [line.strip() for line in f if line.strip()]
+
+    generator = LoadGenerator(
+        base_url=args.url,
+        mix=parse_mix(args.mix),
+        scenes=args.scenes.split(','),
+        steps=parse_int_list(args.steps),
+        counts=parse_int_list(args.counts),
+        questions=questions,
+        batch_size=args.batch_size,
+        seed=args.seed,
+    )
+    elapsed = generator.run(args.concurrency, args.duration)
+
+    by_endpoint = {}
+    for sample in generator.samples:
+        by_endpoint.setdefault(sample['endpoint'], []).append(sample)
+    report = {
+        'label': args.label,
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'config': {
+            'url': args.url,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'mix': args.mix,
+            'scenes': args.scenes,
+            'steps': args.steps,
+            'counts': args.counts,
+            'questions': len(questions),
+        },
+        'overall': summarize(generator.samples, elapsed),
+        'endpoints': {name: summarize(samples, elapsed) for name, samples in sorted(by_endpoint.items())},
+    }
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f"결과 저장: {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
+
+"""
+python mock_openai.py --latency 1.0 &
+OPENAI_BASE_URL=http://127.0.0.1:18080/v1 OPENAI_API_KEY=mock python api.py &
+python loadtest.py --concurrency 30 --duration 30 --output bench_output.json
+"""
@@ -0,0 +1,312 @@
+import contextvars
+import json
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+
+# 처리 시간 히스토그램 구간 (초). 힌트 조회 같은 마이크로초 단위부터 OpenAI 호출의 수 초까지 포함
+DURATION_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """레이블 조합별로 누적되는 값 (Prometheus counter)."""
+    def __init__(self, name: str, help_text: str, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for labels, value in items:
+            lines.append(f'{self.name}{_format_labels(self.label_names, labels)} {_format_number(value)}')
+        return lines
+
+
+class Histogram:
+    """레이블 조합별 관측값 분포 (Prometheus histogram). 구간별 개수는 출력할 때 누적합으로 변환합니다."""
+    def __init__(self, name: str, help_text: str, label_names=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # 레이블 -> [구간별 개수 (마지막은 +Inf), 합계]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound!r}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.label_names, labels)} {_format_number(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """/metrics에 노출할 지표 목록."""
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, help_text: str, label_names=()) -> Counter:
+        metric = Counter(name, help_text, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, label_names=(), buckets=DURATION_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus 텍스트 형식(0.0.4)으로 모든 지표를 출력합니다."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+REQUEST_SECONDS = REGISTRY.histogram(
+    'npc_request_duration_seconds', '힌트 요청 전체 처리 시간 (초)',
+    ('endpoint', 'scene', 'step', 'path'),
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    'npc_stage_duration_seconds', '힌트 요청의 단계별 처리 시간 (초)',
+    ('endpoint', 'scene', 'step', 'path', 'stage'),
+)
+LLM_CALLS = REGISTRY.counter(
+    'npc_llm_calls_total', '응답을 받은 OpenAI 호출 수 (요청 밖의 풀 보충은 endpoint="background")',
+    ('endpoint', 'scene', 'step'),
+)
+LLM_TOKENS = REGISTRY.counter(
+    'npc_llm_tokens_total', 'OpenAI 토큰 사용량 (type: prompt, completion, cached)',
+    ('endpoint', 'scene', 'step', 'type'),
+)
+INTENT_ROUTES = REGISTRY.counter(
+    'npc_intent_route_total', '질문 힌트 중 미리 만든 답변으로 바로 답한 수(routed)와 캐시/LLM 경로로 넘긴 수(llm)',
+    ('scene', 'result'),
+)
+LLM_QUEUE = REGISTRY.counter(
+    'npc_llm_queue_total', 'OpenAI 호출 대기열을 통과한 수(admitted)와 기한 안에 차례가 오지 않아 포기한 수(shed)',
+    ('priority', 'result'),
+)
+HINT_PREFETCH = REGISTRY.counter(
+    'npc_hint_prefetch_total', '다음 단계 기본 힌트를 미리 생성하도록 예약한 수(scheduled), 이미 생성 중(pending)이거나 풀에 있던(ready) 수',
+    ('scene', 'result'),
+)
+
+_current_trace = contextvars.ContextVar('npc_request_trace', default=None)
+
+
+class SlowRequestLog:
+    """
+    처리 시간이 임계값을 넘은 요청 중 일부를 단계별 시간과 함께 로그로 남깁니다.
+    """
+    def __init__(self, threshold: float = 0.0, sample_rate: float = 1.0):
+        """
+        :param threshold: 느린 요청으로 볼 처리 시간 (초, 0이면 기록하지 않음)
+        :param sample_rate: 느린 요청 중 실제로 기록할 비율 (0~1)
+        """
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+
+    def maybe_log(self, trace, total: float):
+        if not self.threshold or total < self.threshold or random.random() >= self.sample_rate:
+            return
+        record = {
+            'endpoint': trace.endpoint,
+            'scene': trace.scene,
+            'step': trace.step,
+            'path': trace.path or 'none',
+            'total_ms': round(total * 1000, 1),
+            'stages_ms': [[name, round(seconds * 1000, 2)] for name, seconds in trace.stages],
+        }
+        print(f"느린 요청: {json.dumps(record, ensure_ascii=False)}")
+
+
+slow_request_log = SlowRequestLog()
+# 끝난 요청마다 record_trace(trace, total)를 호출할 요청 기록 (journal.RequestJournal, None이면 기록하지 않음)
+_request_journal = None
+
+
+def configure_slow_log(threshold: float, sample_rate: float = 1.0):
+    """느린 요청 로그를 설정합니다. threshold는 초 단위이며 0이면 기록하지 않습니다."""
+    slow_request_log.threshold = threshold
+    slow_request_log.sample_rate = sample_rate
+
+
+def configure_journal(journal):
+    """끝난 힌트 요청을 기록할 RequestJournal을 설정합니다 (None이면 기록하지 않음)."""
+    global _request_journal
+    _request_journal = journal
+
+
+class RequestTrace:
+    """
+    힌트 요청 하나의 단계별 소요 시간과 처리 경로를 기록합니다.
+    activate()로 현재 컨텍스트에 등록하면 stage_timer, set_request_path, record_llm_call이 이 요청에 기록되며,
+    finish()에서 히스토그램에 한 번에 반영합니다.
+
+    path: 응답을 만든 경로 (pool, routed, cache, llm, stream, fallback, throttled, error, coalesced, message, raw)
+    fields: 요청 기록에 남길 입력값 (annotate_request로 추가)
+    """
+    __slots__ = ('endpoint', 'scene', 'step', 'path', 'stages', 'streaming', 'start_time', 'started_at', 'fields',
+                 'llm_calls', 'tokens', '_token', '_finished')
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.scene = ''
+        self.step = ''
+        self.path = ''
+        self.stages = []
+        # 스트리밍 응답은 본문을 다 보낸 뒤에 finish()하도록 표시
+        self.streaming = False
+        self.start_time = time.perf_counter()
+        self.started_at = time.time()
+        self.fields = {}
+        self.llm_calls = 0
+        # [prompt, completion, cached]
+        self.tokens = [0, 0, 0]
+        self._token = None
+        self._finished = False
+
+    def label(self, scene: str, step: int):
+        self.scene = str(scene)
+        self.step = str(step)
+
+    def mark(self, name: str):
+        """요청 시작부터 지금까지의 시간을 단계 하나로 기록합니다 (예: 첫 구절 전송 시점)."""
+        self.stages.append((name, time.perf_counter() - self.start_time))
+
+    def activate(self):
+        self._token = _current_trace.set(self)
+        return self
+
+    def finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        total = time.perf_counter() - self.start_time
+        if self._token is not None:
+            try:
+                _current_trace.reset(self._token)
+            except ValueError:
+                # 다른 컨텍스트(스트리밍 본문 전송 등)에서 끝나는 경우
+                _current_trace.set(None)
+        labels = (self.endpoint, self.scene, self.step, self.path or 'none')
+        REQUEST_SECONDS.observe(labels, total)
+        for name, seconds in self.stages:
+            STAGE_SECONDS.observe(labels + (name,), seconds)
+        slow_request_log.maybe_log(self, total)
+        if _request_journal is not None:
+            _request_journal.record_trace(self, total)
+
+    def __enter__(self):
+        return self.activate()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and not self.path:
+            self.path = 'exception'
+        self.finish()
+        return False
+
+
+def current_trace():
+    """현재 컨텍스트에서 처리 중인 요청의 RequestTrace (없으면 None)."""
+    return _current_trace.get()
+
+
+@contextmanager
+def stage_timer(name: str):
+    """현재 요청의 단계 하나를 시간 측정합니다. 요청 밖(백그라운드 작업 등)에서는 아무것도 하지 않습니다."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.stages.append((name, time.perf_counter() - start_time))
+
+
+def label_request(scene: str, step: int):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.label(scene, step)
+
+
+def annotate_request(**fields):
+    """현재 요청의 입력값(count, text_message 등)을 요청 기록에 남깁니다."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.fields.update(fields)
+
+
+def set_request_path(path: str, overwrite: bool = True):
+    """현재 요청이 응답을 만든 경로를 기록합니다. overwrite=False면 아직 정해지지 않은 경우에만 기록합니다."""
+    trace = _current_trace.get()
+    if trace is not None and (overwrite or not trace.path):
+        trace.path = path
+
+
+def record_llm_call(usage):
+    """OpenAI 응답 하나의 토큰 사용량을 현재 요청의 레이블로 누적합니다."""
+    trace = _current_trace.get()
+    labels = (trace.endpoint, trace.scene, trace.step) if trace is not None else ('background', '', '')
+    LLM_CALLS.inc(labels)
+    if trace is not None:
+        trace.llm_calls += 1
+    if usage is None:
+        return
+    LLM_TOKENS.inc(labels + ('prompt',), usage.prompt_tokens or 0)
+    LLM_TOKENS.inc(labels + ('completion',), usage.completion_tokens or 0)
+    details = getattr(usage, 'prompt_tokens_details', None)
+    cached = getattr(details, 'cached_tokens', None)
+    if cached:
+        LLM_TOKENS.inc(labels + ('cached',), cached)
+    if trace is not None:
+        trace.tokens[0] += usage.prompt_tokens or 0
+        trace.tokens[1] += usage.completion_tokens or 0
+        trace.tokens[2] += cached or 0
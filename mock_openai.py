@@ -0,0 +1,181 @@
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# 모의 응답에 사용할 NPC 문장들
+MOCK_LINES = [
+    "PPE 보관함으로 가서 보호복을 먼저 착용해 주세요.",
+    "전광판을 등지고 오른쪽으로 돌아가면 ESD가 보여요. 비상가동중지 버튼을 눌러 주세요.",
+    "누출 위치로 이동해서 오른손목 버튼을 누르고 누출 보고를 해 주세요.",
+    "파란 라인의 질소 밸브와 빨간 라인의 염소 밸브를 차례로 잠가 주세요.",
+    "장비함으로 가서 필요한 장비를 소지품에 넣어 주세요.",
+]
+
+
+class MockSettings:
+    """모의 서버 동작 설정 (명령줄 인자로 지정)."""
+    latency = 0.8
+    jitter = 0.3
+    token_interval = 0.02
+    error_rate = 0.0
+    # 분당 요청 수 한도 (0이면 제한 없음). 넘으면 OpenAI처럼 Retry-After와 함께 429를 돌려줌
+    rpm = 0
+
+
+class RequestWindow:
+    """최근 60초 동안 받은 요청 시각 (분당 요청 수 한도 흉내)."""
+    def __init__(self):
+        self._times = deque()
+        self._lock = threading.Lock()
+
+    def admit(self, limit: int):
+        """
+        :return: 한도 안이면 None, 넘었으면 다시 시도할 수 있을 때까지의 시간 (초)
+        """
+        now = time.monotonic()
+        with self._lock:
+            while self._times and self._times[0] <= now - 60:
+                self._times.popleft()
+            if len(self._times) >= limit:
+                return self._times[0] + 60 - now
+            self._times.append(now)
+        return None
+
+
+request_window = RequestWindow()
+
+
+def estimate_tokens(text: str) -> int:
+    """대략적인 토큰 수 (한글은 글자당 약 1토큰으로 계산)."""
+    return max(1, len(text))
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    """
+    OpenAI Chat Completions API(/v1/chat/completions)를 흉내 내는 핸들러.
+    설정된 지연 시간 뒤에 고정 문장 중 하나를 돌려주며, stream=true면 SSE로 나눠서 보냅니다.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': f'unknown path {self.path}'}})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        messages = body.get('messages', [])
+        prompt_tokens = sum(estimate_tokens(message.get('content', '')) for message in messages)
+
+        if MockSettings.rpm:
+            wait = request_window.admit(MockSettings.rpm)
+            if wait is not None:
+                self._send_json(429, {'error': {'message': 'Rate limit reached for requests (mock)',
+                                                'type': 'requests', 'code': 'rate_limit_exceeded'}},
+                                headers={'retry-after-ms': str(int(wait * 1000))})
+                return
+
+        delay = max(0.0, random.gauss(MockSettings.latency, MockSettings.jitter))
+        time.sleep(delay)
+
+        if random.random() < MockSettings.error_rate:
+            self._send_json(429, {'error': {'message': 'Rate limit reached (mock)', 'type': 'rate_limit_error'}})
+            return
+
+        text = random.choice(MOCK_LINES)
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+        usage = {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': estimate_tokens(text),
+            'total_tokens': prompt_tokens + estimate_tokens(text),
+        }
+
+        if body.get('stream'):
+            self._stream(completion_id, body.get('model', 'mock'), text, usage)
+            return
+
+        self._send_json(200, {
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'mock'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': text},
+                'finish_reason': 'stop',
+            }],
+            'usage': usage,
+        })
+
+    def _stream(self, completion_id: str, model: str, text: str, usage: dict):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+
+        def send(payload):
+            self.wfile.write(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        base = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': model}
+        for i in range(0, len(text), 3):
+            send({**base, 'choices': [{'index': 0, 'delta': {'content': text[i:i + 3]}, 'finish_reason': None}]})
+            time.sleep(MockSettings.token_interval)
+        send({**base, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}], 'usage': usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 부하 테스트용 OpenAI 호환 모의 서버")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--latency', type=float, default=0.8, help="평균 응답 지연 (초)")
+    parser.add_argument('--jitter', type=float, default=0.3, help="응답 지연의 표준편차 (초)")
+    parser.add_argument('--token-interval', type=float, default=0.02, help="스트리밍 시 조각 사이 간격 (초)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="429 오류를 돌려줄 확률 (0~1)")
+    parser.add_argument('--rpm', type=int, default=0, help="분당 요청 수 한도 (넘으면 Retry-After와 함께 429, 0이면 제한 없음)")
+    args = parser.parse_args()
+
+    MockSettings.latency = args.latency
+    MockSettings.jitter = args.jitter
+    MockSettings.token_interval = args.token_interval
+    MockSettings.error_rate = args.error_rate
+    MockSettings.rpm = args.rpm
+
+    server = ThreadingHTTPServer((args.host, args.port), MockOpenAIHandler)
+    server.daemon_threads = True
+    print(f"모의 OpenAI 서버 실행 중: http://{args.host}:{args.port}/v1 (지연 {args.latency}±{args.jitter}초)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
+
+"""
+python mock_openai.py --latency 1.0 --jitter 0.3
+OPENAI_BASE_URL=http://127.0.0.1:18080/v1 OPENAI_API_KEY=mock python api.py
+"""
@@ -0,0 +1,280 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+from metrics import LLM_QUEUE
+from upstream import DeadlineExceeded
+
+
+# 대기열 우선순위 (작을수록 먼저). 질문 힌트 -> 기본 힌트 -> 풀 채우기 같은 백그라운드 생성 순
+PRIORITIES = {'question': 0, 'default': 1, 'background': 2}
+# 응답을 받기 전에 출력 토큰으로 미리 잡아 둘 값 (응답의 실제 사용량으로 차이를 정산)
+COMPLETION_TOKEN_ESTIMATE = 150
+# 429 응답에 Retry-After가 없을 때 모든 호출을 멈출 시간 (초)
+DEFAULT_RATE_LIMIT_PAUSE = 1.0
+# 차례를 기다리는 동안 앞 요청이 빠졌는지 다시 확인하는 최대 간격 (초)
+IDLE_WAIT = 0.05
+
+
+class QueueDeadline(DeadlineExceeded):
+    """대기열에서 차례를 기다리면 응답 시간 예산을 넘길 것으로 보여 호출을 포기했을 때 발생합니다."""
+
+
+def estimate_tokens(messages, completion_tokens: int = COMPLETION_TOKEN_ESTIMATE) -> int:
+    """요청 하나가 쓸 토큰 수를 어림합니다 (한글은 글자당 약 1토큰, 메시지마다 형식 토큰 4개)."""
+    return sum(len(message.get('content') or '') + 4 for message in messages) + completion_tokens
+
+
+def retry_after(error):
+    """429 오류 응답의 Retry-After(-ms) 헤더 값 (초). 없으면 None."""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    for name, scale in (('retry-after-ms', 0.001), ('retry-after', 1.0)):
+        try:
+            return float(headers[name]) * scale
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+class TokenBucket:
+    """분당 per_minute만큼 채워지고 burst초 분량까지 쌓이는 토큰 버킷. per_minute가 0이면 제한하지 않습니다."""
+    __slots__ = ('per_minute', 'rate', 'capacity', 'level', 'updated')
+
+    def __init__(self, per_minute: float, burst: float = 10.0):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * burst)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        if self.rate:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def clamp(self, amount: float) -> float:
+        """한 번에 차감할 양은 버킷 크기를 넘지 않도록 자릅니다 (넘으면 영원히 통과하지 못함)."""
+        return min(amount, self.capacity) if self.rate else amount
+
+    def wait_time(self, amount: float) -> float:
+        """amount가 모일 때까지 걸리는 시간 (초)."""
+        if not self.rate or amount <= self.level:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        if self.rate:
+            self.level -= amount
+
+    def give(self, amount: float):
+        """미리 차감한 양과 실제 사용량의 차이를 정산합니다 (음수면 더 차감)."""
+        if self.rate:
+            self.level = min(self.capacity, self.level + amount)
+
+    def drain(self):
+        if self.rate:
+            self.level = min(self.level, 0.0)
+
+
+class _Waiter:
+    """대기열의 요청 하나. wake는 앞 요청이 빠졌을 때 이 요청을 깨우는 함수입니다."""
+    __slots__ = ('priority', 'rank', 'seq', 'cost', 'wake')
+
+    def __init__(self, priority: str, seq: int, cost: float, wake):
+        self.priority = priority
+        self.rank = PRIORITIES[priority]
+        self.seq = seq
+        self.cost = cost
+        self.wake = wake
+
+    def __lt__(self, other):
+        return (self.rank, self.seq) < (other.rank, other.seq)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class RateLimiter:
+    """
+    OpenAI 호출 앞에서 분당 요청 수와 분당 토큰 수를 함께 제한하는 토큰 버킷과 우선순위 대기열.
+
+    호출은 우선순위(PRIORITIES) 순, 같은 우선순위 안에서는 도착 순으로 통과합니다.
+    기한(deadline)이 있는 호출은 앞에 선 호출들이 쓸 양으로 차례가 올 시각을 계산해, 기한을 넘길 것으로 보이면
+    기다리지 않고 바로 QueueDeadline을 던져 대체 응답으로 넘어가게 합니다. 한도에 걸리면 모든 요청이 한꺼번에
+    실패하는 대신 우선순위가 낮고 기한이 급한 요청부터 대체 응답으로 빠집니다.
+    OpenAI가 429를 돌려주면 penalize()로 Retry-After 동안 모든 호출을 멈추고 버킷을 비웁니다.
+
+    동기 서버의 스레드(acquire)와 비동기 서버의 코루틴(acquire_async)이 같은 대기열을 함께 씁니다.
+    """
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0, burst: float = 10.0,
+                 max_pause: float = 30.0):
+        """
+        :param requests_per_minute: 분당 최대 호출 수 (0이면 제한하지 않음)
+        :param tokens_per_minute: 분당 최대 토큰 수 (0이면 제한하지 않음)
+        :param burst: 쉬고 있다가 한꺼번에 보낼 수 있는 양 (초 단위 분량)
+        :param max_pause: 429 응답 하나로 멈출 최대 시간 (초)
+        """
+        self.requests = TokenBucket(requests_per_minute, burst)
+        self.tokens = TokenBucket(tokens_per_minute, burst)
+        self.max_pause = max_pause
+        self._lock = threading.Lock()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self.admitted = dict.fromkeys(PRIORITIES, 0)
+        self.shed = dict.fromkeys(PRIORITIES, 0)
+        self.rate_limited = 0
+
+    def _enqueue(self, tokens: float, priority: str, wake) -> _Waiter:
+        waiter = _Waiter(priority, next(self._seq), self.tokens.clamp(tokens), wake)
+        heapq.heappush(self._waiters, waiter)
+        return waiter
+
+    def _discard(self, waiter: _Waiter):
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+            heapq.heapify(self._waiters)
+            self._wake_head()
+
+    def _wake_head(self):
+        if self._waiters:
+            self._waiters[0].wake()
+
+    def _expected_wait(self, waiter: _Waiter, now: float) -> float:
+        """앞에 선 요청들이 모두 통과한 뒤 이 요청이 통과할 수 있을 때까지의 시간 (초)."""
+        ahead = [other for other in self._waiters if other < waiter]
+        return max(
+            self._paused_until - now,
+            self.requests.wait_time(len(ahead) + 1),
+            self.tokens.wait_time(sum(other.cost for other in ahead) + waiter.cost),
+        )
+
+    def _poll(self, waiter: _Waiter, deadline):
+        """
+        대기 중인 요청의 차례를 확인합니다 (잠금 안에서 호출).
+        :return: 통과했으면 None, 아니면 다시 확인할 때까지 기다릴 시간 (초)
+        :raises QueueDeadline: 기한 안에 차례가 오지 않을 것으로 보일 때
+        """
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        wait = self._expected_wait(waiter, now)
+        if wait <= 0 and self._waiters[0] is waiter:
+            heapq.heappop(self._waiters)
+            self.requests.take(1)
+            self.tokens.take(waiter.cost)
+            self.admitted[waiter.priority] += 1
+            LLM_QUEUE.inc((waiter.priority, 'admitted'))
+            self._wake_head()
+            return None
+        if deadline is not None and now + wait > deadline:
+            self.shed[waiter.priority] += 1
+            LLM_QUEUE.inc((waiter.priority, 'shed'))
+            raise QueueDeadline(f"OpenAI 호출 대기 {wait:.1f}초 예상 (대기 {len(self._waiters)}건)")
+        # 이미 통과할 수 있지만 앞 요청이 먼저 나가야 하는 경우는 앞 요청이 깨워 줄 때까지 기다림
+        return wait if wait > 0 else IDLE_WAIT
+
+    def acquire(self, tokens: float, priority: str = 'default', deadline: float = None) -> float:
+        """
+        차례가 될 때까지 기다렸다가 호출 1개와 토큰을 차감합니다.
+        :param tokens: 이 호출이 쓸 것으로 어림한 토큰 수 (estimate_tokens)
+        :param priority: 'question', 'default', 'background'
+        :param deadline: time.monotonic() 기준으로 이 시각까지 통과하지 못할 것 같으면 포기 (None이면 끝까지 기다림)
+        :return: 차감한 토큰 수 (응답을 받은 뒤 settle에 넘김)
+        :raises QueueDeadline: 기한 안에 차례가 오지 않을 것으로 보일 때
+        """
+        event = threading.Event()
+        with self._lock:
+            waiter = self._enqueue(tokens, priority, event.set)
+        try:
+            while True:
+                event.clear()
+                with self._lock:
+                    wait = self._poll(waiter, deadline)
+                if wait is None:
+                    return waiter.cost
+                event.wait(wait)
+        except BaseException:
+            with self._lock:
+                self._discard(waiter)
+            raise
+
+    async def acquire_async(self, tokens: float, priority: str = 'default', deadline: float = None) -> float:
+        """acquire의 비동기 버전. 기다리는 동안 이벤트 루프를 막지 않습니다."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            waiter = self._enqueue(tokens, priority, None)
+        try:
+            while True:
+                future = loop.create_future()
+                with self._lock:
+                    # 다른 스레드에서 깨울 수도 있으므로 이벤트 루프를 통해 결과를 설정
+                    waiter.wake = lambda: loop.call_soon_threadsafe(_resolve, future)
+                    wait = self._poll(waiter, deadline)
+                if wait is None:
+                    return waiter.cost
+                await asyncio.wait((future,), timeout=wait)
+        except BaseException:
+            with self._lock:
+                self._discard(waiter)
+            raise
+
+    def try_acquire(self, tokens: float) -> bool:
+        """
+        기다리는 요청이 없고 바로 통과할 수 있을 때만 차감합니다 (응답 시간 예산 안에서 보내는 두 번째 호출용).
+        :return: 차감했는지 여부
+        """
+        with self._lock:
+            if self._waiters:
+                return False
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            cost = self.tokens.clamp(tokens)
+            if self._paused_until > now or self.requests.wait_time(1) or self.tokens.wait_time(cost):
+                return False
+            self.requests.take(1)
+            self.tokens.take(cost)
+            return True
+
+    def settle(self, reserved: float, usage):
+        """응답의 실제 토큰 사용량과 미리 차감한 양의 차이를 정산합니다."""
+        total = getattr(usage, 'total_tokens', None)
+        if total is None or not self.tokens.rate:
+            return
+        with self._lock:
+            self.tokens.give(reserved - total)
+            self._wake_head()
+
+    def penalize(self, pause: float = None):
+        """
+        OpenAI가 429를 돌려주었을 때 호출합니다. pause초(Retry-After) 동안 모든 호출을 멈추고 버킷을 비우며,
+        기다리던 요청을 모두 깨워 그동안 기한을 넘길 요청은 바로 대체 응답으로 넘어가게 합니다.
+        """
+        pause = min(pause if pause is not None else DEFAULT_RATE_LIMIT_PAUSE, self.max_pause)
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            self.requests.drain()
+            self.tokens.drain()
+            self.rate_limited += 1
+            for waiter in self._waiters:
+                waiter.wake()
+
+    def stats(self) -> dict:
+        with self._lock:
+            queued = dict.fromkeys(PRIORITIES, 0)
+            for waiter in self._waiters:
+                queued[waiter.priority] += 1
+            return {
+                'requests_per_minute': self.requests.per_minute,
+                'tokens_per_minute': self.tokens.per_minute,
+                'queued': queued,
+                'admitted': dict(self.admitted),
+                'shed': dict(self.shed),
+                'rate_limited': self.rate_limited,
+                'paused_ms': max(0.0, self._paused_until - time.monotonic()) * 1000,
+            }
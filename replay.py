@@ -0,0 +1,280 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+
+from mock_openai import MockOpenAIHandler, MockSettings
+
+
+class CountingHandler(MockOpenAIHandler):
+    """받은 요청 수를 세는 모의 OpenAI 핸들러 (백그라운드 풀 보충 호출까지 포함한 전체 호출 수)."""
+    calls = 0
+    _lock = threading.Lock()
+
+    def do_POST(self):
+        with CountingHandler._lock:
+            CountingHandler.calls += 1
+        super().do_POST()
+
+
+# api 모듈은 읽는 동안 OpenAI 클라이언트와 NPC를 만들므로, 그 전에 모의 OpenAI 서버의 주소를 정해 두어
+# 실제 OpenAI로 요청이 나가지 않게 합니다 (요청은 start_mock_backend() 이후에 처리).
+# 재생하는 요청이 다시 기록되거나, CSV 감시/풀 채우기 스레드가 뜨거나, 실행 중인 서버의 공유 캐시 파일을 건드리지 않도록 함께 설정
+mock_server = ThreadingHTTPServer(('127.0.0.1', 0), CountingHandler)
+mock_server.daemon_threads = True
+os.environ['OPENAI_BASE_URL'] = f"http://127.0.0.1:{mock_server.server_address[1]}/v1"
+os.environ['OPENAI_API_KEY'] = 'replay'
+os.environ['NPC_JOURNAL_PATH'] = ''
+os.environ['NPC_HINT_RELOAD_INTERVAL'] = '0'
+os.environ['NPC_WARM_POOL_ON_START'] = '0'
+os.environ['NPC_SHARED_CACHE_PATH'] = ''
+
+from api import (COALESCE_REQUESTS, CSV_PATH, DEFAULT_HINT_DEADLINE, DEFAULT_HINT_MODE, DEFAULT_POOL_MAX_AGE,
+                 DEFAULT_POOL_PATH, DEFAULT_POOL_SIZE, HEDGE_PERCENTILE, INTENT_ROUTER_ENABLED, INTENT_THRESHOLD,
+                 PREFETCH_NEXT_STEP, QUESTION_CACHE_ENABLED, QUESTION_CACHE_SIZE, QUESTION_CACHE_THRESHOLD,
+                 QUESTION_CACHE_TTL, QUESTION_HINT_DEADLINE, trainNPC)
+from hint_cache import DefaultHintPool, QuestionCache
+from journal import read_journal
+from loadtest import percentile
+from metrics import RequestTrace
+
+# 기록된 엔드포인트 -> 재생 방법
+ENDPOINT_KINDS = {
+    '/hint/default': 'default',
+    '/hint/batch/default': 'default',
+    '/hint/question': 'question',
+    '/hint/batch/question': 'question',
+    '/hint/default/stream': 'default_stream',
+    '/hint/question/stream': 'question_stream',
+}
+
+# OpenAI를 기다리지 않고 응답한 경로
+HIT_PATHS = ('pool', 'routed', 'cache', 'coalesced')
+
+# --config로 바꿀 수 있는 설정과 값 변환 함수
+CONFIG_KEYS = {
+    'cache': lambda value: value == '1',
+    'cache_threshold': float,
+    'cache_size': int,
+    'router': lambda value: value == '1',
+    'router_threshold': float,
+    'pool': lambda value: value == '1',
+    'pool_size': int,
+    'prefetch': lambda value: value == '1',
+    'coalesce': lambda value: value == '1',
+}
+
+
+def current_settings() -> dict:
+    """환경 변수로 정해진 현재 서버 설정 (--config는 이 값에서 일부만 바꿈)."""
+    return {
+        'cache': QUESTION_CACHE_ENABLED,
+        'cache_threshold': QUESTION_CACHE_THRESHOLD,
+        'cache_size': QUESTION_CACHE_SIZE,
+        'router': INTENT_ROUTER_ENABLED,
+        'router_threshold': INTENT_THRESHOLD,
+        'pool': DEFAULT_HINT_MODE != 'live',
+        'pool_size': DEFAULT_POOL_SIZE,
+        'prefetch': PREFETCH_NEXT_STEP,
+        'coalesce': COALESCE_REQUESTS,
+    }
+
+
+def parse_config(text: str):
+    """
+    'name:key=value,key=value' 형식의 설정을 (이름, 설정)으로 변환합니다. 이름을 생략하면 설정 문자열을 이름으로 씁니다.
+    예: 'strict:cache_threshold=0.85,router=0'
+    """
+    name, _, assignments = text.rpartition(':')
+    settings = current_settings()
+    for part in filter(None, assignments.split(',')):
+        key, _, value = part.partition('=')
+        key = key.strip()
+        if key not in CONFIG_KEYS:
+            raise ValueError(f"알 수 없는 설정: {key} (가능: {', '.join(CONFIG_KEYS)})")
+        settings[key] = CONFIG_KEYS[key](value.strip())
+    return name or assignments or 'current', settings
+
+
+def start_mock_backend(latency: float, jitter: float) -> ThreadingHTTPServer:
+    """api 모듈을 읽기 전에 주소를 정해 둔 모의 OpenAI 서버를 이 프로세스 안에서 띄웁니다."""
+    MockSettings.latency = latency
+    MockSettings.jitter = jitter
+    threading.Thread(target=mock_server.serve_forever, daemon=True).start()
+    return mock_server
+
+
+def build_npc(settings: dict, pool_source: str, workdir: str) -> trainNPC:
+    """
+    설정 하나로 새 NPC를 만듭니다. 기본 힌트 풀은 pool_source의 복사본에서 시작하므로
+    재생 중 보충한 문장이 실제 풀 파일에 저장되지 않고, 설정마다 같은 상태에서 시작합니다.
+    """
+    default_pool = None
+    if settings['pool']:
+        path = os.path.join(workdir, f"pool_{len(os.listdir(workdir))}.json")
+        if pool_source and os.path.exists(pool_source):
+            shutil.copyfile(pool_source, path)
+        default_pool = DefaultHintPool(path, size=settings['pool_size'], max_age=DEFAULT_POOL_MAX_AGE)
+        default_pool.load()
+    question_cache = None
+    if settings['cache']:
+        question_cache = QuestionCache(
+            max_entries=settings['cache_size'],
+            ttl=QUESTION_CACHE_TTL,
+            threshold=settings['cache_threshold'],
+        )
+    return trainNPC(
+        csv_path=CSV_PATH,
+        default_pool=default_pool,
+        question_cache=question_cache,
+        coalesce=settings['coalesce'],
+        deadlines={'default': DEFAULT_HINT_DEADLINE, 'question': QUESTION_HINT_DEADLINE},
+        hedge_percentile=HEDGE_PERCENTILE,
+        intent_router=settings['router'],
+        intent_threshold=settings['router_threshold'],
+        prefetch_next=settings['prefetch'],
+    )
+
+
+def replayable(entry: dict) -> bool:
+    """재생에 필요한 입력이 모두 기록된 항목인지 확인합니다 (잘못된 요청, 번들 요청 등은 제외)."""
+    kind = ENDPOINT_KINDS.get(entry.get('endpoint'))
+    if kind is None or entry.get('scene') is None or entry.get('step') is None:
+        return False
+    if kind.startswith('question'):
+        return bool(entry.get('text_message')) and entry.get('count') is not None
+    return True
+
+
+def replay_entry(npc: trainNPC, entry: dict) -> dict:
+    """기록된 요청 하나를 NPC에 다시 보내고, 서버와 같은 방식으로 처리 경로, 시간, 토큰 사용량을 잽니다."""
+    kind = ENDPOINT_KINDS[entry['endpoint']]
+    scene = entry['scene']
+    step = int(entry['step']) + 1
+    start_time = time.perf_counter()
+    with RequestTrace(entry['endpoint']) as trace:
+        if kind == 'default':
+            npc.get_default_hint(scene, step)
+        elif kind == 'question':
+            npc.get_question_hint(scene, step, int(entry['count']), entry['text_message'])
+        elif kind == 'default_stream':
+            ''.join(npc.stream_default_hint(scene, step))
+        else:
+            ''.join(npc.stream_question_hint(scene, step, int(entry['count']), entry['text_message']))
+    return {
+        'endpoint': entry['endpoint'],
+        'path': trace.path or 'none',
+        'latency_ms': (time.perf_counter() - start_time) * 1000,
+        'llm_calls': trace.llm_calls,
+        'tokens': dict(zip(('prompt', 'completion', 'cached'), trace.tokens)),
+    }
+
+
+def summarize(samples: list) -> dict:
+    """요청 결과(또는 기록 항목) 목록을 처리 경로, 히트율, OpenAI 사용량, 지연 시간 백분위수로 요약합니다."""
+    latencies = sorted(sample['latency_ms'] for sample in samples)
+    paths = Counter(sample['path'] for sample in samples)
+    tokens = Counter()
+    for sample in samples:
+        tokens.update(sample.get('tokens') or {})
+    hits = sum(paths[path] for path in HIT_PATHS)
+    return {
+        'requests': len(samples),
+        'paths': dict(paths.most_common()),
+        'hit_rate': hits / len(samples) if samples else 0.0,
+        'llm_calls': sum(sample.get('llm_calls') or 0 for sample in samples),
+        'tokens': {name: tokens[name] for name in ('prompt', 'completion', 'cached')},
+        'latency_ms': {
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'mean': sum(latencies) / len(latencies) if latencies else 0.0,
+        },
+    }
+
+
+def report(samples: list) -> dict:
+    """전체 요약과 엔드포인트별 요약."""
+    by_endpoint = {}
+    for sample in samples:
+        by_endpoint.setdefault(sample['endpoint'], []).append(sample)
+    summary = summarize(samples)
+    summary['endpoints'] = {endpoint: summarize(items) for endpoint, items in sorted(by_endpoint.items())}
+    return summary
+
+
+def run_config(name: str, settings: dict, entries: list, args, workdir: str) -> dict:
+    npc = build_npc(settings, args.pool, workdir)
+    calls_before = CountingHandler.calls
+    start_time = time.time()
+    if args.concurrency > 1:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            samples = list(executor.map(lambda entry: replay_entry(npc, entry), entries))
+    else:
+        samples = [replay_entry(npc, entry) for entry in entries]
+    summary = report(samples)
+    summary['settings'] = settings
+    summary['elapsed_s'] = time.time() - start_time
+    # 요청 안에서 부른 호출 + 기본 힌트 풀 보충 같은 백그라운드 호출
+    summary['upstream_calls'] = CountingHandler.calls - calls_before
+    print(f"[{name}] {len(samples)}건, 히트율 {summary['hit_rate']:.1%}, OpenAI 호출 {summary['upstream_calls']}회, "
+          f"p50 {summary['latency_ms']['p50']:.0f}ms, p95 {summary['latency_ms']['p95']:.0f}ms")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="요청 기록(NPC_JOURNAL_PATH)을 모의 OpenAI 서버에 대고 설정별로 다시 실행해 처리 경로, 히트율, "
+                    "OpenAI 사용량, 지연 시간을 비교합니다."
+    )
+    parser.add_argument('journals', nargs='+', help="요청 기록 파일 경로 또는 glob 패턴 (나눠진 .1, .2 파일도 포함)")
+    parser.add_argument('--config', action='append', default=[],
+                        help="비교할 설정 'name:key=value,...' (여러 번 지정 가능, 생략하면 현재 설정). "
+                             f"키: {', '.join(CONFIG_KEYS)}")
+    parser.add_argument('--pool', default=DEFAULT_POOL_PATH, help="시작 상태로 쓸 기본 힌트 풀 파일 (복사해서 사용)")
+    parser.add_argument('--limit', type=int, default=0, help="앞에서부터 이 수만큼만 재생 (0이면 전부)")
+    parser.add_argument('--concurrency', type=int, default=1, help="동시에 재생할 요청 수")
+    parser.add_argument('--latency', type=float, default=0.8, help="모의 OpenAI 평균 응답 지연 (초)")
+    parser.add_argument('--jitter', type=float, default=0.3, help="모의 OpenAI 응답 지연의 표준편차 (초)")
+    parser.add_argument('--output', help="결과 JSON을 저장할 경로")
+    args = parser.parse_args()
+
+    entries = read_journal(args.journals)
+    replay = [entry for entry in entries if replayable(entry)]
+    if args.limit:
+        replay = replay[:args.limit]
+    print(f"기록 {len(entries)}건 중 {len(replay)}건 재생")
+    if not replay:
+        return
+
+    start_mock_backend(args.latency, args.jitter)
+    configs = [parse_config(text) for text in args.config] or [parse_config('current:')]
+    result = {'recorded': report(replay), 'configs': {}}
+    print(f"[recorded] 히트율 {result['recorded']['hit_rate']:.1%}, "
+          f"p50 {result['recorded']['latency_ms']['p50']:.0f}ms, p95 {result['recorded']['latency_ms']['p95']:.0f}ms")
+    with tempfile.TemporaryDirectory(prefix='npc-replay-') as workdir:
+        for name, settings in configs:
+            result['configs'][name] = run_config(name, settings, replay, args, workdir)
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"결과 저장: {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
+
+"""
+python replay.py './logs/hint_requests.*.jsonl' --config current: --config strict:cache_threshold=0.85,router=0
+python replay.py ./logs/hint_requests.jsonl --config no_pool:pool=0 --latency 1.2 --output replay.json
+"""
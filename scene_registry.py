@@ -0,0 +1,139 @@
+import json
+import os
+import re
+
+
+# 모든 씬에 공통으로 들어가는 시스템 프롬프트 (씬별 물체 정보는 build_system_prompt에서 이 뒤에 붙음)
+BASE_SYSTEM_PROMPT = """
+당신은 XR 재난 훈련 시뮬레이션의 친절한 AI 조교입니다.
+주어진 힌트를 바탕으로, 훈련자가 다음에 취해야 할 행동을 간결하고 자연스러운 문장으로 안내하세요.
+
+[출력 조건]
+- 글자 수는 반드시 120자 이하로 간결하게 작성할 것
+- 부가 설명 등은 절대 포함하지 말 것
+- 자연스러운 구어체로 존댓말로 작성할 것
+- 따옴표, 괄호, 특수기호를 사용하지 말 것
+- 사용자의 질문이 들어올 경우, 질문에 직접적으로 간단하고 명확히 대답할 것
+"""
+# 물체 정보 블록을 넣을 때만 출력 조건에 추가하는 규칙
+OBJECT_INFO_RULE = "- 힌트에 '물체나 위치를 설명하라'라는 내용이 있을 때만 아래 물체 정보를 참고할 것\n"
+# 씬마다 보관할 힌트별 시스템 프롬프트 수
+MAX_ROW_PROMPTS = 1024
+
+
+class SceneObject:
+    """
+    씬 안의 물체 하나. details는 ('생김새', 설명), ('위치', 설명) 같은 (항목, 설명) 튜플입니다.
+    aliases(훈련자가 부르는 다른 이름)와 answers(항목별로 직접 작성한 NPC 답변)는 질문 라우터와
+    힌트가 가리키는 물체를 찾는 데만 사용하며 시스템 프롬프트에는 들어가지 않습니다.
+    """
+    __slots__ = ('name', 'details', 'aliases', 'answers')
+
+    def __init__(self, name: str, details, aliases=(), answers=None):
+        self.name = name
+        self.details = tuple(details)
+        self.aliases = tuple(aliases)
+        self.answers = dict(answers or {})
+
+    def __repr__(self):
+        return f"SceneObject({self.name!r})"
+
+
+class SceneConfig:
+    """
+    한 씬의 물체 목록과, 이를 바탕으로 만드는 시스템 프롬프트.
+    system_prompt는 물체 목록 전체를 담은 프롬프트이고, 실제 요청에는 힌트 행마다 필요한 물체 정보만 담은
+    prompt_for(hint)를 씁니다. 둘 다 요청마다 바뀌는 내용을 포함하지 않으므로 같은 힌트에는 항상 같은 바이트열이며,
+    OpenAI의 프롬프트 캐시가 이 접두사를 재사용할 수 있습니다.
+    """
+    __slots__ = ('scene', 'objects', 'system_prompt', '_row_prompts')
+
+    def __init__(self, scene: str, objects):
+        self.scene = scene
+        self.objects = tuple(objects)
+        self.system_prompt = build_system_prompt(self.objects)
+        # 힌트 원문 -> 시스템 프롬프트
+        self._row_prompts = {}
+
+    def prompt_for(self, hint_text: str) -> str:
+        """
+        힌트 한 행에 맞춘 시스템 프롬프트. 힌트가 물체의 생김새/위치 설명을 요구할 때만 그 힌트가 가리키는
+        물체의 해당 항목을 넣고, 그 밖의 힌트에는 물체 정보를 넣지 않습니다. 힌트마다 한 번만 만듭니다.
+        """
+        prompt = self._row_prompts.get(hint_text)
+        if prompt is None:
+            # CSV를 여러 번 고쳐 쓴 경우에도 커지지 않도록 제한
+            if len(self._row_prompts) >= MAX_ROW_PROMPTS:
+                self._row_prompts.clear()
+            objects = referenced_objects(self.objects, hint_text)
+            prompt = build_system_prompt(objects)
+            self._row_prompts[hint_text] = prompt
+        return prompt
+
+    def __repr__(self):
+        return f"SceneConfig({self.scene!r}, objects={len(self.objects)})"
+
+
+def _compact(text: str) -> str:
+    return ''.join(text.split()).lower()
+
+
+def referenced_objects(objects, hint_text: str) -> tuple:
+    """
+    힌트가 설명을 요구하는 물체와 항목만 남긴 물체 목록.
+    힌트에 항목 이름('생김새', '위치' 등)이 낱말로 없으면 빈 목록입니다 ('누출위치'처럼 다른 낱말의 일부는 제외).
+    물체는 이름이나 다른 이름(aliases)으로 찾고, 항목은 있지만 어느 물체인지 찾지 못하면 모든 물체의 그 항목을 남깁니다.
+    """
+    labels = {
+        label for obj in objects for label, _ in obj.details
+        if re.search(r'(?<!\w)' + re.escape(label), hint_text)
+    }
+    if not labels:
+        return ()
+    text = _compact(hint_text)
+    named = [obj for obj in objects if any(_compact(name) in text for name in (obj.name,) + obj.aliases)]
+    return tuple(
+        SceneObject(obj.name, [(label, detail) for label, detail in obj.details if label in labels])
+        for obj in named or objects
+    )
+
+
+def build_system_prompt(objects) -> str:
+    """공통 프롬프트 뒤에 물체 정보 규칙과 [물체 정보] 블록을 붙입니다. 물체가 없으면 둘 다 넣지 않습니다."""
+    if not objects:
+        return BASE_SYSTEM_PROMPT + "\n"
+    return BASE_SYSTEM_PROMPT + OBJECT_INFO_RULE + format_object_catalog(objects)
+
+
+def format_object_catalog(objects) -> str:
+    """물체 목록을 시스템 프롬프트의 [물체 정보] 블록으로 변환합니다."""
+    blocks = []
+    for number, obj in enumerate(objects, start=1):
+        lines = [f"{number}. {obj.name}"]
+        lines.extend(f"   - {label}: {text}" for label, text in obj.details)
+        blocks.append("\n".join(lines))
+    return "\n[물체 정보]\n\n" + "\n\n".join(blocks) + "\n\n"
+
+
+def load_scene_registry(path: str) -> dict:
+    """
+    씬 정의 JSON 파일을 읽어 {씬 이름: SceneConfig} 사전을 만듭니다.
+
+    파일 형식:
+        {"ca2": {"objects": [{"name": "ESD", "details": {"생김새": "...", "위치": "..."}}, ...]}, ...}
+    물체마다 "aliases": [...]와 "answers": {"위치": "...", ...}를 선택적으로 지정할 수 있습니다.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"씬 정의 파일을 찾을 수 없습니다: {path}")
+
+    with open(path, encoding='utf-8') as f:
+        raw = json.load(f)
+
+    registry = {}
+    for scene, spec in raw.items():
+        objects = [
+            SceneObject(item['name'], item.get('details', {}).items(), item.get('aliases', ()), item.get('answers'))
+            for item in spec.get('objects', [])
+        ]
+        registry[scene] = SceneConfig(scene, objects)
+    return registry
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class TraineeSession:
+    """
+    훈련자 한 명의 진행 상태. 현재 (씬, 단계), 그 단계에서 질문한 횟수, 최근 질문-응답 몇 개만 보관합니다.
+    history 항목은 (씬, 단계, 질문, 응답) 튜플입니다.
+    """
+    __slots__ = ('scene', 'step', 'count', 'history', 'last_seen')
+
+    def __init__(self, history_size: int):
+        self.scene = None
+        self.step = None
+        self.count = 0
+        self.history = deque(maxlen=history_size)
+        self.last_seen = time.monotonic()
+
+
+class SessionStore:
+    """
+    session_id별 TraineeSession 저장소.
+    마지막 사용 순서로 정렬해 두고, ttl 동안 요청이 없던 세션과 max_sessions를 넘는 가장 오래된 세션을 제거하므로
+    하루 종일 여러 기수가 훈련해도 메모리 사용량이 일정합니다.
+    """
+    def __init__(self, max_sessions: int = 2000, ttl: float = 1800.0, history_size: int = 3, max_text: int = 200):
+        """
+        :param max_sessions: 동시에 보관할 최대 세션 수
+        :param ttl: 마지막 요청 후 세션을 유지할 시간 (초)
+        :param history_size: 세션마다 보관할 최근 질문-응답 수
+        :param max_text: 보관할 질문/응답의 최대 글자 수 (넘으면 잘라서 저장)
+        """
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.history_size = history_size
+        self.max_text = max_text
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def _session(self, session_id: str, create: bool = True):
+        """세션을 찾아 사용 순서를 갱신합니다. 잠금을 잡은 상태에서 호출해야 합니다."""
+        now = time.monotonic()
+        # 사용 순서대로 정렬되어 있으므로 앞쪽의 만료된 세션만 확인하면 됨
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if now - oldest.last_seen < self.ttl:
+                break
+            del self._sessions[oldest_id]
+            self.expired += 1
+
+        session = self._sessions.get(session_id)
+        if session is None:
+            if not create:
+                return None
+            session = TraineeSession(self.history_size)
+            self._sessions[session_id] = session
+            self.created += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+        else:
+            self._sessions.move_to_end(session_id)
+        session.last_seen = now
+        return session
+
+    @staticmethod
+    def _move_to(session: TraineeSession, scene: str, step: int):
+        if session.scene != scene or session.step != step:
+            session.scene = scene
+            session.step = step
+            session.count = 0
+
+    def current_step(self, session_id: str):
+        """
+        :return: 세션의 현재 (씬, 단계), 세션이 없거나 아직 단계가 없으면 None
+        """
+        with self._lock:
+            session = self._session(session_id, create=False)
+            if session is None or session.step is None:
+                return None
+            return session.scene, session.step
+
+    def observe_step(self, session_id: str, scene: str, step: int):
+        """기본 힌트 요청 등으로 알게 된 훈련자의 현재 단계를 기록합니다."""
+        with self._lock:
+            self._move_to(self._session(session_id), scene, step)
+
+    def next_question(self, session_id: str, scene: str, step: int):
+        """
+        질문 하나를 세션에 반영합니다.
+        :return: (이 단계에서 몇 번째 질문인지, 같은 단계의 최근 (질문, 응답) 튜플)
+        """
+        with self._lock:
+            session = self._session(session_id)
+            self._move_to(session, scene, step)
+            session.count += 1
+            history = tuple(
+                (question, answer) for h_scene, h_step, question, answer in session.history
+                if h_scene == scene and h_step == step
+            )
+            return session.count, history
+
+    def record(self, session_id: str, scene: str, step: int, question: str, answer: str):
+        """질문-응답을 세션의 최근 기록에 추가합니다 (오래된 항목부터 밀려남)."""
+        with self._lock:
+            session = self._session(session_id, create=False)
+            if session is None:
+                return
+            session.history.append((scene, step, question[:self.max_text], answer[:self.max_text]))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'ttl': self.ttl,
+                'created': self.created,
+                'expired': self.expired,
+                'evicted': self.evicted,
+            }
@@ -0,0 +1,622 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from hint_cache import DefaultHintPool, char_ngrams, ngram_similarity, normalize_question, read_pool_file
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    scene TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    hint_col TEXT NOT NULL,
+    question TEXT NOT NULL,
+    hint TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (scene, step, hint_col, question)
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pool_lines (
+    scene TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    hint TEXT NOT NULL,
+    line TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pool_lines_key ON pool_lines (scene, step);
+CREATE TABLE IF NOT EXISTS pool_cells (
+    scene TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    hint TEXT NOT NULL,
+    updated REAL NOT NULL,
+    refill_owner INTEGER,
+    refill_until REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (scene, step)
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    scene TEXT,
+    step INTEGER,
+    count INTEGER NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen);
+CREATE TABLE IF NOT EXISTS session_history (
+    session_id TEXT NOT NULL,
+    scene TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS session_history_id ON session_history (session_id);
+"""
+
+
+class SQLiteFile:
+    """
+    여러 워커 프로세스가 함께 쓰는 SQLite 파일(WAL 모드). 연결은 스레드마다 따로 열고,
+    fork된 자식 프로세스에서는 새로 엽니다.
+    """
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        """
+        :param path: SQLite 파일 경로
+        :param busy_timeout: 다른 워커가 쓰는 중일 때 기다릴 최대 시간 (초)
+        """
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 스키마만 만들고 연결은 닫아 둠 (fork 전에 연 연결을 자식이 물려받지 않도록)
+        connection = self._connect()
+        connection.close()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.executescript(SCHEMA)
+        return connection
+
+    @property
+    def db(self):
+        local = self._local
+        pid = os.getpid()
+        if getattr(local, 'pid', None) != pid:
+            local.connection = self._connect()
+            local.pid = pid
+        return local.connection
+
+    @contextmanager
+    def transaction(self):
+        """쓰기 트랜잭션. 처음부터 쓰기 잠금을 잡아 다른 워커와 동시에 갱신할 때 교착을 피합니다."""
+        db = self.db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+
+def add_counter(db, name: str, amount: int = 1):
+    """counters 표의 값을 amount만큼 늘립니다 (쓰기 트랜잭션 안에서 호출)."""
+    if amount:
+        db.execute(
+            'INSERT INTO counters (name, value) VALUES (?, ?) '
+            'ON CONFLICT(name) DO UPDATE SET value = value + excluded.value',
+            (name, amount),
+        )
+
+
+class SharedQuestionCache:
+    """
+    QuestionCache와 같은 인터페이스로, 질문-응답을 여러 워커 프로세스가 함께 쓰는 SQLite 파일(WAL 모드)에 저장합니다.
+    어느 워커가 생성한 응답이든 모든 워커가 재사용하므로 워커 수를 늘려도 히트율이 떨어지지 않습니다.
+
+    전체 항목 수는 마지막 사용 시각 기준 LRU로, 각 항목의 수명은 TTL로 제한합니다.
+    히트/미스 카운터도 파일에 저장하므로 stats()는 모든 워커의 합계입니다.
+
+    조회(get)는 읽기만 하므로 다른 워커의 쓰기 잠금을 기다리지 않습니다. 히트/미스 카운터와 마지막 사용 시각은
+    프로세스 안에 모아 두었다가 flush_interval초마다 또는 flush_every건이 쌓이면 한 번의 쓰기 트랜잭션으로 반영합니다.
+    """
+    def __init__(self, path: str, max_entries: int = 512, ttl: float = 3600.0, threshold: float = 0.7,
+                 ngram: int = 3, busy_timeout: float = 5.0, flush_interval: float = 1.0, flush_every: int = 64):
+        """
+        :param path: SQLite 파일 경로
+        :param max_entries: 캐시에 보관할 최대 질문 수 (모든 워커 합계)
+        :param ttl: 항목 유효 시간 (초)
+        :param threshold: 같은 질문으로 판단할 최소 유사도 (0~1)
+        :param ngram: 유사도 계산에 사용할 자모 n-gram 길이
+        :param busy_timeout: 다른 워커가 쓰는 중일 때 기다릴 최대 시간 (초)
+        :param flush_interval: 모아 둔 카운터와 사용 시각을 파일에 반영하는 최대 간격 (초)
+        :param flush_every: 이만큼 조회가 쌓이면 간격과 관계없이 반영
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.ngram = ngram
+        self._file = SQLiteFile(path, busy_timeout)
+        # 정규화된 질문 -> n-gram (질문 문자열만으로 정해지므로 프로세스 안에서 공유)
+        self._grams = {}
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        # 아직 파일에 반영하지 않은 히트/미스 수와 (scene, step, hint_col, question) -> 마지막 사용 시각
+        self._pending_lock = threading.Lock()
+        self._pending_hits = 0
+        self._pending_misses = 0
+        self._pending_used = {}
+        self._last_flush = time.monotonic()
+
+    def _question_grams(self, normalized: str) -> frozenset:
+        grams = self._grams.get(normalized)
+        if grams is None:
+            if len(self._grams) >= self.max_entries * 4:
+                self._grams.clear()
+            grams = self._grams[normalized] = char_ngrams(normalized, self.ngram)
+        return grams
+
+    def get(self, key, hint: str, question: str):
+        """
+        가장 유사한 저장 질문의 응답을 찾습니다.
+        :param key: (씬, 단계, 힌트 열)
+        :param hint: 현재 힌트 원문 (저장 당시와 다르면 사용하지 않음)
+        :return: 저장된 응답, 없으면 None
+        """
+        scene, step, hint_col = key
+        normalized = normalize_question(question)
+        grams = self._question_grams(normalized)
+        now = time.time()
+        db = self._file.db
+        rows = db.execute(
+            'SELECT question, answer FROM responses '
+            'WHERE scene = ? AND step = ? AND hint_col = ? AND hint = ? AND expires_at > ?',
+            (scene, step, hint_col, hint, now),
+        ).fetchall()
+
+        best, best_score = None, 0.0
+        for stored, answer in rows:
+            score = 1.0 if stored == normalized else ngram_similarity(grams, self._question_grams(stored))
+            if score > best_score:
+                best, best_score = (stored, answer), score
+
+        hit = best is not None and best_score >= self.threshold
+        with self._pending_lock:
+            if hit:
+                self._pending_hits += 1
+                self._pending_used[(scene, step, hint_col, best[0])] = now
+            else:
+                self._pending_misses += 1
+            due = (self._pending_hits + self._pending_misses >= self.flush_every
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+        return best[1] if hit else None
+
+    def _take_pending(self):
+        """모아 둔 카운터와 사용 시각을 꺼내고 비웁니다."""
+        with self._pending_lock:
+            pending = self._pending_hits, self._pending_misses, self._pending_used
+            self._pending_hits = 0
+            self._pending_misses = 0
+            self._pending_used = {}
+            self._last_flush = time.monotonic()
+        return pending
+
+    @staticmethod
+    def _apply_pending(db, pending):
+        """꺼낸 카운터와 사용 시각을 반영합니다 (쓰기 트랜잭션 안에서 호출)."""
+        hits, misses, used = pending
+        add_counter(db, 'hits', hits)
+        add_counter(db, 'misses', misses)
+        db.executemany(
+            'UPDATE responses SET last_used = MAX(last_used, ?) '
+            'WHERE scene = ? AND step = ? AND hint_col = ? AND question = ?',
+            [(last_used,) + key for key, last_used in used.items()],
+        )
+
+    def flush(self):
+        """모아 둔 히트/미스 카운터와 마지막 사용 시각을 파일에 반영합니다."""
+        pending = self._take_pending()
+        if not (pending[0] or pending[1]):
+            return
+        try:
+            with self._file.transaction() as db:
+                self._apply_pending(db, pending)
+        except sqlite3.OperationalError as e:
+            # 다른 워커가 오래 쓰는 중이면 다음 반영 때 다시 시도
+            print(f"질문 캐시 카운터 반영 실패 (다음에 다시 시도): {e}")
+            hits, misses, used = pending
+            with self._pending_lock:
+                self._pending_hits += hits
+                self._pending_misses += misses
+                for key, last_used in used.items():
+                    self._pending_used[key] = max(last_used, self._pending_used.get(key, 0.0))
+
+    def put(self, key, hint: str, question: str, answer: str):
+        """질문-응답을 저장하고, 만료된 항목과 최대 크기를 넘는 가장 오래 사용되지 않은 항목을 제거합니다."""
+        scene, step, hint_col = key
+        normalized = normalize_question(question)
+        now = time.time()
+        pending = self._take_pending()
+        with self._file.transaction() as db:
+            # LRU 제거가 최신 사용 시각을 기준으로 하도록 모아 둔 값을 먼저 반영
+            self._apply_pending(db, pending)
+            db.execute(
+                'INSERT OR REPLACE INTO responses (scene, step, hint_col, question, hint, answer, expires_at, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (scene, step, hint_col, normalized, hint, answer, now + self.ttl, now),
+            )
+            expired = db.execute('DELETE FROM responses WHERE expires_at <= ?', (now,)).rowcount
+            add_counter(db, 'expirations', expired)
+            overflow = db.execute('SELECT COUNT(*) FROM responses').fetchone()[0] - self.max_entries
+            if overflow > 0:
+                db.execute(
+                    'DELETE FROM responses WHERE rowid IN (SELECT rowid FROM responses ORDER BY last_used LIMIT ?)',
+                    (overflow,),
+                )
+                add_counter(db, 'evictions', overflow)
+
+    def invalidate(self, scene_steps) -> int:
+        """
+        주어진 (씬, 단계)에 속한 모든 질문-응답을 제거합니다 (힌트 열과 무관).
+        :return: 제거한 항목 수
+        """
+        removed = 0
+        with self._file.transaction() as db:
+            for scene, step in set(scene_steps):
+                removed += db.execute('DELETE FROM responses WHERE scene = ? AND step = ?', (scene, step)).rowcount
+        return removed
+
+    def stats(self) -> dict:
+        """모든 워커의 히트/미스 카운터 합계와 현재 크기를 반환합니다."""
+        self.flush()
+        db = self._file.db
+        counters = dict(db.execute('SELECT name, value FROM counters').fetchall())
+        size = db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        lookups = hits + misses
+        return {
+            'size': size,
+            'max_entries': self.max_entries,
+            'threshold': self.threshold,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'evictions': counters.get('evictions', 0),
+            'expirations': counters.get('expirations', 0),
+            'shared_path': self.path,
+        }
+
+
+class SharedDefaultHintPool(DefaultHintPool):
+    """
+    DefaultHintPool과 같은 인터페이스로, 미리 생성한 기본 힌트 문장을 여러 워커 프로세스가 함께 쓰는
+    SQLite 파일에 저장합니다. 어느 워커가 채우거나 보충한 문장이든 모든 워커가 바로 사용하며,
+    문장을 추가할 때마다 바로 저장되므로 save()로 파일을 덮어쓰지 않습니다.
+    꺼낼 순서(cursor)만 프로세스마다 따로 둡니다.
+
+    보충할 칸은 파일의 pool_cells 표에서 먼저 차지한 워커 하나만 생성하므로, 워커 수가 늘어도 보충 호출 수는 같습니다.
+    차지한 워커가 claim_timeout초 안에 끝내지 못하면(종료 등) 다른 워커가 다시 차지할 수 있습니다.
+    """
+    def __init__(self, path: str, size: int = 3, max_workers: int = 2, seed_path: str = None,
+                 busy_timeout: float = 5.0, max_age: float = 0.0, claim_timeout: float = 60.0):
+        """
+        :param path: SQLite 파일 경로
+        :param size: (씬, 단계)마다 보관할 문장 수
+        :param max_workers: 백그라운드 생성에 사용할 스레드 수
+        :param seed_path: 공유 풀이 비어 있을 때 처음 한 번 읽어 올 풀 JSON 파일 (warmup.py로 만든 파일)
+        :param busy_timeout: 다른 워커가 쓰는 중일 때 기다릴 최대 시간 (초)
+        :param max_age: 가득 찬 칸의 문장을 하나 교체할 주기 (초, 0이면 교체하지 않음, 모든 워커 합계 기준)
+        :param claim_timeout: 보충을 맡은 워커가 끝내지 못했을 때 다른 워커가 다시 맡기까지 기다릴 시간 (초)
+        """
+        super().__init__(path, size=size, max_workers=max_workers, max_age=max_age)
+        self.seed_path = seed_path
+        self.claim_timeout = claim_timeout
+        self._file = SQLiteFile(path, busy_timeout)
+        # (scene, step) -> 이 프로세스에서 꺼낸 횟수
+        self._cursors = {}
+
+    def load(self) -> int:
+        """
+        공유 풀이 비어 있으면 seed_path의 풀 파일을 읽어 채웁니다 (여러 워커가 동시에 시작해도 한 번만).
+        :return: 공유 풀의 (씬, 단계) 항목 수
+        """
+        entries = read_pool_file(self.seed_path, self.size) if self.seed_path else {}
+        with self._file.transaction() as db:
+            if entries and db.execute('SELECT COUNT(*) FROM pool_lines').fetchone()[0] == 0:
+                db.executemany(
+                    'INSERT INTO pool_lines (scene, step, hint, line) VALUES (?, ?, ?, ?)',
+                    [(scene, step, hint, line) for (scene, step), (hint, lines, _) in entries.items() for line in lines],
+                )
+                db.executemany(
+                    'INSERT OR REPLACE INTO pool_cells (scene, step, hint, updated) VALUES (?, ?, ?, ?)',
+                    [(scene, step, hint, updated) for (scene, step), (hint, _, updated) in entries.items()],
+                )
+            return db.execute('SELECT COUNT(*) FROM (SELECT DISTINCT scene, step FROM pool_lines)').fetchone()[0]
+
+    def save(self):
+        """문장은 put()에서 바로 저장되므로 할 일이 없습니다."""
+
+    def take(self, scene: str, step: int, hint: str, generate=None):
+        """DefaultHintPool.take와 같습니다. 다른 워커가 보충한 문장도 바로 꺼냅니다."""
+        key = (scene, step)
+        lines = self.lines(scene, step, hint)
+        if not lines:
+            line = None
+            refill = True
+        else:
+            with self._lock:
+                cursor = self._cursors.get(key, 0)
+                self._cursors[key] = cursor + 1
+            line = lines[cursor % len(lines)]
+            updated, refill_until = self._cell(scene, step, hint)
+            # 다른 워커가 보충을 맡고 있으면 쓰기 잠금을 잡지 않고 그대로 돌려 씀
+            refill = self._needs_refill(len(lines), updated) and refill_until <= time.time()
+
+        if refill and generate is not None:
+            self.refill(scene, step, hint, generate)
+        return line
+
+    def _cell(self, scene: str, step: int, hint: str):
+        """
+        :return: (마지막으로 문장을 추가한 시각, 다른 워커가 보충을 맡은 기한). 원본 힌트가 다르거나 기록이 없으면 (0, 0)
+        """
+        row = self._file.db.execute(
+            'SELECT updated, refill_until FROM pool_cells WHERE scene = ? AND step = ? AND hint = ?', (scene, step, hint)
+        ).fetchone()
+        return tuple(row) if row else (0.0, 0.0)
+
+    def _claim(self, scene: str, step: int, hint: str) -> bool:
+        """
+        아직 보충이 필요하고 다른 워커가 맡고 있지 않으면 이 워커가 (씬, 단계)의 보충을 맡습니다.
+        :return: 맡았는지 여부
+        """
+        now = time.time()
+        with self._file.transaction() as db:
+            # 다른 워커가 방금 채웠으면 맡지 않음
+            count = db.execute('SELECT COUNT(*) FROM pool_lines WHERE scene = ? AND step = ? AND hint = ?',
+                               (scene, step, hint)).fetchone()[0]
+            if not self._needs_refill(count, self._cell(scene, step, hint)[0]):
+                return False
+            claimed = db.execute(
+                'INSERT INTO pool_cells (scene, step, hint, updated, refill_owner, refill_until) VALUES (?, ?, ?, 0, ?, ?) '
+                'ON CONFLICT(scene, step) DO UPDATE SET '
+                'updated = CASE WHEN hint = excluded.hint THEN updated ELSE 0 END, hint = excluded.hint, '
+                'refill_owner = excluded.refill_owner, refill_until = excluded.refill_until '
+                'WHERE refill_until <= ? OR hint != excluded.hint',
+                (scene, step, hint, os.getpid(), now + self.claim_timeout, now),
+            ).rowcount
+        return claimed > 0
+
+    def refill(self, scene: str, step: int, hint: str, generate) -> bool:
+        """
+        DefaultHintPool.refill과 같지만, 모든 워커 중 보충을 맡은 워커에서만 예약합니다.
+        :return: 새로 예약했는지 여부
+        """
+        key = (scene, step)
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+        try:
+            claimed = self._claim(scene, step, hint)
+        except sqlite3.OperationalError as e:
+            print(f"힌트 풀 보충 차지 실패 {key}: {e}")
+            claimed = False
+        if not claimed:
+            with self._lock:
+                self._pending.discard(key)
+            return False
+        self._executor.submit(self._refill, key, hint, generate)
+        return True
+
+    def _refill(self, key, hint, generate):
+        try:
+            super()._refill(key, hint, generate)
+        finally:
+            # 실패해도 다른 워커가 바로 다시 맡을 수 있도록 놓아 줌
+            with self._file.transaction() as db:
+                db.execute('UPDATE pool_cells SET refill_owner = NULL, refill_until = 0 '
+                           'WHERE scene = ? AND step = ? AND hint = ?', (key[0], key[1], hint))
+
+    def put(self, scene: str, step: int, hint: str, lines):
+        """
+        풀에 문장을 추가합니다. 원본 힌트가 바뀌었으면 기존 문장은 버리고,
+        크기를 넘으면 가장 오래된 문장부터 제거합니다.
+        """
+        with self._file.transaction() as db:
+            db.execute('DELETE FROM pool_lines WHERE scene = ? AND step = ? AND hint != ?', (scene, step, hint))
+            db.executemany(
+                'INSERT INTO pool_lines (scene, step, hint, line) VALUES (?, ?, ?, ?)',
+                [(scene, step, hint, line) for line in lines],
+            )
+            db.execute(
+                'DELETE FROM pool_lines WHERE rowid IN ('
+                'SELECT rowid FROM pool_lines WHERE scene = ? AND step = ? ORDER BY rowid DESC LIMIT -1 OFFSET ?)',
+                (scene, step, self.size),
+            )
+            db.execute(
+                'INSERT INTO pool_cells (scene, step, hint, updated) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(scene, step) DO UPDATE SET hint = excluded.hint, updated = excluded.updated, '
+                'refill_until = CASE WHEN hint = excluded.hint THEN refill_until ELSE 0 END',
+                (scene, step, hint, time.time()),
+            )
+
+    def invalidate(self, keys) -> int:
+        """
+        주어진 (씬, 단계) 항목을 풀에서 제거합니다.
+        :return: 제거한 항목 수
+        """
+        removed = 0
+        with self._file.transaction() as db:
+            for scene, step in set(keys):
+                db.execute('DELETE FROM pool_cells WHERE scene = ? AND step = ?', (scene, step))
+                if db.execute('DELETE FROM pool_lines WHERE scene = ? AND step = ?', (scene, step)).rowcount:
+                    removed += 1
+        return removed
+
+    def lines(self, scene: str, step: int, hint: str) -> list:
+        """원본 힌트가 일치하는 (씬, 단계)의 보관 문장을 저장 순서대로 반환합니다."""
+        rows = self._file.db.execute(
+            'SELECT line FROM pool_lines WHERE scene = ? AND step = ? AND hint = ? ORDER BY rowid',
+            (scene, step, hint),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def count(self, scene: str, step: int, hint: str) -> int:
+        """원본 힌트가 일치하는 (씬, 단계)의 보관 문장 수를 반환합니다."""
+        return self._file.db.execute(
+            'SELECT COUNT(*) FROM pool_lines WHERE scene = ? AND step = ? AND hint = ?',
+            (scene, step, hint),
+        ).fetchone()[0]
+
+
+class SharedSessionStore:
+    """
+    SessionStore와 같은 인터페이스로, 훈련자 세션을 여러 워커 프로세스가 함께 쓰는 SQLite 파일에 저장합니다.
+    같은 session_id의 다음 요청이 다른 워커로 가도 현재 단계, 질문 횟수, 최근 대화를 그대로 이어 씁니다.
+    ttl 동안 요청이 없던 세션과 max_sessions를 넘는 가장 오래된 세션을 제거하며, stats()는 모든 워커의 합계입니다.
+
+    만료된 세션은 조회에서 바로 제외하고, 실제 삭제는 워커마다 expire_interval초에 한 번만 합니다.
+    단계만 읽는 current_step은 쓰기 잠금을 잡지 않습니다.
+    """
+    def __init__(self, path: str, max_sessions: int = 2000, ttl: float = 1800.0, history_size: int = 3,
+                 max_text: int = 200, busy_timeout: float = 5.0, expire_interval: float = 60.0):
+        """
+        :param path: SQLite 파일 경로
+        :param max_sessions: 동시에 보관할 최대 세션 수 (모든 워커 합계)
+        :param ttl: 마지막 요청 후 세션을 유지할 시간 (초)
+        :param history_size: 세션마다 보관할 최근 질문-응답 수
+        :param max_text: 보관할 질문/응답의 최대 글자 수 (넘으면 잘라서 저장)
+        :param busy_timeout: 다른 워커가 쓰는 중일 때 기다릴 최대 시간 (초)
+        :param expire_interval: 만료된 세션을 지우는 간격 (초, 워커마다)
+        """
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.history_size = history_size
+        self.max_text = max_text
+        self.expire_interval = expire_interval
+        self._file = SQLiteFile(path, busy_timeout)
+        self._next_expiry = 0.0
+
+    def _expire(self, db, now: float):
+        """ttl 동안 요청이 없던 세션을 지웁니다 (쓰기 트랜잭션 안에서 호출, expire_interval마다 한 번)."""
+        if time.monotonic() < self._next_expiry:
+            return
+        self._next_expiry = time.monotonic() + self.expire_interval
+        expired_ids = 'SELECT session_id FROM sessions WHERE last_seen <= ?'
+        db.execute(f'DELETE FROM session_history WHERE session_id IN ({expired_ids})', (now - self.ttl,))
+        add_counter(db, 'sessions_expired', db.execute('DELETE FROM sessions WHERE last_seen <= ?',
+                                                       (now - self.ttl,)).rowcount)
+
+    def _session(self, db, session_id: str, create: bool = True):
+        """
+        세션을 찾아 마지막 사용 시각을 갱신합니다 (쓰기 트랜잭션 안에서 호출).
+        :return: (scene, step, count), 세션이 없으면 None
+        """
+        now = time.time()
+        self._expire(db, now)
+        row = db.execute('SELECT scene, step, count FROM sessions WHERE session_id = ? AND last_seen > ?',
+                         (session_id, now - self.ttl)).fetchone()
+        if row is None:
+            if not create:
+                return None
+            # 만료됐지만 아직 지우지 않은 같은 세션이 있으면 지우고 새로 시작
+            stale = db.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,)).rowcount
+            if stale:
+                db.execute('DELETE FROM session_history WHERE session_id = ?', (session_id,))
+                add_counter(db, 'sessions_expired', stale)
+            db.execute('INSERT INTO sessions (session_id, scene, step, count, last_seen) VALUES (?, NULL, NULL, 0, ?)',
+                       (session_id, now))
+            add_counter(db, 'sessions_created')
+            overflow = db.execute('SELECT COUNT(*) FROM sessions').fetchone()[0] - self.max_sessions
+            if overflow > 0:
+                oldest_ids = 'SELECT session_id FROM sessions ORDER BY last_seen LIMIT ?'
+                db.execute(f'DELETE FROM session_history WHERE session_id IN ({oldest_ids})', (overflow,))
+                db.execute(f'DELETE FROM sessions WHERE session_id IN ({oldest_ids})', (overflow,))
+                add_counter(db, 'sessions_evicted', overflow)
+            return None, None, 0
+        db.execute('UPDATE sessions SET last_seen = ? WHERE session_id = ?', (now, session_id))
+        return row
+
+    @staticmethod
+    def _move_to(db, session_id: str, session, scene: str, step: int) -> int:
+        """세션의 단계를 옮기고 그 단계의 질문 횟수를 반환합니다 (단계가 바뀌면 0부터)."""
+        current_scene, current_step, count = session
+        if current_scene != scene or current_step != step:
+            db.execute('UPDATE sessions SET scene = ?, step = ?, count = 0 WHERE session_id = ?',
+                       (scene, step, session_id))
+            return 0
+        return count
+
+    def current_step(self, session_id: str):
+        """
+        :return: 세션의 현재 (씬, 단계), 세션이 없거나 아직 단계가 없으면 None
+        """
+        # 읽기만 하므로 쓰기 잠금을 기다리지 않음 (마지막 사용 시각은 이어지는 next_question에서 갱신)
+        row = self._file.db.execute(
+            'SELECT scene, step FROM sessions WHERE session_id = ? AND last_seen > ? AND step IS NOT NULL',
+            (session_id, time.time() - self.ttl),
+        ).fetchone()
+        return tuple(row) if row else None
+
+    def observe_step(self, session_id: str, scene: str, step: int):
+        """기본 힌트 요청 등으로 알게 된 훈련자의 현재 단계를 기록합니다."""
+        with self._file.transaction() as db:
+            self._move_to(db, session_id, self._session(db, session_id), scene, step)
+
+    def next_question(self, session_id: str, scene: str, step: int):
+        """
+        질문 하나를 세션에 반영합니다.
+        :return: (이 단계에서 몇 번째 질문인지, 같은 단계의 최근 (질문, 응답) 튜플)
+        """
+        with self._file.transaction() as db:
+            count = self._move_to(db, session_id, self._session(db, session_id), scene, step) + 1
+            db.execute('UPDATE sessions SET count = ? WHERE session_id = ?', (count, session_id))
+            history = db.execute(
+                'SELECT question, answer FROM session_history WHERE session_id = ? AND scene = ? AND step = ? '
+                'ORDER BY rowid',
+                (session_id, scene, step),
+            ).fetchall()
+        return count, tuple(history)
+
+    def record(self, session_id: str, scene: str, step: int, question: str, answer: str):
+        """질문-응답을 세션의 최근 기록에 추가합니다 (오래된 항목부터 밀려남)."""
+        with self._file.transaction() as db:
+            if self._session(db, session_id, create=False) is None:
+                return
+            db.execute(
+                'INSERT INTO session_history (session_id, scene, step, question, answer) VALUES (?, ?, ?, ?, ?)',
+                (session_id, scene, step, question[:self.max_text], answer[:self.max_text]),
+            )
+            db.execute(
+                'DELETE FROM session_history WHERE rowid IN ('
+                'SELECT rowid FROM session_history WHERE session_id = ? ORDER BY rowid DESC LIMIT -1 OFFSET ?)',
+                (session_id, self.history_size),
+            )
+
+    def stats(self) -> dict:
+        db = self._file.db
+        counters = dict(db.execute("SELECT name, value FROM counters WHERE name LIKE 'sessions_%'").fetchall())
+        return {
+            'size': db.execute('SELECT COUNT(*) FROM sessions WHERE last_seen > ?',
+                               (time.time() - self.ttl,)).fetchone()[0],
+            'max_sessions': self.max_sessions,
+            'ttl': self.ttl,
+            'created': counters.get('sessions_created', 0),
+            'expired': counters.get('sessions_expired', 0),
+            'evicted': counters.get('sessions_evicted', 0),
+            'shared_path': self._file.path,
+        }
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import re
+
+from hint_cache import char_ngrams, normalize_question
+
+
+# 디스크 캐시 형식이 바뀌면 올려서 이전 캐시를 무시하도록 함
+CACHE_VERSION = 1
+# '1단계: PPE 착용', '5단계' 같은 단계 제목 행
+STAGE_HEADER = re.compile(r'^\s*(\d+)\s*단계')
+
+
+class FineStep:
+    """scenario.xlsx의 세부 단계 하나. stage는 소속된 단계(CSV '단계' 열과 같은 번호)입니다."""
+    __slots__ = ('step', 'stage', 'content')
+
+    def __init__(self, step: int, stage: int, content: str):
+        self.step = step
+        self.stage = stage
+        self.content = content
+
+    def __repr__(self):
+        return f"FineStep({self.step}, stage={self.stage}, {self.content!r})"
+
+
+def parse_scenario_workbook(path: str, sheet: str) -> list:
+    """
+    scenario.xlsx의 단계 구성 시트를 읽어 FineStep 목록으로 변환합니다 (openpyxl 필요).
+    'N단계' 제목 행 아래에 오는 '번호, 내용' 행을 그 단계의 세부 단계로 봅니다.
+    """
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet not in workbook.sheetnames:
+            raise ValueError(f"시트 '{sheet}'가 없습니다: {path} (시트: {', '.join(workbook.sheetnames)})")
+        steps = []
+        stage = None
+        for row in workbook[sheet].iter_rows(values_only=True):
+            first = str(row[0]).strip() if row and row[0] is not None else ''
+            content = str(row[1]).strip() if len(row) > 1 and row[1] is not None else ''
+            header = STAGE_HEADER.match(first)
+            if header:
+                stage = int(header.group(1))
+            elif first.isdigit() and stage is not None:
+                steps.append(FineStep(int(first), stage, content))
+    finally:
+        workbook.close()
+    return steps
+
+
+def file_digest(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_scenario_steps(path: str, cache_path: str, sheet: str) -> list:
+    """
+    세부 단계 목록을 읽습니다. xlsx 파싱은 느리므로 결과를 cache_path에 JSON으로 저장해 두고,
+    파일의 수정 시각과 크기가 같으면(바뀌었어도 내용 해시가 같으면) xlsx를 열지 않고 캐시를 사용합니다.
+    """
+    stat = os.stat(path)
+    cached = None
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"세부 단계 캐시를 읽지 못했습니다 ({cache_path}): {e}")
+
+    digest = None
+    if cached is not None and cached.get('version') == CACHE_VERSION and cached.get('sheet') == sheet:
+        source = cached.get('source', {})
+        if source.get('mtime_ns') == stat.st_mtime_ns and source.get('size') == stat.st_size:
+            return [FineStep(*item) for item in cached['steps']]
+        # 체크아웃이나 복사로 수정 시각만 바뀐 경우
+        digest = file_digest(path)
+        if source.get('sha256') == digest:
+            steps = [FineStep(*item) for item in cached['steps']]
+            save_scenario_cache(cache_path, sheet, stat, digest, steps)
+            return steps
+
+    steps = parse_scenario_workbook(path, sheet)
+    save_scenario_cache(cache_path, sheet, stat, digest or file_digest(path), steps)
+    return steps
+
+
+def save_scenario_cache(cache_path: str, sheet: str, stat, digest: str, steps):
+    """세부 단계 목록을 임시 파일에 쓴 뒤 교체하여 원자적으로 저장합니다. 실패해도 서비스에는 영향이 없습니다."""
+    payload = {
+        'version': CACHE_VERSION,
+        'sheet': sheet,
+        'source': {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': digest},
+        'steps': [[step.step, step.stage, step.content] for step in steps],
+    }
+    try:
+        directory = os.path.dirname(cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"세부 단계 캐시 저장 실패 ({cache_path}): {e}")
+
+
+def assign_rows(fine_steps, rows) -> list:
+    """
+    한 단계에 속한 세부 단계들을 같은 단계의 CSV 행(순서)들에 나눠 배정합니다.
+    순서를 거스르지 않는 배정 중 세부 단계 내용이 행의 '내용' 열에 가장 잘 포함되는 배정을 고릅니다.
+    :param fine_steps: 세부 단계 번호 순으로 정렬된 FineStep 목록
+    :param rows: 순서 번호 순으로 정렬된 (순서, 내용 n-gram 집합) 목록
+    :return: 세부 단계별 순서 번호 목록
+    """
+    if len(rows) == 1:
+        return [rows[0][0]] * len(fine_steps)
+
+    scores = []
+    for fine in fine_steps:
+        grams = char_ngrams(normalize_question(fine.content))
+        scores.append([len(grams & row_grams) / len(grams) if grams else 0.0 for _, row_grams in rows])
+
+    # best[j]: 지금까지의 세부 단계를 배정하고 마지막 세부 단계가 j번째 행에 배정됐을 때의 최고 점수
+    best = list(scores[0])
+    back = []
+    for score in scores[1:]:
+        # 이전 세부 단계는 j번째 행 이하에만 있을 수 있으므로 앞에서부터의 최댓값을 사용 (동점이면 앞 행)
+        prefix, argmax = [], []
+        top, top_at = float('-inf'), 0
+        for j in range(len(rows)):
+            if best[j] > top:
+                top, top_at = best[j], j
+            prefix.append(top)
+            argmax.append(top_at)
+        best = [prefix[j] + score[j] for j in range(len(rows))]
+        back.append(argmax)
+
+    j = max(range(len(rows)), key=best.__getitem__)
+    assigned = [j]
+    for argmax in reversed(back):
+        j = argmax[j]
+        assigned.append(j)
+    return [rows[j][0] for j in reversed(assigned)]
+
+
+class StepIndex:
+    """
+    scenario.xlsx의 세부 단계 -> CSV 단계(순서) 색인. 요청마다 사전 조회 한 번으로 변환합니다.
+    세부 단계가 속한 단계('N단계')에 CSV 행이 여러 개면(예: 5단계의 순서 5, 6) 내용이 맞는 행으로 나눕니다.
+    """
+    __slots__ = ('fine_steps', '_coarse', '_fine')
+
+    def __init__(self, fine_steps, hint_table):
+        """
+        :param fine_steps: FineStep 목록
+        :param hint_table: 순서와 내용을 가져올 HintTable (CSV를 다시 읽으면 색인도 새로 만듦)
+        """
+        self.fine_steps = tuple(fine_steps)
+        stage_rows = {}
+        for row in hint_table.rows.values():
+            if str(row.stage).strip().isdigit():
+                stage_rows.setdefault(int(row.stage), {}).setdefault(row.step, []).append(row.content)
+
+        by_stage = {}
+        for fine in self.fine_steps:
+            by_stage.setdefault(fine.stage, []).append(fine)
+
+        # 세부 단계 번호 -> 순서 (CSV에 해당 단계가 없는 세부 단계는 제외)
+        self._coarse = {}
+        for stage, fines in by_stage.items():
+            steps = stage_rows.get(stage)
+            if not steps:
+                continue
+            rows = [
+                (step, frozenset().union(*(char_ngrams(normalize_question(text)) for text in contents)))
+                for step, contents in sorted(steps.items())
+            ]
+            fines.sort(key=lambda fine: fine.step)
+            for fine, step in zip(fines, assign_rows(fines, rows)):
+                self._coarse[fine.step] = step
+
+        self._fine = {}
+        for fine_step, step in sorted(self._coarse.items()):
+            self._fine.setdefault(step, []).append(fine_step)
+
+    def coarse_step(self, fine_step: int):
+        """세부 단계 번호를 CSV 순서로 변환합니다. 없으면 None."""
+        return self._coarse.get(fine_step)
+
+    def fine_steps_of(self, step: int) -> tuple:
+        """CSV 순서에 속한 세부 단계 번호 목록."""
+        return tuple(self._fine.get(step, ()))
+
+    def mapping(self) -> dict:
+        """{세부 단계 번호: 순서} 사전 (관리/확인용)."""
+        return dict(self._coarse)
+
+    def __len__(self):
+        return len(self._coarse)
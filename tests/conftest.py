@@ -0,0 +1,57 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 저장소 최상위의 모듈(api, hint_cache 등)을 그대로 import
+sys.path.insert(0, ROOT)
+
+
+class FakeClock:
+    """time 모듈 대신 넣어 쓰는 시계. advance()로 시간을 직접 흘려 TTL과 기한을 시험합니다."""
+    def __init__(self, start: float = 1000.0):
+        self.now = start
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(scope='session')
+def api(tmp_path_factory):
+    """OpenAI 키 없이 api 모듈을 불러옵니다 (기본 힌트 풀은 빈 임시 파일에서 시작)."""
+    workdir = tmp_path_factory.mktemp('api')
+    settings = {
+        'NPC_HINT_POOL_PATH': str(workdir / 'pool.json'),
+        'NPC_SHARED_CACHE_PATH': '',
+        'NPC_JOURNAL_PATH': '',
+        'NPC_HINT_RELOAD_INTERVAL': '0',
+        'NPC_DEFAULT_HINT_MODE': 'pool',
+        'NPC_STEP_INDEX_CACHE_PATH': str(workdir / 'steps.json'),
+    }
+    saved = {name: os.environ.get(name) for name in list(settings) + ['OPENAI_API_KEY']}
+    os.environ.update(settings)
+    os.environ.pop('OPENAI_API_KEY', None)
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        yield importlib.import_module('api')
+    finally:
+        os.chdir(cwd)
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
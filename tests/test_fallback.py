@@ -0,0 +1,56 @@
+import pytest
+
+from hint_cache import QuestionCache
+
+SCENE, STEP = 'ca2', 2
+
+
+@pytest.fixture
+def npc(api):
+    return api.trainNPC(api.CSV_PATH, question_cache=QuestionCache())
+
+
+def test_fallback_reuses_answer_to_similar_question_only(api, npc):
+    hint_col, hint = npc.hint_table.get(SCENE, STEP).tier(1)
+    npc.question_cache.put((SCENE, STEP, hint_col), hint, 'ESD가 어디 있나요?', '저장된 답변')
+
+    assert npc._fallback_line(SCENE, STEP, hint_col, hint, 'ESD가 어디 있나요?') == '저장된 답변'
+    # 같은 힌트라도 다른 질문에는 저장된 답변을 주지 않음
+    expected = api.render_hint_template(hint) or f'(시스템) {hint}'
+    assert npc._fallback_line(SCENE, STEP, hint_col, hint, '보호복은 어떻게 입어요?') == expected
+    # 질문이 없는 기본 힌트는 질문 캐시를 보지 않음
+    assert npc._fallback_line(SCENE, STEP, hint_col, hint) == expected
+
+
+# 배포하는 CSV의 '~ 유도' 힌트 -> 템플릿 문장
+SHIPPED_TEMPLATES = {
+    'PPE 보관함으로 이동 유도 및 착용 유도': 'PPE 보관함으로 이동하고 착용하세요.',
+    'ESD로 이동 유도 및 ESD 비상가동중지버튼 선택 유도': 'ESD로 이동하고 ESD 비상가동중지버튼을 선택하세요.',
+    '누출위치로 이동 유도 및 누출 보고 유도': '누출위치로 이동하고 누출을 보고하세요.',
+    '밸브 잠그기 유도': '밸브를 잠그세요.',
+    '장비함 이동 및 장비함에서 Inflation Kit 획득 유도': '장비함으로 이동하고 장비함에서 Inflation Kit 획득하세요.',
+    '누출위치 이동 유도 및 밀봉판 설치 유도 및 밀봉호스 설치 유도 및 바닥의 호스 연결 유도':
+        '누출위치로 이동하고 밀봉판을 설치하고 밀봉호스를 설치하고 바닥의 호스를 연결하세요.',
+    'NPC 앞으로 이동 유도 및 제독실시 버튼 선택 유도 및 전광판에서 훈련종료 버튼 선택 유도':
+        'NPC 앞으로 이동하고 제독실시 버튼을 선택하고 전광판에서 훈련종료 버튼을 선택하세요.',
+    '누출된 용기의 열려있는 수동 밸브 잠그기 유도': '누출된 용기의 열려있는 수동 밸브를 잠그세요.',
+    '장비함 이동 및 장비함에서 Y-Cylinder 획득 유도': '장비함으로 이동하고 장비함에서 Y-Cylinder 획득하세요.',
+    '"Y_9B조립_03" 장비 설치 유도 및 땅에있는 호스 연결 유도 및 "Y_9B조립_03" 장비 돌리기 유도':
+        'Y_9B조립_03 장비를 설치하고 땅에있는 호스를 연결하고 Y_9B조립_03 장비를 돌리세요.',
+}
+
+
+def test_templates_for_shipped_hints(api):
+    table = api.load_hint_table(api.CSV_PATH)
+    hints = {tier[1] for row in table.rows.values() for tier in row.tiers if tier}
+    for hint in hints:
+        # '~ 설명' 힌트는 템플릿 없이 원본 힌트를 씀
+        assert api.render_hint_template(hint) == SHIPPED_TEMPLATES.get(hint), hint
+    assert set(SHIPPED_TEMPLATES) <= hints
+
+
+def test_template_falls_back_to_raw_hint_when_unsure(api):
+    # '열기'는 '열다'인지 '열기(를) 하다'인지 알 수 없음
+    assert api.render_hint_template('문 열기 유도') is None
+    assert api.render_hint_template('문 닫기 유도 및 밸브 잠그기 유도') is None
+    assert api.render_hint_template('장비 손잡이 돌리기 유도') == '장비 손잡이를 돌리세요.'
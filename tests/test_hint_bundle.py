@@ -0,0 +1,113 @@
+import gzip
+import json
+
+from werkzeug.datastructures import ETags
+
+from hint_bundle import IMMUTABLE_CACHE_CONTROL, LATEST_CACHE_CONTROL, HintBundleStore, bundle_response
+from hint_table import HintRow, HintTable
+
+
+class NoFineSteps:
+    def fine_steps_of(self, step):
+        return ()
+
+
+def make_table(default: str = '기본 힌트') -> HintTable:
+    return HintTable([HintRow('ca2', 1, '1', '내용', default, '요청1', ''), HintRow('ca2', 2, '1', '내용', '', '', '')])
+
+
+def test_version_follows_source_only():
+    store = HintBundleStore()
+    lines = {1: ['처음 문장']}
+    lines_for = lambda step, hint: lines.get(step, ())
+    bundle = store.get('ca2', make_table(), NoFineSteps(), lines_for)
+    assert json.loads(bundle.body)['steps'][0]['lines'] == ['처음 문장']
+
+    # 같은 내용의 새 표(CSV를 같은 내용으로 다시 저장)는 같은 번들
+    assert store.get('ca2', make_table(), NoFineSteps(), lines_for) is bundle
+    # 다른 저장소(다른 워커)에서 만들어도 같은 버전
+    assert HintBundleStore().get('ca2', make_table(), NoFineSteps(), lines_for).etag == bundle.etag
+
+    # 풀이 보충되어도 버전과 본문은 그대로
+    lines[1] = ['보충한 문장']
+    assert store.get('ca2', make_table(), NoFineSteps(), lines_for) is bundle
+    assert json.loads(bundle.body)['steps'][0]['lines'] == ['처음 문장']
+
+    # 원본 힌트가 바뀌면 새 버전을 만들고 그때의 문장을 담음
+    changed = store.get('ca2', make_table('바뀐 힌트'), NoFineSteps(), lines_for)
+    assert changed.version != bundle.version
+    assert json.loads(changed.body)['steps'][0]['lines'] == ['보충한 문장']
+    assert store.builds == 2
+
+
+def test_bundle_response_etag_and_304():
+    bundle = HintBundleStore().get('ca2', make_table(), NoFineSteps(), lambda step, hint: ())
+
+    status, headers, body = bundle_response(bundle, ETags(), accept_gzip=False, pinned=False)
+    assert status == 200
+    assert headers['ETag'] == bundle.etag
+    assert headers['Cache-Control'] == LATEST_CACHE_CONTROL
+    assert json.loads(body)['version'] == bundle.version
+
+    status, headers, body = bundle_response(bundle, ETags([bundle.etag.strip('"')]),
+                                            accept_gzip=False, pinned=False)
+    assert (status, body) == (304, b'')
+
+    status, headers, body = bundle_response(bundle, ETags(), accept_gzip=True, pinned=True)
+    assert status == 200
+    assert headers['Content-Encoding'] == 'gzip'
+    assert headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+    assert gzip.decompress(body) == bundle.body
+    # 압축 본문의 ETag(약한 ETag 포함)와 압축하지 않은 본문의 ETag 모두 같은 버전으로 봄
+    gzip_tag = headers['ETag'].strip('"')
+    assert gzip_tag != bundle.etag.strip('"')
+    assert bundle_response(bundle, ETags(weak_etags=[gzip_tag]), accept_gzip=True, pinned=False)[0] == 304
+    assert bundle_response(bundle, ETags([bundle.etag.strip('"')]), accept_gzip=True, pinned=False)[0] == 304
+    assert bundle_response(bundle, ETags(['ca2-other']), accept_gzip=False, pinned=False)[0] == 200
+
+
+def test_endpoint_etag_304_and_pinned_version(api):
+    client = api.app.test_client()
+
+    first = client.get('/hint/bundle?scene=ca2')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == LATEST_CACHE_CONTROL
+    etag = first.headers['ETag']
+    version = first.headers['X-Hint-Bundle-Version']
+    assert first.get_json()['version'] == version
+
+    not_modified = client.get('/hint/bundle?scene=ca2', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+    assert not_modified.headers['ETag'] == etag
+
+    pinned = client.get(f'/hint/bundle?scene=ca2&version={version}')
+    assert pinned.status_code == 200
+    assert pinned.headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+
+    compressed = client.get('/hint/bundle?scene=ca2', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(compressed.data))['version'] == version
+
+    assert client.get('/hint/bundle?scene=unknown').status_code == 500
+
+
+def test_endpoint_etag_survives_pool_refills(api):
+    client = api.app.test_client()
+    before = client.get('/hint/bundle?scene=ca2')
+    step = before.get_json()['steps'][0]
+    assert step['hints']['default']
+
+    npc = api.npcs['ca2']
+    # 기본 힌트 요청으로 풀을 돌려 쓰고, 새 문장이 보충된 경우
+    for _ in range(5):
+        assert client.post('/hint/default', json={'scene': 'ca2', 'step': step['step']}).status_code == 200
+    npc.default_pool.put('ca2', step['step'] + 1, step['hints']['default'], ['나중에 보충한 문장'])
+
+    after = client.get('/hint/bundle?scene=ca2', headers={'If-None-Match': before.headers['ETag']})
+    assert after.status_code == 304
+    assert after.headers['ETag'] == before.headers['ETag']
+
+    pinned = client.get(f"/hint/bundle?scene=ca2&version={before.headers['X-Hint-Bundle-Version']}")
+    assert pinned.status_code == 200
+    assert pinned.data == before.data
@@ -0,0 +1,141 @@
+import hint_cache
+from hint_cache import DefaultHintPool, QuestionCache
+
+KEY = ('ca2', 1, 'ca2_요청 힌트 1')
+HINT = 'ESD 생김새 설명'
+
+
+def test_similar_question_hits():
+    cache = QuestionCache(threshold=0.7)
+    cache.put(KEY, HINT, 'ESD가 어디 있나요?', '계기판 옆에 있습니다.')
+
+    assert cache.get(KEY, HINT, 'ESD가 어디 있나요') == '계기판 옆에 있습니다.'
+    assert cache.get(KEY, HINT, 'esd 어디 있나요?') == '계기판 옆에 있습니다.'
+    assert cache.get(KEY, HINT, '보호구는 어떤 순서로 입나요?') is None
+    assert cache.stats()['hits'] == 2
+    assert cache.stats()['misses'] == 1
+
+
+def test_threshold_controls_matching():
+    question, similar = 'ESD가 어디 있나요?', 'ESD는 어디에 있어요?'
+    loose = QuestionCache(threshold=0.3)
+    strict = QuestionCache(threshold=0.95)
+    for cache in (loose, strict):
+        cache.put(KEY, HINT, question, '답변')
+
+    assert loose.get(KEY, HINT, similar) == '답변'
+    assert strict.get(KEY, HINT, similar) is None
+    # 정규화 후 같은 질문은 기준과 관계없이 적중
+    assert strict.get(KEY, HINT, ' esd가 어디 있나요 ') == '답변'
+
+
+def test_changed_hint_or_other_key_misses():
+    cache = QuestionCache()
+    cache.put(KEY, HINT, 'ESD가 어디 있나요?', '답변')
+
+    assert cache.get(KEY, 'ESD 위치 설명', 'ESD가 어디 있나요?') is None
+    assert cache.get(('ca2', 2, 'ca2_요청 힌트 1'), HINT, 'ESD가 어디 있나요?') is None
+
+
+def test_lru_evicts_least_recently_used():
+    cache = QuestionCache(max_entries=2)
+    cache.put(KEY, HINT, '첫 번째 질문입니다', 'A1')
+    cache.put(KEY, HINT, '보호구 착용 순서', 'A2')
+    # 첫 번째 항목을 사용해 두 번째 항목이 가장 오래된 항목이 되게 함
+    assert cache.get(KEY, HINT, '첫 번째 질문입니다') == 'A1'
+    cache.put(KEY, HINT, '누출 위치로 가는 길', 'A3')
+
+    assert cache.get(KEY, HINT, '보호구 착용 순서') is None
+    assert cache.get(KEY, HINT, '첫 번째 질문입니다') == 'A1'
+    assert cache.get(KEY, HINT, '누출 위치로 가는 길') == 'A3'
+    stats = cache.stats()
+    assert stats['size'] == 2
+    assert stats['evictions'] == 1
+
+
+def test_ttl_expires_entries(monkeypatch, clock):
+    monkeypatch.setattr(hint_cache, 'time', clock)
+    cache = QuestionCache(ttl=10)
+    cache.put(KEY, HINT, 'ESD가 어디 있나요?', '답변')
+
+    clock.advance(9)
+    assert cache.get(KEY, HINT, 'ESD가 어디 있나요?') == '답변'
+
+    clock.advance(2)
+    assert cache.get(KEY, HINT, 'ESD가 어디 있나요?') is None
+    stats = cache.stats()
+    assert stats['size'] == 0
+    assert stats['expirations'] == 1
+
+
+class CountingGenerator:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return f'새 문장 {self.calls}'
+
+
+def finish_refills(pool):
+    """예약된 백그라운드 생성이 끝날 때까지 기다립니다 (생성 스레드가 하나이므로 예약 순서대로 실행됨)."""
+    pool._executor.submit(lambda: None).result(timeout=5)
+
+
+def test_full_pool_is_reused_without_generating(tmp_path):
+    pool = DefaultHintPool(str(tmp_path / 'pool.json'), size=3, max_workers=1)
+    pool.put('ca2', 1, HINT, ['문장 1', '문장 2', '문장 3'])
+    generate = CountingGenerator()
+
+    served = [pool.take('ca2', 1, HINT, generate=generate) for _ in range(10)]
+    finish_refills(pool)
+
+    assert served[:4] == ['문장 1', '문장 2', '문장 3', '문장 1']
+    assert generate.calls == 0
+
+
+def test_pool_fills_until_size(tmp_path):
+    pool = DefaultHintPool(str(tmp_path / 'pool.json'), size=2, max_workers=1)
+    generate = CountingGenerator()
+
+    assert pool.take('ca2', 1, HINT, generate=generate) is None
+    finish_refills(pool)
+    assert pool.take('ca2', 1, HINT, generate=generate) == '새 문장 1'
+    finish_refills(pool)
+    assert pool.lines('ca2', 1, HINT) == ['새 문장 1', '새 문장 2']
+
+    for _ in range(6):
+        pool.take('ca2', 1, HINT, generate=generate)
+    finish_refills(pool)
+    assert generate.calls == 2
+    # 원본 힌트가 바뀐 칸은 다시 채움
+    assert pool.take('ca2', 1, '바뀐 힌트') is None
+
+
+def test_max_age_replaces_one_line_per_period(tmp_path, monkeypatch, clock):
+    monkeypatch.setattr(hint_cache, 'time', clock)
+    pool = DefaultHintPool(str(tmp_path / 'pool.json'), size=2, max_workers=1, max_age=60)
+    pool.put('ca2', 1, HINT, ['문장 1', '문장 2'])
+    generate = CountingGenerator()
+
+    clock.advance(59)
+    pool.take('ca2', 1, HINT, generate=generate)
+    clock.advance(2)
+    for _ in range(3):
+        pool.take('ca2', 1, HINT, generate=generate)
+    finish_refills(pool)
+
+    assert generate.calls == 1
+    assert pool.lines('ca2', 1, HINT) == ['문장 2', '새 문장 1']
+
+
+def test_pool_file_round_trip(tmp_path):
+    path = str(tmp_path / 'pool.json')
+    pool = DefaultHintPool(path, size=2)
+    pool.put('ca2', 1, HINT, ['문장 1', '문장 2', '문장 3'])
+    pool.save()
+
+    loaded = DefaultHintPool(path, size=2)
+    assert loaded.load() == 1
+    assert loaded.lines('ca2', 1, HINT) == ['문장 2', '문장 3']
+    assert loaded.take('ca2', 1, HINT) == '문장 2'
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from hint_table import load_hint_table
+
+pd = pytest.importorskip('pandas')
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets',
+                        'hint_message_for_NPC.csv')
+
+# 빈 칸 조합별 폴백을 모두 거치도록 만든 표 (엑셀에서 저장한 것처럼 BOM 포함)
+SAMPLE_CSV = """﻿순서,단계,ca2_내용,ca2_기본 힌트,ca2_요청 힌트 1,ca2_요청 힌트 2,cb2_내용,cb2_기본 힌트,cb2_요청 힌트 1,cb2_요청 힌트 2
+1,준비,내용,기본,요청1,요청2,내용,기본,,
+2,준비,내용,기본,,요청2,내용,,,
+3,대응,내용,기본,요청1,,내용,,요청1,
+4,대응,내용, ,,,내용,기본,,요청2
+"""
+
+
+def pandas_hint(hint_data, scene, step, count):
+    """pandas DataFrame을 쓰던 기존 trainNPC의 조회. :return: 힌트 (제공할 힌트가 없으면 None)"""
+    if count == 0:
+        hint = hint_data.loc[step, f'{scene}_기본 힌트']
+        return hint if hint.strip() else None
+    hint_col = f'{scene}_요청 힌트 1' if count == 1 else f'{scene}_요청 힌트 2'
+    hint = hint_data.loc[step, hint_col]
+    if not hint.strip():
+        if hint_col == f'{scene}_요청 힌트 2' and hint_data.loc[step, f'{scene}_요청 힌트 1'].strip():
+            hint = hint_data.loc[step, f'{scene}_요청 힌트 1']
+        else:
+            hint = hint_data.loc[step, f'{scene}_기본 힌트']
+    return hint if hint.strip() else None
+
+
+def assert_same_as_pandas(csv_path):
+    table = load_hint_table(csv_path)
+    hint_data = pd.read_csv(csv_path, index_col='순서').fillna('')
+
+    assert set(table.steps) == set(hint_data.index)
+    for scene in table.scenes:
+        for step in table.steps:
+            row = table.get(scene, step)
+            for count in (0, 1, 2, 3):
+                expected = pandas_hint(hint_data, scene, step, count)
+                tier = row.tier(count)
+                assert (tier[1] if tier else None) == expected, (scene, step, count)
+                if tier:
+                    # 힌트 열 이름은 실제로 값을 가져온 열
+                    assert hint_data.loc[step, tier[0]] == tier[1]
+
+
+def test_matches_pandas_on_shipped_csv():
+    assert_same_as_pandas(CSV_PATH)
+
+
+def test_matches_pandas_on_blank_cells(tmp_path):
+    path = tmp_path / 'hints.csv'
+    path.write_text(SAMPLE_CSV, encoding='utf-8')
+    assert_same_as_pandas(str(path))
+
+
+def test_fallback_tiers(tmp_path):
+    path = tmp_path / 'hints.csv'
+    path.write_text(SAMPLE_CSV, encoding='utf-8')
+    table = load_hint_table(str(path))
+
+    assert table.scenes == ('ca2', 'cb2')
+    assert table.get('ca2', 1).tiers == (('ca2_기본 힌트', '기본'), ('ca2_요청 힌트 1', '요청1'),
+                                         ('ca2_요청 힌트 2', '요청2'))
+    # 요청 힌트 1이 비면 기본 힌트, 요청 힌트 2가 비면 요청 힌트 1
+    assert table.get('ca2', 2).tier(1) == ('ca2_기본 힌트', '기본')
+    assert table.get('ca2', 3).tier(2) == ('ca2_요청 힌트 1', '요청1')
+    assert table.get('cb2', 1).tier(5) == ('cb2_기본 힌트', '기본')
+    # 공백뿐인 칸은 힌트 없음
+    assert table.get('ca2', 4).tiers == (None, None, None)
+    assert table.get('cb2', 2).tier(2) is None
+    assert table.get('ca2', 99) is None
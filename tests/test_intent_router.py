@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from intent_router import IntentRouter
+from scene_registry import load_scene_registry
+
+SCENES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'scenes.json')
+
+
+@pytest.fixture(scope='module')
+def router():
+    return IntentRouter(load_scene_registry(SCENES_PATH))
+
+
+@pytest.mark.parametrize('question, name, labels', [
+    ('ESD 어디 있어요?', 'ESD', ('위치',)),
+    ('ESD의 위치가 어디예요?', 'ESD', ('위치',)),
+    ('PPE 보관함 어떻게 생겼어요?', 'PPE 보관함', ('생김새',)),
+    ('밸브 색깔이 어때요?', '벨브', ('생김새',)),
+    # 다른 물체 이름('장비 보관함')에 포함된 짧은 별칭('보관함')은 따로 세지 않음
+    ('장비 보관함 어디 있어요?', '장비함', ('위치',)),
+    # 오타는 자모 n-gram으로 찾음
+    ('이에스듸 어디 있어요', 'ESD', ('위치',)),
+])
+def test_routes_object_questions(router, question, name, labels):
+    obj, found, _, reason = router.classify('ca2', question)
+    assert reason is None
+    assert (obj.name, found) == (name, labels)
+    assert router.route('ca2', question)
+
+
+@pytest.mark.parametrize('question, reason', [
+    # 조작 방법을 묻는 질문은 위치 질문이 아님
+    ('밸브 어느 방향으로 돌려요?', 'open'),
+    ('밸브 어느쪽으로 잠가요?', 'open'),
+    ('PPE 보관함 문 열어도 돼요?', 'open'),
+    ('다음에 뭐 해야 해요?', 'open'),
+    ('ESD랑 밸브 어디 있어요?', 'ambiguous'),
+    # 씬 정의에 없는 물건을 물으면 근처 물체의 답을 돌려주지 않음
+    ('장비함에서 Inflation Kit 위치가 어디예요?', 'unknown_item'),
+    ('PPE 보관함 안에 있는 옷 무슨 색이에요?', 'unknown_item'),
+    ('Inflation Kit 어디 있어요?', 'unknown_item'),
+    ('전광판 어떻게 생겼어요?', 'no_object'),
+    ('ESD 알려 주세요', 'no_intent'),
+])
+def test_declines_other_questions(router, question, reason):
+    assert router.classify('ca2', question)[3] == reason
+    assert router.route('ca2', question) is None
+
+
+def test_stats_count_declined_reasons():
+    router = IntentRouter(load_scene_registry(SCENES_PATH))
+    router.route('ca2', 'ESD 어디 있어요?')
+    router.route('ca2', '장비함에서 Inflation Kit 위치가 어디예요?')
+    router.route('unknown', 'ESD 어디 있어요?')
+    stats = router.stats()
+    assert (stats['routed'], stats['llm']) == (1, 2)
+    assert stats['llm_by_reason'] == {'unknown_item': 1, 'unknown_scene': 1}
@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from rate_limit import QueueDeadline, RateLimiter, estimate_tokens, retry_after
+
+
+def queued(limiter) -> int:
+    return sum(limiter.stats()['queued'].values())
+
+
+def wait_until(condition, timeout: float = 5.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "시간 안에 조건이 충족되지 않음"
+        time.sleep(0.005)
+
+
+def admit_in_order(limiter, requests):
+    """requests의 (이름, 우선순위)를 차례로 대기열에 넣고 통과한 순서를 반환합니다."""
+    order, lock = [], threading.Lock()
+
+    def run(name, priority):
+        limiter.acquire(10, priority)
+        with lock:
+            order.append(name)
+
+    threads = []
+    for number, (name, priority) in enumerate(requests, start=1):
+        thread = threading.Thread(target=run, args=(name, priority))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: queued(limiter) == number)
+    for thread in threads:
+        thread.join(5)
+    return order
+
+
+def test_higher_priority_passes_first():
+    # 초당 20회, 한 번에 1회만 쌓이는 버킷을 비워 두고 시작
+    limiter = RateLimiter(requests_per_minute=1200, burst=0.05)
+    limiter.acquire(10, 'default')
+
+    order = admit_in_order(limiter, [('b', 'background'), ('d', 'default'), ('q', 'question')])
+
+    assert order == ['q', 'd', 'b']
+    assert limiter.stats()['admitted'] == {'question': 1, 'default': 2, 'background': 1}
+
+
+def test_same_priority_is_first_come_first_served():
+    limiter = RateLimiter(requests_per_minute=1200, burst=0.05)
+    limiter.acquire(10, 'question')
+
+    assert admit_in_order(limiter, [(name, 'question') for name in 'abcd']) == list('abcd')
+
+
+def test_deadline_sheds_without_waiting():
+    # 분당 60회: 버킷이 비면 다음 차례까지 약 1초
+    limiter = RateLimiter(requests_per_minute=60, burst=1)
+    limiter.acquire(10, 'question')
+
+    start = time.monotonic()
+    with pytest.raises(QueueDeadline):
+        limiter.acquire(10, 'default', deadline=time.monotonic() + 0.2)
+    assert time.monotonic() - start < 0.2
+    stats = limiter.stats()
+    assert stats['shed'] == {'question': 0, 'default': 1, 'background': 0}
+    # 포기한 요청은 대기열에 남지 않음
+    assert queued(limiter) == 0
+
+
+def test_deadline_accounts_for_requests_ahead():
+    # 초당 5회: 혼자면 0.2초 안에 통과하지만 앞에 두 건이 있으면 넘김
+    limiter = RateLimiter(requests_per_minute=300, burst=0.2)
+    limiter.acquire(10, 'question')
+    threads = [threading.Thread(target=limiter.acquire, args=(10, 'question')) for _ in range(2)]
+    for number, thread in enumerate(threads, start=1):
+        thread.start()
+        wait_until(lambda: queued(limiter) == number)
+
+    with pytest.raises(QueueDeadline):
+        limiter.acquire(10, 'background', deadline=time.monotonic() + 0.3)
+    # 기한이 넉넉하면 기다렸다가 통과
+    limiter.acquire(10, 'background', deadline=time.monotonic() + 5)
+    for thread in threads:
+        thread.join(5)
+    assert limiter.stats()['shed']['background'] == 1
+
+
+def test_token_budget_limits_admission():
+    limiter = RateLimiter(tokens_per_minute=600, burst=1)
+    # 버킷 크기(10토큰)를 넘는 요청도 버킷 크기만큼만 차감
+    assert limiter.acquire(1000, 'question') == 10
+    with pytest.raises(QueueDeadline):
+        limiter.acquire(10, 'question', deadline=time.monotonic() + 0.1)
+
+
+def test_penalize_pauses_and_sheds_waiters():
+    limiter = RateLimiter(requests_per_minute=6000)
+    limiter.penalize(2.0)
+
+    with pytest.raises(QueueDeadline):
+        limiter.acquire(10, 'question', deadline=time.monotonic() + 0.5)
+    assert limiter.stats()['rate_limited'] == 1
+    assert limiter.try_acquire(10) is False
+
+
+def test_async_acquire_respects_priority():
+    async def main():
+        limiter = RateLimiter(requests_per_minute=1200, burst=0.05)
+        await limiter.acquire_async(10, 'default')
+        order = []
+
+        async def run(name, priority):
+            await limiter.acquire_async(10, priority)
+            order.append(name)
+
+        tasks = []
+        for name, priority in [('b', 'background'), ('d', 'default'), ('q', 'question')]:
+            tasks.append(asyncio.ensure_future(run(name, priority)))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(main()) == ['q', 'd', 'b']
+
+
+def test_estimate_tokens_and_retry_after():
+    messages = [{'role': 'system', 'content': '가' * 10}, {'role': 'user', 'content': None}]
+    assert estimate_tokens(messages, completion_tokens=100) == 10 + 4 + 4 + 100
+
+    class Response:
+        def __init__(self, headers):
+            self.headers = headers
+
+    class Error(Exception):
+        def __init__(self, headers):
+            self.response = Response(headers)
+
+    assert retry_after(Error({'retry-after-ms': '1500'})) == 1.5
+    assert retry_after(Error({'retry-after': '2'})) == 2.0
+    assert retry_after(Error({'retry-after': 'soon'})) is None
+    assert retry_after(ValueError()) is None
@@ -0,0 +1,68 @@
+import sessions
+from sessions import SessionStore
+
+
+def test_counts_questions_per_step():
+    store = SessionStore()
+    store.observe_step('hmd-07', 'ca2', 2)
+    assert store.current_step('hmd-07') == ('ca2', 2)
+
+    assert store.next_question('hmd-07', 'ca2', 2) == (1, ())
+    store.record('hmd-07', 'ca2', 2, 'ESD가 어디 있나요?', '계기판 옆에 있습니다.')
+    assert store.next_question('hmd-07', 'ca2', 2) == (2, (('ESD가 어디 있나요?', '계기판 옆에 있습니다.'),))
+
+    # 단계가 바뀌면 횟수를 다시 세고 이전 단계의 대화는 넘기지 않음
+    assert store.next_question('hmd-07', 'ca2', 3) == (1, ())
+    assert store.current_step('hmd-07') == ('ca2', 3)
+
+
+def test_history_keeps_recent_entries_only():
+    store = SessionStore(history_size=2, max_text=5)
+    store.next_question('hmd-07', 'ca2', 1)
+    for number in range(3):
+        store.record('hmd-07', 'ca2', 1, f'질문{number}', f'응답{number}이 깁니다')
+
+    _, history = store.next_question('hmd-07', 'ca2', 1)
+    assert history == (('질문1', '응답1이 '), ('질문2', '응답2이 '))
+
+
+def test_unknown_session():
+    store = SessionStore()
+    assert store.current_step('missing') is None
+    # 없는 세션의 기록은 세션을 만들지 않음
+    store.record('missing', 'ca2', 1, '질문', '응답')
+    assert store.stats()['size'] == 0
+
+
+def test_ttl_expires_idle_sessions(monkeypatch, clock):
+    monkeypatch.setattr(sessions, 'time', clock)
+    store = SessionStore(ttl=60)
+    store.observe_step('idle', 'ca2', 1)
+    store.observe_step('active', 'cb2', 4)
+
+    clock.advance(40)
+    assert store.current_step('active') == ('cb2', 4)
+    clock.advance(30)
+    assert store.current_step('idle') is None
+    assert store.current_step('active') == ('cb2', 4)
+
+    stats = store.stats()
+    assert stats['size'] == 1
+    assert stats['expired'] == 1
+
+
+def test_lru_evicts_least_recently_used():
+    store = SessionStore(max_sessions=2)
+    store.observe_step('a', 'ca2', 1)
+    store.observe_step('b', 'ca2', 2)
+    # a를 사용해 b가 가장 오래된 세션이 되게 함
+    store.next_question('a', 'ca2', 1)
+    store.observe_step('c', 'ca2', 3)
+
+    assert store.current_step('b') is None
+    assert store.current_step('a') == ('ca2', 1)
+    assert store.current_step('c') == ('ca2', 3)
+    stats = store.stats()
+    assert stats['size'] == 2
+    assert stats['created'] == 3
+    assert stats['evicted'] == 1
@@ -0,0 +1,196 @@
+import sqlite3
+import threading
+
+import hint_cache
+import shared_cache
+from shared_cache import SharedDefaultHintPool, SharedQuestionCache, SharedSessionStore
+from test_hint_cache import CountingGenerator, finish_refills
+
+KEY = ('ca2', 2, 'ca2_요청 힌트 1')
+HINT = 'ESD로 이동 유도'
+
+
+def hold_write_lock(path):
+    """다른 워커가 쓰기 트랜잭션을 잡고 있는 상태를 만듭니다."""
+    connection = sqlite3.connect(str(path), isolation_level=None)
+    connection.execute('BEGIN IMMEDIATE')
+    return connection
+
+
+def test_question_cache_is_shared_between_workers(tmp_path):
+    path = tmp_path / 'shared.sqlite3'
+    first = SharedQuestionCache(str(path), flush_every=1000, flush_interval=1000)
+    second = SharedQuestionCache(str(path), flush_every=1000, flush_interval=1000)
+    first.put(KEY, HINT, 'ESD가 어디 있나요?', '답변')
+
+    writer = hold_write_lock(path)
+    try:
+        # 조회는 다른 워커의 쓰기 잠금을 기다리지 않음
+        assert second.get(KEY, HINT, 'ESD가 어디 있나요?') == '답변'
+        assert second.get(KEY, HINT, '보호복은 어떻게 입어요?') is None
+    finally:
+        writer.execute('ROLLBACK')
+        writer.close()
+
+    # 카운터는 모아 두었다가 반영하며, 통계는 모든 워커의 합계
+    second.flush()
+    assert first.stats()['hits'] == 1
+    assert first.stats()['misses'] == 1
+
+
+def test_session_continues_on_another_worker(tmp_path):
+    path = str(tmp_path / 'shared.sqlite3')
+    first, second = SharedSessionStore(path), SharedSessionStore(path)
+
+    first.observe_step('hmd-07', 'ca2', 2)
+    assert second.current_step('hmd-07') == ('ca2', 2)
+    assert second.next_question('hmd-07', 'ca2', 2) == (1, ())
+    first.record('hmd-07', 'ca2', 2, 'ESD가 어디 있나요?', '계기판 옆에 있습니다.')
+    assert second.next_question('hmd-07', 'ca2', 2) == (2, (('ESD가 어디 있나요?', '계기판 옆에 있습니다.'),))
+    assert first.stats()['size'] == 1
+
+
+def test_session_lookup_does_not_wait_for_writers(tmp_path):
+    path = tmp_path / 'shared.sqlite3'
+    store = SharedSessionStore(str(path), busy_timeout=0.1)
+    store.observe_step('hmd-07', 'ca2', 2)
+
+    writer = hold_write_lock(path)
+    try:
+        assert SharedSessionStore(str(path), busy_timeout=0.1).current_step('hmd-07') == ('ca2', 2)
+    finally:
+        writer.execute('ROLLBACK')
+        writer.close()
+
+
+def test_session_expiry_runs_periodically(tmp_path, monkeypatch, clock):
+    monkeypatch.setattr(shared_cache, 'time', clock)
+    path = str(tmp_path / 'shared.sqlite3')
+    store = SharedSessionStore(path, ttl=60, expire_interval=100)
+    store.observe_step('idle', 'ca2', 1)
+    store.observe_step('active', 'cb2', 4)
+
+    for _ in range(3):
+        clock.advance(30)
+        store.observe_step('active', 'cb2', 4)
+    # 만료된 세션은 지우기 전에도 보이지 않음
+    assert store.current_step('idle') is None
+    assert store.stats()['size'] == 1
+    assert store.stats()['expired'] == 0
+
+    clock.advance(10)
+    store.observe_step('active', 'cb2', 4)
+    assert store.stats()['expired'] == 1
+    assert store.current_step('active') == ('cb2', 4)
+
+
+def test_expired_session_starts_over(tmp_path, monkeypatch, clock):
+    monkeypatch.setattr(shared_cache, 'time', clock)
+    store = SharedSessionStore(str(tmp_path / 'shared.sqlite3'), ttl=60, expire_interval=1000)
+    store.observe_step('hmd-07', 'ca2', 1)
+    store.next_question('hmd-07', 'ca2', 1)
+    store.record('hmd-07', 'ca2', 1, '질문', '응답')
+
+    clock.advance(61)
+    # 아직 지우지 않은 만료 세션의 횟수와 대화는 이어 쓰지 않음
+    assert store.next_question('hmd-07', 'ca2', 1) == (1, ())
+    assert store.stats()['expired'] == 1
+
+
+def test_pool_lines_are_shared_between_workers(tmp_path):
+    path = str(tmp_path / 'shared.sqlite3')
+    first, second = SharedDefaultHintPool(path, size=2), SharedDefaultHintPool(path, size=2)
+    first.put('ca2', 1, HINT, ['문장 1', '문장 2'])
+
+    assert {second.take('ca2', 1, HINT) for _ in range(2)} == {'문장 1', '문장 2'}
+    # 원본 힌트가 바뀌면 이전 문장은 쓰지 않음
+    assert second.take('ca2', 1, '바뀐 힌트') is None
+
+
+def make_workers(path, count=2, **kwargs):
+    """같은 파일을 쓰는 워커별 풀 (각자 연결과 생성 스레드를 가짐)."""
+    return [SharedDefaultHintPool(str(path), size=2, max_workers=1, **kwargs) for _ in range(count)]
+
+
+def test_full_shared_pool_is_reused_without_generating(tmp_path):
+    workers = make_workers(tmp_path / 'shared.sqlite3')
+    workers[0].put('ca2', 1, HINT, ['문장 1', '문장 2'])
+    generate = CountingGenerator()
+
+    for _ in range(10):
+        for pool in workers:
+            assert pool.take('ca2', 1, HINT, generate)
+    for pool in workers:
+        finish_refills(pool)
+    assert generate.calls == 0
+
+
+def test_only_one_worker_refills_a_cell(tmp_path):
+    workers = make_workers(tmp_path / 'shared.sqlite3', count=3)
+    workers[0].put('ca2', 1, HINT, ['문장 1'])
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_generate():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return '새 문장'
+
+    assert workers[0].take('ca2', 1, HINT, slow_generate) == '문장 1'
+    assert started.wait(5)
+    # 다른 워커는 보충 중인 칸을 맡지 않음
+    for pool in workers[1:]:
+        assert pool.take('ca2', 1, HINT, slow_generate) == '문장 1'
+        assert not pool.refill('ca2', 1, HINT, slow_generate)
+
+    release.set()
+    for pool in workers:
+        finish_refills(pool)
+    assert len(calls) == 1
+    assert workers[2].lines('ca2', 1, HINT) == ['문장 1', '새 문장']
+
+    # 가득 찬 뒤에는 어느 워커도 보충하지 않음
+    for pool in workers:
+        pool.take('ca2', 1, HINT, slow_generate)
+        finish_refills(pool)
+    assert len(calls) == 1
+
+
+def test_failed_refill_releases_the_claim(tmp_path):
+    first, second = make_workers(tmp_path / 'shared.sqlite3')
+
+    def fail():
+        raise RuntimeError('OpenAI 오류')
+
+    assert first.take('ca2', 1, HINT, fail) is None
+    finish_refills(first)
+    # 실패한 워커가 놓아 준 칸은 다른 워커가 바로 맡음
+    generate = CountingGenerator()
+    assert second.take('ca2', 1, HINT, generate) is None
+    finish_refills(second)
+    assert generate.calls == 1
+    assert first.lines('ca2', 1, HINT) == ['새 문장 1']
+
+
+def test_max_age_replaces_one_line_across_workers(tmp_path, monkeypatch, clock):
+    monkeypatch.setattr(hint_cache, 'time', clock)
+    monkeypatch.setattr(shared_cache, 'time', clock)
+    workers = make_workers(tmp_path / 'shared.sqlite3', max_age=60)
+    workers[0].put('ca2', 1, HINT, ['문장 1', '문장 2'])
+    generate = CountingGenerator()
+
+    clock.advance(30)
+    for pool in workers:
+        pool.take('ca2', 1, HINT, generate)
+        finish_refills(pool)
+    assert generate.calls == 0
+
+    clock.advance(31)
+    for _ in range(3):
+        for pool in workers:
+            pool.take('ca2', 1, HINT, generate)
+            finish_refills(pool)
+    # 주기마다 모든 워커를 통틀어 가장 오래된 문장 하나만 교체
+    assert generate.calls == 1
+    assert workers[1].lines('ca2', 1, HINT) == ['문장 2', '새 문장 1']
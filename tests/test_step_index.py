@@ -0,0 +1,120 @@
+import os
+
+import pytest
+
+import step_index
+from hint_table import HintRow, HintTable, load_hint_table
+from step_index import FineStep, StepIndex, load_scenario_steps, parse_scenario_workbook
+
+ASSETS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets')
+SHEET = '스텝 구성'
+
+
+def hint_row(step: int, stage: str, content: str) -> HintRow:
+    return HintRow('ca2', step, stage, content, '기본', '요청1', '요청2')
+
+
+def test_maps_fine_steps_to_csv_rows():
+    table = HintTable([
+        hint_row(1, '1', 'PPE 보관함으로 이동 후 보호구 착용'),
+        hint_row(2, '2', 'ESD 비상가동중지버튼 누르기'),
+        # 2단계는 CSV 행이 둘이라 내용으로 나눔
+        hint_row(3, '2', '누출 위치로 이동하여 밸브 잠그기'),
+        hint_row(4, '', '단계 번호가 없는 행'),
+    ])
+    fine_steps = [
+        FineStep(1, 1, '보호구 착용'),
+        FineStep(2, 2, 'ESD로 이동'),
+        FineStep(3, 2, '비상가동중지버튼 누르기'),
+        FineStep(4, 2, '누출 위치로 이동'),
+        FineStep(5, 2, '밸브 잠그기'),
+        FineStep(6, 9, 'CSV에 없는 단계'),
+    ]
+    index = StepIndex(fine_steps, table)
+
+    assert index.mapping() == {1: 1, 2: 2, 3: 2, 4: 3, 5: 3}
+    assert index.coarse_step(4) == 3
+    assert index.coarse_step(6) is None
+    assert index.fine_steps_of(2) == (2, 3)
+    assert index.fine_steps_of(4) == ()
+    assert len(index) == 5
+
+
+def test_shipped_scenario_maps_in_order():
+    table = load_hint_table(os.path.join(ASSETS, 'hint_message_for_NPC.csv'))
+    pytest.importorskip('openpyxl')
+    fine_steps = parse_scenario_workbook(os.path.join(ASSETS, 'scenario.xlsx'), SHEET)
+    index = StepIndex(fine_steps, table)
+
+    mapping = index.mapping()
+    assert mapping
+    # 세부 단계 순서를 거스르지 않고, 모두 자기 단계의 CSV 행에 배정됨
+    steps = [mapping[fine] for fine in sorted(mapping)]
+    assert steps == sorted(steps)
+    stages = {fine.step: fine.stage for fine in fine_steps}
+    for fine, step in mapping.items():
+        assert table.get(table.scenes[0], step).stage.strip() == str(stages[fine])
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+
+    def write(rows):
+        book = openpyxl.Workbook()
+        sheet = book.active
+        sheet.title = SHEET
+        for row in rows:
+            sheet.append(row)
+        path = tmp_path / 'scenario.xlsx'
+        book.save(path)
+        return str(path)
+    return write
+
+
+def no_parse(path, sheet):
+    raise AssertionError("캐시를 써야 하는데 xlsx를 다시 읽음")
+
+
+def test_cache_reused_until_workbook_changes(workbook, tmp_path, monkeypatch):
+    path = workbook([('1단계: PPE 착용', None), (1, '보호구 착용'), (2, '보호구 점검'), ('2단계', None), (3, 'ESD')])
+    cache_path = str(tmp_path / 'cache' / 'steps.json')
+
+    steps = load_scenario_steps(path, cache_path, SHEET)
+    assert [(fine.step, fine.stage, fine.content) for fine in steps] == [
+        (1, 1, '보호구 착용'), (2, 1, '보호구 점검'), (3, 2, 'ESD'),
+    ]
+    assert os.path.exists(cache_path)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(step_index, 'parse_scenario_workbook', no_parse)
+        assert [fine.step for fine in load_scenario_steps(path, cache_path, SHEET)] == [1, 2, 3]
+        # 내용은 같고 수정 시각만 바뀐 경우(체크아웃 등)도 해시로 확인해 캐시 사용
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert [fine.step for fine in load_scenario_steps(path, cache_path, SHEET)] == [1, 2, 3]
+
+    # 내용이 바뀌면 다시 읽음
+    path = workbook([('1단계', None), (1, '보호구 착용'), ('2단계', None), (2, 'ESD'), (3, '밸브')])
+    assert [(fine.step, fine.stage) for fine in load_scenario_steps(path, cache_path, SHEET)] == [
+        (1, 1), (2, 2), (3, 2),
+    ]
+
+
+def test_cache_ignored_for_other_sheet_or_version(workbook, tmp_path, monkeypatch):
+    path = workbook([('1단계', None), (1, '보호구 착용')])
+    cache_path = str(tmp_path / 'steps.json')
+    load_scenario_steps(path, cache_path, SHEET)
+
+    calls = []
+    parse = step_index.parse_scenario_workbook
+
+    def counting_parse(path, sheet):
+        calls.append(sheet)
+        return parse(path, SHEET)
+
+    monkeypatch.setattr(step_index, 'parse_scenario_workbook', counting_parse)
+    load_scenario_steps(path, cache_path, '다른 시트')
+    monkeypatch.setattr(step_index, 'CACHE_VERSION', step_index.CACHE_VERSION + 1)
+    load_scenario_steps(path, cache_path, '다른 시트')
+    assert calls == ['다른 시트', '다른 시트']
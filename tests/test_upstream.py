@@ -0,0 +1,228 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from upstream import AsyncSingleFlight, DeadlineExceeded, HedgedCaller, LatencyTracker, SingleFlight
+
+
+def test_single_flight_shares_one_call():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'line'
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(flight.do, 'key', work)
+        started.wait(5)
+        waiters = [executor.submit(flight.do, 'key', work) for _ in range(3)]
+        # 기다리는 요청이 모두 합쳐질 때까지 대기
+        while flight.stats()['shared'] < 3:
+            threading.Event().wait(0.01)
+        release.set()
+        results = [leader.result(5)] + [waiter.result(5) for waiter in waiters]
+
+    assert results == ['line'] * 4
+    assert len(calls) == 1
+    assert flight.stats() == {'leaders': 1, 'shared': 3, 'in_flight': 0}
+
+
+def test_single_flight_leader_failure_reaches_waiters():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError('upstream failed')
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flight.do, 'key', fail)
+        started.wait(5)
+        waiter = executor.submit(flight.do, 'key', fail)
+        while flight.stats()['shared'] < 1:
+            threading.Event().wait(0.01)
+        release.set()
+        with pytest.raises(ValueError):
+            leader.result(5)
+        with pytest.raises(ValueError):
+            waiter.result(5)
+
+    # 실패한 호출은 남지 않으므로 다음 요청은 새로 호출
+    assert flight.do('key', lambda: 'retry') == 'retry'
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_async_single_flight_shares_one_call():
+    async def main():
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'line'
+
+        results = await asyncio.gather(*(flight.do('key', work) for _ in range(4)))
+        return results, calls, flight.stats()
+
+    results, calls, stats = asyncio.run(main())
+    assert results == ['line'] * 4
+    assert len(calls) == 1
+    assert stats == {'leaders': 1, 'shared': 3, 'in_flight': 0}
+
+
+def test_async_single_flight_leader_failure_reaches_waiters():
+    async def main():
+        flight = AsyncSingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError('upstream failed')
+
+        results = await asyncio.gather(flight.do('key', fail), flight.do('key', fail), return_exceptions=True)
+        return results, flight.stats()
+
+    results, stats = asyncio.run(main())
+    assert [type(result) for result in results] == [ValueError, ValueError]
+    assert stats['in_flight'] == 0
+
+
+def test_async_single_flight_survives_leader_cancellation():
+    async def main():
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'line'
+
+        leader = asyncio.ensure_future(flight.do('key', work))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.do('key', work))
+        await asyncio.sleep(0.01)
+        # 리더의 클라이언트 연결이 끊긴 경우
+        leader.cancel()
+        result = await waiter
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return result, calls, flight.stats()
+
+    result, calls, stats = asyncio.run(main())
+    assert result == 'line'
+    assert len(calls) == 1
+    assert stats['in_flight'] == 0
+
+
+def test_async_single_flight_waiter_cancellation_keeps_leader():
+    async def main():
+        flight = AsyncSingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return 'line'
+
+        leader = asyncio.ensure_future(flight.do('key', work))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.do('key', work))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        return await leader, waiter.cancelled()
+
+    assert asyncio.run(main()) == ('line', True)
+
+
+def wait_until(condition, timeout: float = 5.0):
+    """다른 스레드의 완료 콜백이 돌 때까지 기다립니다."""
+    event = threading.Event()
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        event.wait(0.01)
+    raise AssertionError('조건을 만족하지 않음')
+
+
+def test_hedged_caller_deadline_abandons_and_delivers_late_result():
+    caller = HedgedCaller(max_workers=2)
+    release = threading.Event()
+    late = []
+
+    def slow():
+        release.wait(5)
+        return 'late line'
+
+    with pytest.raises(DeadlineExceeded):
+        caller.call(slow, 0.05, on_late_result=late.append)
+    assert (caller.deadline_exceeded, caller.abandoned) == (1, 1)
+
+    release.set()
+    wait_until(lambda: caller.abandoned == 0)
+    assert late == ['late line']
+
+
+def test_hedged_caller_sheds_while_abandoned_calls_pile_up():
+    caller = HedgedCaller(max_workers=2, max_abandoned=1)
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return 'line'
+
+    with pytest.raises(DeadlineExceeded):
+        caller.call(slow, 0.05)
+    # 남은 호출이 상한에 닿으면 호출하지 않고 바로 포기
+    with pytest.raises(DeadlineExceeded):
+        caller.call(slow, 0.05)
+    assert (len(calls), caller.shed) == (1, 1)
+
+    release.set()
+    wait_until(lambda: caller.abandoned == 0)
+    assert caller.call(lambda: 'line', 0.05) == 'line'
+
+
+def test_hedged_caller_counts_losing_call_as_abandoned():
+    tracker = LatencyTracker(min_samples=1)
+    tracker.record(0.01)
+    caller = HedgedCaller(tracker=tracker, hedge_percentile=50, max_workers=2)
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(5)
+            return 'first'
+        return 'hedge'
+
+    late = []
+    assert caller.call(work, 1.0, on_late_result=late.append) == 'hedge'
+    assert (caller.hedged, caller.hedge_wins) == (1, 1)
+    # 진 첫 호출은 끝날 때까지 스레드를 차지하므로 abandoned로 셈
+    assert caller.abandoned == 1
+
+    release.set()
+    wait_until(lambda: caller.abandoned == 0)
+    # 이미 응답했으므로 진 호출의 결과는 전달하지 않음
+    assert late == []
+
+
+def test_hedged_caller_skips_hedge_when_not_allowed():
+    tracker = LatencyTracker(min_samples=1)
+    tracker.record(0.01)
+    caller = HedgedCaller(tracker=tracker, hedge_percentile=50, max_workers=2)
+
+    def work():
+        threading.Event().wait(0.05)
+        return 'line'
+
+    assert caller.call(work, 1.0, may_hedge=lambda: False) == 'line'
+    assert (caller.hedged, caller.abandoned) == (0, 0)
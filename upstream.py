@@ -0,0 +1,392 @@
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 요청을 하나의 호출로 합칩니다.
+    먼저 들어온 요청(리더)만 실제로 함수를 실행하고, 나머지는 끝날 때까지 기다렸다가 같은 결과를 받습니다.
+    """
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        """
+        :param key: 요청을 구분하는 키 (같은 키끼리 합쳐짐)
+        :param fn: 리더가 실행할 함수
+        :return: fn의 결과 (리더가 예외를 던지면 기다리던 요청도 같은 예외를 받음)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'leaders': self.leaders, 'shared': self.shared, 'in_flight': len(self._calls)}
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight의 asyncio 버전. 같은 키의 동시 요청은 하나의 Task로 실행한 코루틴 결과를 함께 기다립니다.
+    호출은 리더와 별개의 Task에서 진행되므로 리더가 취소되어도(클라이언트 연결 끊김 등) 기다리던 요청은 결과를 받습니다.
+    """
+    def __init__(self):
+        self._calls = {}
+        self.leaders = 0
+        self.shared = 0
+
+    async def do(self, key, coro_fn):
+        """
+        :param key: 요청을 구분하는 키 (같은 키끼리 합쳐짐)
+        :param coro_fn: 리더가 실행할 코루틴 함수
+        :return: coro_fn의 결과 (예외를 던지면 기다리던 요청도 같은 예외를 받음)
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            task = asyncio.get_running_loop().create_task(coro_fn())
+            self._calls[key] = task
+            self.leaders += 1
+            task.add_done_callback(lambda done: self._finish(key, done))
+        # 리더든 기다리던 요청이든 자신이 취소되어도 공유 호출은 계속 진행되도록 shield
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # 기다리는 요청이 모두 취소된 경우 'exception was never retrieved' 경고 방지
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {'leaders': self.leaders, 'shared': self.shared, 'in_flight': len(self._calls)}
+
+
+class DeadlineExceeded(TimeoutError):
+    """응답 시간 예산 안에 OpenAI 응답을 받지 못했을 때 발생합니다."""
+
+
+class LatencyTracker:
+    """
+    최근 OpenAI 호출의 응답 시간을 고정 길이 창에 모아 백분위수를 계산합니다.
+    """
+    def __init__(self, window: int = 256, min_samples: int = 20):
+        """
+        :param window: 보관할 최근 기록 수
+        :param min_samples: 백분위수를 계산하기 위한 최소 기록 수 (그 전에는 None)
+        """
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float):
+        """
+        :param q: 백분위 (0~100)
+        :return: 최근접 순위 방식의 백분위수 (초), 기록이 부족하면 None
+        """
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            values = sorted(self._samples)
+        rank = min(len(values), max(1, math.ceil(q / 100 * len(values))))
+        return values[rank - 1]
+
+
+class _LateResult:
+    """예산을 넘긴 뒤 도착한 첫 번째 성공 결과를 한 번만 콜백에 전달합니다."""
+    __slots__ = ('callback', 'delivered', 'lock')
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.delivered = False
+        self.lock = threading.Lock()
+
+    def __call__(self, result):
+        with self.lock:
+            if self.delivered:
+                return
+            self.delivered = True
+        try:
+            self.callback(result)
+        except Exception as e:
+            print(f"늦게 도착한 응답 처리 실패: {e}")
+
+
+class HedgedCaller:
+    """
+    OpenAI 호출에 응답 시간 예산을 적용합니다.
+    첫 호출이 최근 응답 시간의 hedge_percentile 백분위수를 넘기면 같은 호출을 한 번 더 보내고,
+    둘 중 먼저 성공한 결과를 사용합니다. 예산 안에 성공하지 못하면 DeadlineExceeded를 던집니다.
+    예산을 넘긴 호출은 취소하지 않고 백그라운드에서 끝까지 진행하며, 결과는 on_late_result로 받을 수 있습니다.
+    이렇게 남은 호출(먼저 끝난 호출에 진 나머지 호출 포함)이 max_abandoned개 이상이면 스레드가 모두 막히지 않도록 새 호출을 보내지 않고 바로 DeadlineExceeded를 던집니다.
+    """
+    def __init__(self, tracker: LatencyTracker = None, hedge_percentile: float = 0.0, max_workers: int = 32,
+                 max_abandoned: int = 16):
+        """
+        :param tracker: 응답 시간 기록 (None이면 새로 만듦)
+        :param hedge_percentile: 두 번째 호출을 보낼 기준 백분위 (0이면 사용하지 않음)
+        :param max_workers: 예산이 적용된 호출을 실행할 스레드 수
+        :param max_abandoned: 예산을 넘기고도 진행 중인 호출의 상한 (max_workers보다 작아야 새 호출이 실행될 스레드가 남음)
+        """
+        self.tracker = tracker or LatencyTracker()
+        self.hedge_percentile = hedge_percentile
+        self.max_abandoned = max_abandoned
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='upstream')
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+        self.abandoned = 0
+        self.shed = 0
+
+    def hedge_delay(self):
+        """두 번째 호출을 보내기까지 기다릴 시간 (초). 사용하지 않거나 기록이 부족하면 None."""
+        if not self.hedge_percentile:
+            return None
+        return self.tracker.percentile(self.hedge_percentile)
+
+    def _timed(self, fn):
+        start_time = time.monotonic()
+        result = fn()
+        self.tracker.record(time.monotonic() - start_time)
+        return result
+
+    def _submit(self, fn):
+        # 호출 스레드의 컨텍스트(요청별 지표 레이블 등)를 작업 스레드로 넘김
+        return self._executor.submit(contextvars.copy_context().run, self._timed, fn)
+
+    def call(self, fn, budget: float, on_late_result=None, may_hedge=None):
+        """
+        :param fn: OpenAI를 호출하는 함수 (인자 없음)
+        :param budget: 응답 시간 예산 (초). 0 이하이면 예산 없이 바로 호출
+        :param on_late_result: 예산을 넘긴 뒤 호출이 성공하면 그 결과로 호출할 함수
+        :param may_hedge: 두 번째 호출을 보내기 직전에 호출하여 False면 보내지 않음 (사용량 한도 확인용)
+        :return: fn의 결과
+        :raises DeadlineExceeded: 예산 안에 성공한 호출이 없을 때
+        """
+        if budget <= 0:
+            return self._timed(fn)
+
+        deadline = time.monotonic() + budget
+        with self._lock:
+            self.calls += 1
+            if self.abandoned >= self.max_abandoned:
+                self.shed += 1
+                raise DeadlineExceeded(f"예산을 넘긴 호출 {self.abandoned}개가 아직 진행 중")
+        first = self._submit(fn)
+        futures = [first]
+
+        delay = self.hedge_delay()
+        if delay is not None and delay < budget:
+            done, _ = wait(futures, timeout=delay)
+            if not done and (may_hedge is None or may_hedge()):
+                futures.append(self._submit(fn))
+                with self._lock:
+                    self.hedged += 1
+
+        pending, last_error = set(futures), None
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not first:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    # 진 호출은 취소할 수 없어 스레드를 계속 차지하므로 끝날 때까지 남은 호출로 셈
+                    self._abandon(pending, None)
+                    return future.result()
+                last_error = future.exception()
+
+        if not pending:
+            # 예산 안에 모든 호출이 실패한 경우는 원래 예외를 그대로 전달
+            raise last_error
+
+        with self._lock:
+            self.deadline_exceeded += 1
+        self._abandon(pending, _LateResult(on_late_result) if on_late_result is not None else None)
+        raise DeadlineExceeded(f"응답 시간 예산 {budget:.1f}초 초과")
+
+    def _abandon(self, futures, deliver):
+        """
+        기다리지 않을 호출을 끝날 때까지 abandoned로 셉니다.
+        :param deliver: 성공한 결과를 받을 _LateResult (None이면 버림)
+        """
+        with self._lock:
+            self.abandoned += len(futures)
+
+        def on_done(future):
+            with self._lock:
+                self.abandoned -= 1
+            if deliver is not None and future.exception() is None:
+                deliver(future.result())
+
+        for future in futures:
+            future.add_done_callback(on_done)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {
+                'calls': self.calls,
+                'hedged': self.hedged,
+                'hedge_wins': self.hedge_wins,
+                'deadline_exceeded': self.deadline_exceeded,
+                'abandoned': self.abandoned,
+                'shed': self.shed,
+            }
+        delay = self.hedge_delay()
+        stats['hedge_delay_ms'] = delay * 1000 if delay is not None else None
+        return stats
+
+
+class AsyncHedgedCaller:
+    """
+    HedgedCaller의 asyncio 버전. 스레드 대신 태스크로 호출하며, 예산을 넘긴 태스크도 끝까지 진행합니다.
+    남은 태스크도 연결과 동시 호출 자리를 차지하므로 max_abandoned개 이상이면 같은 방식으로 새 호출을 보내지 않습니다.
+    """
+    def __init__(self, tracker: LatencyTracker = None, hedge_percentile: float = 0.0, max_abandoned: int = 16):
+        self.tracker = tracker or LatencyTracker()
+        self.hedge_percentile = hedge_percentile
+        self.max_abandoned = max_abandoned
+        # 예산을 넘겨 버려진 태스크가 끝나기 전에 가비지 컬렉션되지 않도록 참조를 보관
+        self._background = set()
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+        self.shed = 0
+
+    def hedge_delay(self):
+        if not self.hedge_percentile:
+            return None
+        return self.tracker.percentile(self.hedge_percentile)
+
+    async def _timed(self, coro_fn):
+        start_time = time.monotonic()
+        result = await coro_fn()
+        self.tracker.record(time.monotonic() - start_time)
+        return result
+
+    async def call(self, coro_fn, budget: float, on_late_result=None, may_hedge=None):
+        """
+        :param coro_fn: OpenAI를 호출하는 코루틴 함수 (인자 없음)
+        :param budget: 응답 시간 예산 (초). 0 이하이면 예산 없이 바로 호출
+        :param on_late_result: 예산을 넘긴 뒤 호출이 성공하면 그 결과로 호출할 함수
+        :param may_hedge: 두 번째 호출을 보내기 직전에 호출하여 False면 보내지 않음
+        :raises DeadlineExceeded: 예산 안에 성공한 호출이 없을 때
+        """
+        if budget <= 0:
+            return await self._timed(coro_fn)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + budget
+        self.calls += 1
+        if len(self._background) >= self.max_abandoned:
+            self.shed += 1
+            raise DeadlineExceeded(f"예산을 넘긴 호출 {len(self._background)}개가 아직 진행 중")
+        first = asyncio.ensure_future(self._timed(coro_fn))
+        tasks = [first]
+
+        delay = self.hedge_delay()
+        if delay is not None and delay < budget:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and (may_hedge is None or may_hedge()):
+                tasks.append(asyncio.ensure_future(self._timed(coro_fn)))
+                self.hedged += 1
+
+        pending, last_error = set(tasks), None
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        for other in pending:
+                            other.cancel()
+                        return task.result()
+                    last_error = task.exception()
+        except asyncio.CancelledError:
+            for task in pending:
+                task.cancel()
+            raise
+
+        if not pending:
+            raise last_error
+
+        self.deadline_exceeded += 1
+        deliver = _LateResult(on_late_result) if on_late_result is not None else None
+        for task in pending:
+            self._background.add(task)
+            task.add_done_callback(lambda t: self._finish_late(t, deliver))
+        raise DeadlineExceeded(f"응답 시간 예산 {budget:.1f}초 초과")
+
+    def _finish_late(self, task, deliver):
+        self._background.discard(task)
+        if task.cancelled() or task.exception() is not None:
+            return
+        if deliver is not None:
+            deliver(task.result())
+
+    def stats(self) -> dict:
+        delay = self.hedge_delay()
+        return {
+            'calls': self.calls,
+            'hedged': self.hedged,
+            'hedge_wins': self.hedge_wins,
+            'deadline_exceeded': self.deadline_exceeded,
+            'abandoned': len(self._background),
+            'shed': self.shed,
+            'hedge_delay_ms': delay * 1000 if delay is not None else None,
+        }
@@ -0,0 +1,36 @@
+import argparse
+import time
+
+from api import CSV_PATH, DEFAULT_POOL_PATH, DEFAULT_POOL_SIZE, trainNPC
+from hint_cache import DefaultHintPool
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV의 모든 (씬, 단계)에 대해 NPC 기본 힌트 문장 풀을 미리 생성합니다.")
+    parser.add_argument('--csv', default=CSV_PATH, help="힌트 CSV 파일 경로")
+    parser.add_argument('--path', default=DEFAULT_POOL_PATH, help="풀을 저장할 JSON 파일 경로")
+    parser.add_argument('--size', type=int, default=DEFAULT_POOL_SIZE, help="(씬, 단계)마다 생성할 문장 수")
+    parser.add_argument('--workers', type=int, default=4, help="동시에 호출할 OpenAI 요청 수")
+    parser.add_argument('--refresh', action='store_true', help="기존 풀을 무시하고 처음부터 다시 생성")
+    args = parser.parse_args()
+
+    pool = DefaultHintPool(args.path, size=args.size)
+    if not args.refresh:
+        print(f"기존 풀 로드: {pool.load()}개 항목")
+
+    npc = trainNPC(csv_path=args.csv, default_pool=pool)
+    if not npc.client:
+        print("OpenAI 클라이언트가 없어 풀을 생성할 수 없습니다.")
+        return
+
+    start_time = time.time()
+    generated = npc.warm_default_pool(max_workers=args.workers)
+    print(f"{generated}개 문장 생성 완료 ({time.time() - start_time:.1f}초) -> {args.path}")
+
+
+if __name__ == '__main__':
+    main()
+
+"""
+python warmup.py --size 3
+"""